@@ -3,24 +3,30 @@ Script to remove YouTube/Google network traffic from annotated log files.
 Filters out network packets with YouTube/Google IP addresses.
 """
 import os
+import sys
 import json
 import shutil
 from datetime import datetime
 
+# Shared CIDR index from the training data rules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'Data-preparation', 'v2', 'prepare_training'))
+from rules.ip_intel import IPRangeIndex
+
+
+# YouTube/Google IP ranges (based on actual traffic analysis)
+YOUTUBE_IP_RANGES = IPRangeIndex([
+    ('74.125.0.0/16', 'youtube'),     # YouTube CDN (classic range)
+    ('142.250.0.0/15', 'youtube'),    # Google/YouTube (newer ranges 142.250.x.x and 142.251.x.x)
+])
+
 
 def is_youtube_ip(ip_address):
     """Check if an IP address belongs to YouTube/Google."""
     if not ip_address:
         return False
     
-    # YouTube/Google IP ranges (based on actual traffic analysis)
-    youtube_prefixes = [
-        '74.125.',      # YouTube CDN (classic range)
-        '142.250.',     # Google/YouTube (newer range) - 0.8% + 0.6% + 0.3% of traffic
-        '142.251.',     # Google/YouTube (newer range) - 0.8% + 0.5% + 0.5% + 0.4% + 0.3% of traffic
-    ]
-    
-    return any(ip_address.startswith(prefix) for prefix in youtube_prefixes)
+    return ip_address in YOUTUBE_IP_RANGES
 
 
 def filter_youtube_from_logs(logs):
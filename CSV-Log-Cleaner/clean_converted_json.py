@@ -1,9 +1,15 @@
 """Clean converted JSON logs using the same methods as the Log Cleaner."""
 import json
+import os
 import sys
 import hashlib
 from datetime import datetime, timezone, timedelta
 
+# Shared deduplication engine from the data preparation pipeline
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'Data-preparation', 'v2'))
+from dedup import iter_unique, canonical_items_bytes
+
 
 def parse_kibana_timestamp(timestamp_str):
     """Parse Kibana timestamp format: Jul 20, 2025 @ 20:54:59.842"""
@@ -111,22 +117,10 @@ def parse_and_clean_system_log(json_path):
 def remove_duplicates(events):
     """Identify exact duplicates while preserving event order and integrity."""
     print("\n=== Removing Duplicates ===")
-    seen_events = set()
-    unique_events = []
-    duplicates = 0
-    
-    for event in events:
-        # Create a frozen set of event items for hashing
-        event_items = frozenset(
-            (k, str(v)) for k, v in event.items() 
-            if v is not None  # Ignore None values
-        )
-        
-        if event_items not in seen_events:
-            seen_events.add(event_items)
-            unique_events.append(event)
-        else:
-            duplicates += 1
+    # Events compare equal when their non-None fields match as strings
+    stats = {}
+    unique_events = list(iter_unique(events, key=canonical_items_bytes, stats=stats))
+    duplicates = stats['duplicates']
     
     if duplicates:
         print(f"Removed {duplicates} exact duplicate events")
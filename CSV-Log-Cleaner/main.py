@@ -10,11 +10,24 @@ from datetime import datetime, timezone
 import hashlib
 import sys
 
-try:
-    import scapy.all as scapy
-except ImportError:
-    print("Error: scapy not installed. Run: pip install scapy")
-    sys.exit(1)
+# Shared flow builder and PCAP reader from the data preparation pipeline
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'Data-preparation', 'v2'))
+from flow_builder import aggregate_flows
+from pcap_reader import iter_pcap_records, decode_layers, packet_event
+
+# Collapse network packets into bidirectional flow records (False = keep one event per packet)
+AGGREGATE_FLOWS = True
+
+# Layers kept from each packet, in order (None = all fields)
+NETWORK_LAYER_FIELDS = {
+    'Ether': ('dst', 'src', 'type'),
+    'IP': None,
+    'TCP': None,
+    'UDP': None,
+    'Raw': ('load',),
+    'ICMP': ('type', 'code', 'chksum'),
+}
 
 
 def anonymize_id(value):
@@ -209,125 +222,47 @@ def parse_browser_logs(browser_path):
     return events
 
 
-def parse_pcapng_network_logs(pcapng_path):
-    """Parse PCAPNG network capture file with full layer details."""
-    events = []
+def iter_pcapng_network_logs(pcapng_path):
+    """
+    Stream a PCAP/PCAPNG network capture as events with full layer details.
+    Packets are read and decoded one at a time, so memory stays constant.
+    """
+    count = 0
     
     try:
-        packets = scapy.rdpcap(pcapng_path)
-        print(f"Loaded {len(packets)} packets from PCAP")
-        
-        for idx, pkt in enumerate(packets):
+        for record in iter_pcap_records(pcapng_path):
             try:
-                # Extract timestamp
-                timestamp = None
-                if hasattr(pkt, 'time'):
-                    dt = datetime.fromtimestamp(float(pkt.time), tz=timezone.utc)
-                    timestamp = dt.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+                decoded = decode_layers(record.data, record.linktype)
                 
                 # Build layers dictionary
                 layers = {}
+                for name, fields in NETWORK_LAYER_FIELDS.items():
+                    if name in decoded:
+                        layer = decoded[name]
+                        layers[name] = dict(layer) if fields is None else {field: layer[field] for field in fields}
                 
-                # Ethernet layer
-                if scapy.Ether in pkt:
-                    ether = pkt[scapy.Ether]
-                    layers['Ether'] = {
-                        'dst': ether.dst,
-                        'src': ether.src,
-                        'type': str(ether.type)
-                    }
-                
-                # IP layer
-                if scapy.IP in pkt:
-                    ip = pkt[scapy.IP]
-                    layers['IP'] = {
-                        'version': str(ip.version),
-                        'ihl': str(ip.ihl),
-                        'tos': str(ip.tos),
-                        'len': str(ip.len),
-                        'id': str(ip.id),
-                        'flags': str(ip.flags),
-                        'frag': str(ip.frag),
-                        'ttl': str(ip.ttl),
-                        'proto': str(ip.proto),
-                        'chksum': str(ip.chksum),
-                        'src': ip.src,
-                        'dst': ip.dst,
-                        'options': str(ip.options)
-                    }
-                
-                # TCP layer
-                if scapy.TCP in pkt:
-                    tcp = pkt[scapy.TCP]
-                    layers['TCP'] = {
-                        'sport': str(tcp.sport),
-                        'dport': str(tcp.dport),
-                        'seq': str(tcp.seq),
-                        'ack': str(tcp.ack),
-                        'dataofs': str(tcp.dataofs),
-                        'reserved': str(tcp.reserved),
-                        'flags': str(tcp.flags),
-                        'window': str(tcp.window),
-                        'chksum': str(tcp.chksum),
-                        'urgptr': str(tcp.urgptr),
-                        'options': str(tcp.options)
-                    }
-                
-                # UDP layer
-                if scapy.UDP in pkt:
-                    udp = pkt[scapy.UDP]
-                    layers['UDP'] = {
-                        'sport': str(udp.sport),
-                        'dport': str(udp.dport),
-                        'len': str(udp.len),
-                        'chksum': str(udp.chksum)
-                    }
-                
-                # Raw payload layer
-                if scapy.Raw in pkt:
-                    raw = pkt[scapy.Raw]
-                    layers['Raw'] = {
-                        'load': str(raw.load)
-                    }
-                
-                # ICMP layer
-                if scapy.ICMP in pkt:
-                    icmp = pkt[scapy.ICMP]
-                    layers['ICMP'] = {
-                        'type': str(icmp.type),
-                        'code': str(icmp.code),
-                        'chksum': str(icmp.chksum)
-                    }
-                
-                # Create event with full structure
-                event = {
-                    'timestamp': timestamp,
-                    'event_type': 'network',
-                    'packet_number': idx + 1,
-                    'length': len(pkt),
-                    'summary': pkt.summary(),
-                    'raw_hex': '',  # Empty as in your example
-                    'layers': layers
-                }
-                
-                events.append(event)
-            except KeyboardInterrupt:
-                print(f"\nInterrupted by user at packet {idx+1}/{len(packets)}")
-                raise
-            except Exception as pkt_error:
+                # Create event with full structure (summary from all decoded layers)
+                event = packet_event(record, decoded)
+                event['layers'] = layers
+            except Exception:
                 # Skip corrupted packets silently to avoid flooding output
-                if idx % 10000 == 0 and idx > 0:
-                    print(f"Processing packet {idx}/{len(packets)}...")
                 continue
+            
+            count += 1
+            if count % 100000 == 0:
+                print(f"Processing packet {count}...")
+            yield event
         
-        print(f"Parsed {len(events)} network packets")
+        print(f"Parsed {count} network packets")
     except KeyboardInterrupt:
-        print(f"\nPCAP parsing interrupted. Returning {len(events)} parsed packets so far.")
-        return events
+        print(f"\nPCAP parsing interrupted. Returning {count} parsed packets so far.")
     except Exception as e:
         print(f"Error parsing PCAPNG: {e}")
-    
-    return events
+
+
+def parse_pcapng_network_logs(pcapng_path):
+    """Parse PCAPNG network capture file to a list of events (see iter_pcapng_network_logs)."""
+    return list(iter_pcapng_network_logs(pcapng_path))
 
 
 def filter_system_log(event):
@@ -547,7 +482,12 @@ def process_session_folder(folder_path, output_base_path):
     print(f"Total system events from all CSVs: {len(system_events)}")
     
     browser_events = parse_browser_logs(browser_log)
-    network_events = parse_pcapng_network_logs(pcapng_log)
+    if AGGREGATE_FLOWS:
+        # Packets stream straight into the flow builder
+        network_events = aggregate_flows(iter_pcapng_network_logs(pcapng_log))
+        print(f"Aggregated into {len(network_events)} flow records")
+    else:
+        network_events = parse_pcapng_network_logs(pcapng_log)
     
     # Merge and create output
     print("\nMerging logs...")
@@ -1,20 +1,38 @@
 """Convert PCAP/PCAPNG files to JSON format matching log_parser.py logic."""
+import os
 import sys
 import json
-from datetime import datetime, timezone
 
+# Shared flow builder and PCAP reader from the data preparation pipeline
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'Data-preparation', 'v2'))
+from flow_builder import aggregate_flows
+from pcap_reader import PREFETCH_PER_WORKER, RANGE_BYTES, decode_range, iter_packet_events, map_capture_ranges
 
-def parse_pcap_to_json(pcap_path, output_file=None):
+# Processes decoding a capture in parallel (set to 1 to decode serially)
+NUM_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
+
+def range_to_jsonl(capture_range):
+    """Pool task: JSONL text and packet count of one capture byte range."""
+    events = decode_range(capture_range)
+    return ''.join(json.dumps(event, ensure_ascii=False) + '\n' for event in events), len(events)
+
+
+def parse_pcap_to_json(pcap_path, output_file=None, flows=True, workers=NUM_WORKERS):
     """
-    Parse PCAP file using Scapy to preserve all packet data.
+    Stream a PCAP/PCAPNG file to JSONL, one packet at a time.
     Follows the same logic as log_parser.py's parse_pcap_logs function.
-    """
-    try:
-        import scapy.all as scapy
-    except ImportError:
-        print("Error: Scapy not installed. Install with: pip install scapy")
-        return []
+    With flows, packets are collapsed into bidirectional flow records
+    (first/last packet numbers kept in each record's flow); without, each
+    packet is written as soon as it is decoded, so memory stays constant.
+    With several workers, byte ranges of the capture are decoded on a
+    process pool and written back in file order; the output is the same as
+    a serial run. Memory is then bounded by the decoded ranges in flight
+    (see map_capture_ranges) instead of constant.
     
+    Returns the number of records written (0 on error).
+    """
     print("=" * 60)
     print("PCAP to JSON Converter")
     print("=" * 60)
@@ -25,102 +43,92 @@ def parse_pcap_to_json(pcap_path, output_file=None):
         output_file = pcap_path.replace('.pcap', '_converted.json').replace('.pcapng', '_converted.json')
     print(f"Output file: {output_file}")
     
-    events = []
+    packets = 0
+    written = 0
     
     try:
-        print("\n=== Reading PCAP file with Scapy ===")
-        packets = scapy.rdpcap(pcap_path)
-        print(f"Total packets: {len(packets)}")
-        
         print("\n=== Processing Packets ===")
-        for i, pkt in enumerate(packets):
-            raw_timestamp = float(pkt.time) if hasattr(pkt, 'time') else None
-            timestamp = None
-            
-            if raw_timestamp:
-                try:
-                    dt = datetime.fromtimestamp(raw_timestamp, tz=timezone.utc)
-                    timestamp = dt.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
-                except Exception as e:
-                    print(f"Network log timestamp error for packet {i+1}: {str(e)}")
-                    timestamp = None
-            
-            # Preserve all packet data
-            event = {
-                'timestamp': timestamp,
-                'event_type': 'network',
-                'packet_number': i + 1,
-                'length': len(pkt),
-                'summary': pkt.summary(),
-                'raw_hex': "",
-                'layers': {}
-            }
-            
-            # Extract information from each layer
-            for layer in pkt.layers():
-                layer_name = layer.__name__
-                layer_data = {}
-                if hasattr(pkt[layer], 'fields'):
-                    for field_name, field_value in pkt[layer].fields.items():
-                        if hasattr(field_value, '__str__'):
-                            layer_data[field_name] = str(field_value)
-                        else:
-                            layer_data[field_name] = field_value
-                event['layers'][layer_name] = layer_data
-            
-            events.append(event)
-            
-            # Progress indicator
-            if (i + 1) % 1000 == 0:
-                print(f"  Processed {i + 1} packets...")
         
-        print(f"\nParsed {len(events)} network packets")
+        if workers > 1:
+            print(f"Decoding with {workers} worker processes")
+        
+        def packet_events():
+            nonlocal packets
+            for event in iter_packet_events(pcap_path, workers):
+                packets += 1
+                # Progress indicator
+                if packets % 100000 == 0:
+                    print(f"  Processed {packets} packets...")
+                yield event
+        
+        # Write to output file (JSONL format - one JSON object per line)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            if not flows and workers > 1:
+                # Workers serialize their ranges; the JSONL is written in file order
+                for text, count in map_capture_ranges(pcap_path, range_to_jsonl, workers):
+                    f.write(text)
+                    packets += count
+                    written += count
+                    print(f"  Processed {packets} packets...")
+            else:
+                events = aggregate_flows(packet_events()) if flows else packet_events()
+                for event in events:
+                    f.write(json.dumps(event, ensure_ascii=False) + '\n')
+                    written += 1
+        
+        print(f"\nParsed {packets} network packets")
+        if flows:
+            print(f"Aggregated into {written} flow records")
+        print(f"Successfully wrote {written} records to {output_file}")
         
     except Exception as e:
-        print(f"Error parsing PCAP with Scapy: {e}")
+        print(f"Error converting PCAP: {e}")
         import traceback
         traceback.print_exc()
-        return []
-    
-    # Write to output file (JSONL format - one JSON object per line)
-    print("\n=== Writing Output ===")
-    try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for event in events:
-                f.write(json.dumps(event, ensure_ascii=False) + '\n')
-        print(f"Successfully wrote {len(events)} packets to {output_file}")
-    except Exception as e:
-        print(f"Error writing output: {e}")
-        return []
+        return 0
     
     # Summary
     print("\n" + "=" * 60)
     print("Summary")
     print("=" * 60)
-    print(f"Total packets:   {len(events)}")
+    label = 'Total flows:' if flows else 'Total packets:'
+    print(f"{label:<17}{written}")
     print(f"Output format:   JSONL (one JSON per line)")
     print(f"Output file:     {output_file}")
     print("=" * 60)
     
-    return events
+    return written
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python pcap_to_json_converter.py <pcap_file> [output_file]")
+        print("Usage: python pcap_to_json_converter.py <pcap_file> [output_file] [--packets] [--workers N]")
         print("\nArguments:")
         print("  pcap_file   : Path to the PCAP/PCAPNG file to convert")
         print("  output_file : (Optional) Output JSON file path (default: input_converted.json)")
+        print("  --packets   : (Optional) Write one event per packet instead of flow records")
+        print(f"  --workers N : (Optional) Decoding processes (default: {NUM_WORKERS}, 1 = serial, constant memory)")
+        print(f"                Holds up to {PREFETCH_PER_WORKER} x N + 1 decoded ranges of"
+              f" ~{RANGE_BYTES // (1024 * 1024)} MiB of capture each in memory")
         print("\nExamples:")
         print('  python pcap_to_json_converter.py "traffic.pcap"')
         print('  python pcap_to_json_converter.py "traffic.pcapng" "output.json"')
+        print('  python pcap_to_json_converter.py "traffic.pcapng" "output.json" --packets --workers 8')
         sys.exit(1)
     
-    pcap_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
+    args = sys.argv[1:]
+    keep_packets = '--packets' in args
+    workers = NUM_WORKERS
+    if '--workers' in args:
+        position = args.index('--workers')
+        workers = max(1, int(args[position + 1]))
+        del args[position:position + 2]
+    args = [arg for arg in args if arg != '--packets']
+    pcap_file = args[0]
+    output_file = args[1] if len(args) > 1 else None
     
     try:
-        parse_pcap_to_json(pcap_file, output_file)
+        parse_pcap_to_json(pcap_file, output_file, flows=not keep_packets, workers=workers)
     except Exception as e:
         print(f"\nError: {e}")
         import traceback
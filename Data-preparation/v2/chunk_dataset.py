@@ -0,0 +1,228 @@
+"""
+Sharded, random-access chunk datasets
+A chunk dataset is a directory of JSONL shards (part-00000.jsonl, ...) with
+a sidecar index (index.jsonl) holding, per chunk: shard, byte offset and
+length, session_id, label, chunk_index and event-type counts.
+
+Samplers, splitters and test extractors select chunks from the index alone
+and seek straight to the records they need, instead of parsing every chunk.
+
+Standard library only, so it can be shared with the scripts outside this
+pipeline.
+"""
+
+import json
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Optional
+
+INDEX_FILE = 'index.jsonl'
+DEFAULT_SHARD_SIZE = 50_000  # Chunks per shard
+
+
+def shard_name(shard: int) -> str:
+    """File name of a shard"""
+    return f"part-{shard:05d}.jsonl"
+
+
+def is_chunk_dataset(path: Path) -> bool:
+    """Whether a path is a chunk dataset directory"""
+    path = Path(path)
+    return path.is_dir() and (path / INDEX_FILE).exists()
+
+
+def index_entry(chunk: Dict, label: Optional[str] = None) -> Dict:
+    """
+    Index fields of a chunk
+    
+    Args:
+        chunk: Chunk object ({"metadata": ..., "logs": [...]})
+        label: Label of the dataset, used when the chunk has no 'chunk_label'
+    
+    Returns:
+        Dict with session_id, label, chunk_index and event_types (event_type -> count)
+    """
+    metadata = chunk.get('metadata', {})
+    return {
+        'session_id': metadata.get('session_id', 'unknown'),
+        'label': chunk.get('chunk_label', label),
+        'chunk_index': metadata.get('chunk_index'),
+        'event_types': dict(Counter(log.get('event_type', 'unknown') for log in chunk.get('logs', [])))
+    }
+
+
+class ChunkDatasetWriter:
+    """
+    Incremental chunk dataset writer
+    
+    The dataset is built in a temporary directory and moved into place when
+    the writer is closed without error.
+    
+    Usage:
+        with ChunkDatasetWriter(dataset_dir, label='normal') as writer:
+            writer.write(chunk)
+    """
+    
+    def __init__(self, dataset_dir: Path, label: Optional[str] = None, shard_size: int = DEFAULT_SHARD_SIZE):
+        """
+        Open the writer
+        
+        Args:
+            dataset_dir: Dataset directory (replaced on commit)
+            label: Label recorded for chunks without 'chunk_label'
+            shard_size: Chunks per shard
+        """
+        self.dataset_dir = Path(dataset_dir)
+        self.tmp_dir = self.dataset_dir.with_name(self.dataset_dir.name + '.tmp')
+        self.label = label
+        self.shard_size = shard_size
+        self.count = 0
+        
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        self.tmp_dir.mkdir(parents=True)
+        self._index = open(self.tmp_dir / INDEX_FILE, 'w', encoding='utf-8')
+        self._shard: Optional[IO[bytes]] = None
+        self._shard_number = -1
+        self._offset = 0
+    
+    def write(self, chunk: Dict):
+        """Write one chunk and its index entry"""
+        if self._shard is None or self.count % self.shard_size == 0:
+            if self._shard is not None:
+                self._shard.close()
+            self._shard_number += 1
+            self._shard = open(self.tmp_dir / shard_name(self._shard_number), 'wb')
+            self._offset = 0
+        
+        line = (json.dumps(chunk, ensure_ascii=False) + '\n').encode('utf-8')
+        self._shard.write(line)
+        
+        entry = {'shard': self._shard_number, 'offset': self._offset, 'length': len(line)}
+        entry.update(index_entry(chunk, self.label))
+        self._index.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        
+        self._offset += len(line)
+        self.count += 1
+    
+    def close(self, commit: bool = True):
+        """Close the dataset; move it into place if commit, else discard it"""
+        if self._shard is not None:
+            self._shard.close()
+        self._index.close()
+        if commit:
+            shutil.rmtree(self.dataset_dir, ignore_errors=True)
+            self.tmp_dir.replace(self.dataset_dir)
+        else:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def __enter__(self) -> 'ChunkDatasetWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
+
+def write_chunk_dataset(chunks: Iterable[Dict], dataset_dir: Path, label: Optional[str] = None,
+                        shard_size: int = DEFAULT_SHARD_SIZE) -> int:
+    """
+    Stream chunks to a sharded dataset with an index
+    
+    Args:
+        chunks: Chunk objects (usually a generator)
+        dataset_dir: Dataset directory
+        label: Label recorded for chunks without 'chunk_label'
+        shard_size: Chunks per shard
+    
+    Returns:
+        Number of chunks written
+    """
+    with ChunkDatasetWriter(dataset_dir, label, shard_size) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return writer.count
+
+
+def load_index(dataset_dir: Path) -> List[Dict]:
+    """
+    Load a dataset's index
+    
+    Args:
+        dataset_dir: Dataset directory
+    
+    Returns:
+        Index entries in dataset order (shard, offset, length, session_id,
+        label, chunk_index, event_types)
+    """
+    with open(Path(dataset_dir) / INDEX_FILE, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ChunkReader:
+    """
+    Random-access reader: reads chunks by index entry
+    
+    Usage:
+        with ChunkReader(dataset_dir) as reader:
+            chunk = reader.read(entry)
+    """
+    
+    def __init__(self, dataset_dir: Path):
+        """
+        Open the reader (shards are opened on first use)
+        
+        Args:
+            dataset_dir: Dataset directory
+        """
+        self.dataset_dir = Path(dataset_dir)
+        self._shards: Dict[int, IO[bytes]] = {}
+    
+    def read_bytes(self, entry: Dict) -> bytes:
+        """Raw JSON line of a chunk"""
+        shard = self._shards.get(entry['shard'])
+        if shard is None:
+            shard = self._shards[entry['shard']] = open(self.dataset_dir / shard_name(entry['shard']), 'rb')
+        shard.seek(entry['offset'])
+        return shard.read(entry['length'])
+    
+    def read(self, entry: Dict) -> Dict:
+        """Chunk of an index entry"""
+        return json.loads(self.read_bytes(entry))
+    
+    def close(self):
+        """Close all open shards"""
+        for shard in self._shards.values():
+            shard.close()
+        self._shards = {}
+    
+    def __enter__(self) -> 'ChunkReader':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_chunks(dataset_dir: Path, entries: Optional[Iterable[Dict]] = None) -> Iterator[Dict]:
+    """
+    Stream chunks of a dataset
+    
+    Args:
+        dataset_dir: Dataset directory
+        entries: Index entries to read, in this order (default: all chunks,
+                 read shard by shard)
+    
+    Yields:
+        Chunk objects
+    """
+    dataset_dir = Path(dataset_dir)
+    if entries is None:
+        for shard in sorted(dataset_dir.glob('part-*.jsonl')):
+            with open(shard, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        return
+    
+    with ChunkReader(dataset_dir) as reader:
+        for entry in entries:
+            yield reader.read(entry)
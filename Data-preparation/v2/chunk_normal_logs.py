@@ -3,31 +3,101 @@ Create chunks from cleaned normal logs
 Groups by session_id and creates fixed-size chunks (20 logs each)
 """
 
-from collections import defaultdict
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterable, Iterator, Set, Tuple
 from tqdm import tqdm
 
-from config import CLEANED_NORMAL_FILE, NORMAL_CHUNKS_FILE, CHUNK_SIZE, MIN_CHUNK_SIZE
-from utils import load_json_file, save_json_file, get_timestamp, print_stats
+from config import (
+    CLEANED_NORMAL_FILE,
+    CLEANED_NORMAL_STORE,
+    EVENT_STORE,
+    NORMAL_CHUNKS_DIR,
+    CHUNK_SHARD_SIZE,
+    CHUNK_SIZE,
+    MIN_CHUNK_SIZE,
+    NEAR_DEDUP_NORMAL,
+    NEAR_DEDUP_THRESHOLD,
+    NEAR_DEDUP_NUM_PERM,
+    NEAR_DEDUP_KEEP_PER_CLUSTER,
+    NEAR_DEDUP_MAX_REPRESENTATIVES,
+    NEAR_DEDUP_FIELDS
+)
+from chunk_dataset import write_chunk_dataset
+from event_store import iter_sorted_sessions
+from near_dedup import iter_representative_chunks
+from utils import iter_jsonl, get_timestamp, print_stats
 
 
-def group_by_session(logs: List[Dict]) -> Dict[str, List[Dict]]:
+def find_repeated_sessions(logs: Iterable[Dict]) -> Set[str]:
     """
-    Group logs by session_id
+    Find sessions whose logs are not contiguous (only session ids are kept)
     
     Args:
-        logs: List of log objects
+        logs: Log objects (list or stream)
         
     Returns:
-        Dictionary mapping session_id to list of logs
+        Session ids that appear in more than one run
+    """
+    seen = set()
+    repeated = set()
+    current_id = None
+    for log in logs:
+        session_id = log.get('session_id', 'unknown')
+        if session_id != current_id:
+            if session_id in seen:
+                repeated.add(session_id)
+            seen.add(session_id)
+            current_id = session_id
+    return repeated
+
+
+def group_by_session(logs: Iterable[Dict], repeated: Set[str] = frozenset()) -> Iterator[Tuple[str, List[Dict]]]:
     """
-    sessions = defaultdict(list)
+    Group logs by session_id
+    
+    Extraction writes each session's logs contiguously (and cleaning keeps
+    that order), so sessions are read one run at a time and only the
+    current session is held in memory. Sessions listed in repeated (see
+    find_repeated_sessions, e.g. two session files with the same embedded
+    session_id) are held back until the end, so all of their runs are
+    chunked together.
+    
+    Args:
+        logs: Log objects (list or stream), grouped by session
+        repeated: Session ids whose logs come in several runs
+        
+    Yields:
+        (session_id, list of logs) per session, in input order, then the
+        merged repeated sessions
+        
+    Raises:
+        ValueError: If a session not listed in repeated is not contiguous
+    """
+    finished = set()
+    held = {}  # Repeated session_id -> logs of all its runs
+    current_id = None
+    current_logs = []
     
     for log in logs:
         session_id = log.get('session_id', 'unknown')
-        sessions[session_id].append(log)
+        if session_id in repeated:
+            held.setdefault(session_id, []).append(log)
+            continue
+        if session_id != current_id:
+            if current_logs:
+                finished.add(current_id)
+                yield current_id, current_logs
+            if session_id in finished:
+                raise ValueError(f"Logs of session {session_id} are not contiguous; list it in repeated")
+            current_id = session_id
+            current_logs = []
+        current_logs.append(log)
+    
+    if current_logs:
+        yield current_id, current_logs
     
-    return dict(sessions)
+    for session_id, session_logs in held.items():
+        print(f"   ⚠️  Session {session_id} is not contiguous; chunking its {len(session_logs)} logs together")
+        yield session_id, session_logs
 
 
 def create_chunks(session_logs: List[Dict], chunk_size: int = CHUNK_SIZE) -> List[List[Dict]]:
@@ -82,41 +152,44 @@ def create_chunk_metadata(chunk: List[Dict], chunk_index: int, session_id: str)
     return metadata
 
 
-def main():
-    """Main function to create normal log chunks"""
-    print("="*70)
-    print("CREATING NORMAL LOG CHUNKS")
-    print(f"Chunk size: {CHUNK_SIZE} logs")
-    print(f"Minimum chunk size: {MIN_CHUNK_SIZE} logs")
-    print("="*70)
-    
-    # Load cleaned logs
-    print(f"\n📂 Loading from: {CLEANED_NORMAL_FILE}")
-    logs = load_json_file(CLEANED_NORMAL_FILE)
-    print(f"   Total logs: {len(logs):,}")
-    
-    # Group by session
-    print("\n🔗 Grouping logs by session_id...")
-    sessions = group_by_session(logs)
-    print(f"   Found {len(sessions):,} unique sessions")
+def iter_session_chunks(logs: Iterable[Dict], chunk_stats: Dict, repeated: Set[str] = frozenset()) -> Iterator[Dict]:
+    """
+    Chunk a stream of logs session by session
     
-    # Show session statistics
-    session_sizes = [len(session_logs) for session_logs in sessions.values()]
-    if session_sizes:
-        print(f"   Session size range: {min(session_sizes):,} - {max(session_sizes):,} logs")
-        print(f"   Average session size: {sum(session_sizes) / len(session_sizes):.1f} logs")
+    Args:
+        logs: Log objects (list or stream), grouped by session
+        chunk_stats: Dict filled in while iterating (see chunk_sessions)
+        repeated: Non-contiguous session ids (see find_repeated_sessions)
+        
+    Yields:
+        Chunk objects ({"metadata": ..., "logs": [...]})
+    """
+    yield from chunk_sessions(group_by_session(logs, repeated), chunk_stats)
+
+
+def chunk_sessions(sessions: Iterable[Tuple[str, List[Dict]]], chunk_stats: Dict) -> Iterator[Dict]:
+    """
+    Chunk sessions one at a time
     
-    # Create chunks for each session
-    print("\n✂️  Creating chunks...")
-    all_chunks = []
-    chunk_stats = {
-        'total_chunks': 0,
-        'total_sessions': len(sessions),
-        'sessions_with_chunks': 0,
-        'chunks_per_session': []
-    }
+    Args:
+        sessions: (session_id, list of logs) per session
+        chunk_stats: Dict filled in while iterating (total_logs, total_chunks,
+                     total_sessions, sessions_with_chunks, chunks_per_session,
+                     session_sizes)
+        
+    Yields:
+        Chunk objects ({"metadata": ..., "logs": [...]})
+    """
+    for key in ('total_logs', 'total_chunks', 'total_sessions', 'sessions_with_chunks'):
+        chunk_stats.setdefault(key, 0)
+    for key in ('chunks_per_session', 'session_sizes'):
+        chunk_stats.setdefault(key, [])
     
-    for session_id, session_logs in tqdm(sessions.items(), desc="   Processing sessions"):
+    for session_id, session_logs in tqdm(sessions, desc="   Processing sessions"):
+        chunk_stats['total_sessions'] += 1
+        chunk_stats['total_logs'] += len(session_logs)
+        chunk_stats['session_sizes'].append(len(session_logs))
+        
         # Create chunks for this session
         chunks = create_chunks(session_logs, CHUNK_SIZE)
         
@@ -124,38 +197,77 @@ def main():
             chunk_stats['sessions_with_chunks'] += 1
             chunk_stats['chunks_per_session'].append(len(chunks))
         
-        # Add metadata and store each chunk
+        # Add metadata and yield each chunk
         for idx, chunk in enumerate(chunks):
             metadata = create_chunk_metadata(chunk, idx, session_id)
             
-            chunk_data = {
+            chunk_stats['total_chunks'] += 1
+            yield {
                 "metadata": metadata,
                 "logs": chunk
             }
-            
-            all_chunks.append(chunk_data)
-            chunk_stats['total_chunks'] += 1
+
+
+def main():
+    """Main function to create normal log chunks"""
+    print("="*70)
+    print("CREATING NORMAL LOG CHUNKS")
+    print(f"Chunk size: {CHUNK_SIZE} logs")
+    print(f"Minimum chunk size: {MIN_CHUNK_SIZE} logs")
+    print("="*70)
     
-    # Save chunks
-    print(f"\n💾 Saving to: {NORMAL_CHUNKS_FILE}")
-    save_json_file(all_chunks, NORMAL_CHUNKS_FILE)
+    # Stream cleaned logs one session at a time, writing chunks as they are made
+    use_store = EVENT_STORE and CLEANED_NORMAL_STORE.exists()
+    print(f"\n📂 Loading from: {CLEANED_NORMAL_STORE if use_store else CLEANED_NORMAL_FILE}")
+    print(f"💾 Saving to: {NORMAL_CHUNKS_DIR}")
+    print("\n✂️  Creating chunks...")
+    chunk_stats = {}
+    if use_store:
+        # Columnar store: sessions come back already sorted by timestamp
+        chunks = chunk_sessions(iter_sorted_sessions(CLEANED_NORMAL_STORE), chunk_stats)
+    else:
+        # First pass reads only session ids, so non-contiguous sessions can be chunked whole
+        repeated = find_repeated_sessions(iter_jsonl(CLEANED_NORMAL_FILE))
+        chunks = iter_session_chunks(iter_jsonl(CLEANED_NORMAL_FILE), chunk_stats, repeated)
+    
+    # Drop near-duplicate chunks (keeps a few representatives per cluster)
+    near_dedup_stats = {}
+    if NEAR_DEDUP_NORMAL:
+        print(f"   Removing near-duplicate chunks (similarity >= {NEAR_DEDUP_THRESHOLD})")
+        chunks = iter_representative_chunks(
+            chunks, near_dedup_stats, NEAR_DEDUP_FIELDS,
+            threshold=NEAR_DEDUP_THRESHOLD,
+            num_perm=NEAR_DEDUP_NUM_PERM,
+            keep_per_cluster=NEAR_DEDUP_KEEP_PER_CLUSTER,
+            max_representatives=NEAR_DEDUP_MAX_REPRESENTATIVES
+        )
+    total_chunks = write_chunk_dataset(chunks, NORMAL_CHUNKS_DIR, label='normal', shard_size=CHUNK_SHARD_SIZE)
+    
+    # Show session statistics
+    session_sizes = chunk_stats['session_sizes']
+    print(f"   Found {len(session_sizes):,} unique sessions")
+    if session_sizes:
+        print(f"   Session size range: {min(session_sizes):,} - {max(session_sizes):,} logs")
+        print(f"   Average session size: {sum(session_sizes) / len(session_sizes):.1f} logs")
     
     # Print statistics
     avg_chunks = sum(chunk_stats['chunks_per_session']) / len(chunk_stats['chunks_per_session']) if chunk_stats['chunks_per_session'] else 0
     
     stats = {
-        "Total input logs": len(logs),
+        "Total input logs": chunk_stats['total_logs'],
         "Total sessions": chunk_stats['total_sessions'],
         "Sessions with chunks": chunk_stats['sessions_with_chunks'],
         "Total chunks created": chunk_stats['total_chunks'],
+        "Near-duplicate chunks removed": near_dedup_stats.get('near_duplicates', 0),
+        "Chunks written": total_chunks,
         "Average chunks per session": f"{avg_chunks:.1f}",
         "Chunk size": CHUNK_SIZE,
-        "Output file": str(NORMAL_CHUNKS_FILE)
+        "Output dataset": str(NORMAL_CHUNKS_DIR)
     }
     
     print_stats("✅ CHUNKING COMPLETE", stats)
     
-    return all_chunks
+    return total_chunks
 
 
 if __name__ == '__main__':
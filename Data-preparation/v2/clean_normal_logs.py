@@ -6,64 +6,77 @@ Optionally samples down if too many logs
 
 import random
 from tqdm import tqdm
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator
 
-from config import EXTRACTED_NORMAL_FILE, CLEANED_NORMAL_FILE
-from utils import load_json_file, save_json_file, get_log_signature, print_stats
+from config import (
+    EXTRACTED_NORMAL_FILE,
+    CLEANED_NORMAL_FILE,
+    CLEANED_NORMAL_STORE,
+    EVENT_STORE,
+    DEDUP_HASH_BITS,
+    DEDUP_MAX_MEMORY_KEYS,
+    DEDUP_SPILL_DIR
+)
+from dedup import iter_unique
+from event_store import EventStoreWriter
+from utils import iter_jsonl, write_jsonl, print_stats
 
 
-def deduplicate_logs(logs: List[Dict]) -> List[Dict]:
+def deduplicate_logs(logs: Iterable[Dict], stats: Dict) -> Iterator[Dict]:
     """
     Remove exact duplicate logs based on signature
     Keeps all original fields
+    Streams logs through; only compact hashes of seen logs are kept in memory
     
     Args:
-        logs: List of log objects
+        logs: Log objects (list or stream)
+        stats: Dict filled in while iterating with 'total' and 'duplicates'
         
-    Returns:
-        Deduplicated list of logs
+    Yields:
+        Unique logs, in input order
     """
     print("\n🔍 Removing exact duplicates...")
     
-    seen_signatures = set()
-    unique_logs = []
-    
-    for log in tqdm(logs, desc="   Deduplicating"):
-        signature = get_log_signature(log)
-        if signature not in seen_signatures:
-            seen_signatures.add(signature)
-            unique_logs.append(log)
+    yield from iter_unique(
+        tqdm(logs, desc="   Deduplicating"),
+        stats=stats,
+        hash_bits=DEDUP_HASH_BITS,
+        max_memory_keys=DEDUP_MAX_MEMORY_KEYS,
+        spill_dir=DEDUP_SPILL_DIR
+    )
     
-    duplicates_removed = len(logs) - len(unique_logs)
-    print(f"   ✅ Removed {duplicates_removed:,} exact duplicates")
-    
-    return unique_logs
+    print(f"   ✅ Removed {stats['duplicates']:,} exact duplicates")
 
 
-def sample_logs(logs: List[Dict], max_logs: int = 100000) -> List[Dict]:
+def sample_logs(logs: Iterable[Dict], max_logs: int = 100000) -> List[Dict]:
     """
     Sample logs if count exceeds threshold
+    Uses reservoir sampling, so at most max_logs logs are held in memory
     
     Args:
-        logs: List of log objects
+        logs: Log objects (list or stream)
         max_logs: Maximum number of logs to keep
         
     Returns:
-        Sampled list of logs
+        Sampled list of logs (in input order)
     """
-    if len(logs) <= max_logs:
-        return logs
-    
-    print(f"\n⚖️  Sampling to reduce dataset size...")
-    print(f"   Original: {len(logs):,} logs")
-    print(f"   Target: {max_logs:,} logs")
-    
     random.seed(42)  # Reproducible sampling
-    sampled = random.sample(logs, max_logs)
-    
-    print(f"   ✅ Sampled down to {len(sampled):,} logs")
-    
-    return sampled
+    reservoir = []
+    seen = 0
+    
+    for log in logs:
+        if seen < max_logs:
+            reservoir.append((seen, log))
+        else:
+            slot = random.randint(0, seen)
+            if slot < max_logs:
+                reservoir[slot] = (seen, log)
+        seen += 1
+    
+    if seen > max_logs:
+        print(f"\n⚖️  Sampled {max_logs:,} of {seen:,} logs to reduce dataset size")
+    
+    return [log for _, log in sorted(reservoir, key=lambda item: item[0])]
 
 
 def main():
@@ -72,13 +85,10 @@ def main():
     print("CLEANING NORMAL LOGS")
     print("="*70)
     
-    # Load extracted logs
+    # Stream extracted logs through deduplication into the cleaned file
     print(f"\n📂 Loading from: {EXTRACTED_NORMAL_FILE}")
-    logs = load_json_file(EXTRACTED_NORMAL_FILE)
-    print(f"   Original count: {len(logs):,}")
-    
-    # Deduplicate
-    unique_logs = deduplicate_logs(logs)
+    dedup = {}
+    unique_logs = deduplicate_logs(iter_jsonl(EXTRACTED_NORMAL_FILE), dedup)
     
     # Optional: Sample if too many (can be disabled/adjusted)
     # Uncomment the line below if you want to limit normal logs
@@ -86,20 +96,26 @@ def main():
     
     # Save cleaned logs
     print(f"\n💾 Saving to: {CLEANED_NORMAL_FILE}")
-    save_json_file(unique_logs, CLEANED_NORMAL_FILE)
+    if EVENT_STORE:
+        # Also write the columnar store, in the same pass
+        print(f"💾 Saving event store to: {CLEANED_NORMAL_STORE}")
+        with EventStoreWriter(CLEANED_NORMAL_STORE) as store:
+            unique_count = write_jsonl(store.tee(unique_logs), CLEANED_NORMAL_FILE)
+    else:
+        unique_count = write_jsonl(unique_logs, CLEANED_NORMAL_FILE)
     
     # Print statistics
     stats = {
-        "Original logs": len(logs),
-        "Duplicates removed": len(logs) - len(unique_logs),
-        "Unique logs remaining": len(unique_logs),
-        "Deduplication rate": f"{((len(logs) - len(unique_logs)) / len(logs) * 100):.2f}%" if logs else "0%",
+        "Original logs": dedup['total'],
+        "Duplicates removed": dedup['duplicates'],
+        "Unique logs remaining": unique_count,
+        "Deduplication rate": f"{(dedup['duplicates'] / dedup['total'] * 100):.2f}%" if dedup['total'] else "0%",
         "Output file": str(CLEANED_NORMAL_FILE)
     }
     
     print_stats("✅ CLEANING COMPLETE", stats)
     
-    return unique_logs
+    return unique_count
 
 
 if __name__ == '__main__':
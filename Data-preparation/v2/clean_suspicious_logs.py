@@ -4,38 +4,46 @@ Preserves all original fields - only deduplicates
 """
 
 from tqdm import tqdm
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator
 
-from config import EXTRACTED_SUSPICIOUS_FILE, CLEANED_SUSPICIOUS_FILE
-from utils import load_json_file, save_json_file, get_log_signature, print_stats
+from config import (
+    EXTRACTED_SUSPICIOUS_FILE,
+    CLEANED_SUSPICIOUS_FILE,
+    CLEANED_SUSPICIOUS_STORE,
+    EVENT_STORE,
+    DEDUP_HASH_BITS,
+    DEDUP_MAX_MEMORY_KEYS,
+    DEDUP_SPILL_DIR
+)
+from dedup import iter_unique
+from event_store import EventStoreWriter
+from utils import iter_jsonl, write_jsonl, print_stats
 
 
-def deduplicate_logs(logs: List[Dict]) -> List[Dict]:
+def deduplicate_logs(logs: Iterable[Dict], stats: Dict) -> Iterator[Dict]:
     """
     Remove exact duplicate logs based on signature
     Keeps all original fields
+    Streams logs through; only compact hashes of seen logs are kept in memory
     
     Args:
-        logs: List of log objects
+        logs: Log objects (list or stream)
+        stats: Dict filled in while iterating with 'total' and 'duplicates'
         
-    Returns:
-        Deduplicated list of logs
+    Yields:
+        Unique logs, in input order
     """
     print("\n🔍 Removing exact duplicates...")
     
-    seen_signatures = set()
-    unique_logs = []
+    yield from iter_unique(
+        tqdm(logs, desc="   Deduplicating"),
+        stats=stats,
+        hash_bits=DEDUP_HASH_BITS,
+        max_memory_keys=DEDUP_MAX_MEMORY_KEYS,
+        spill_dir=DEDUP_SPILL_DIR
+    )
     
-    for log in tqdm(logs, desc="   Deduplicating"):
-        signature = get_log_signature(log)
-        if signature not in seen_signatures:
-            seen_signatures.add(signature)
-            unique_logs.append(log)
-    
-    duplicates_removed = len(logs) - len(unique_logs)
-    print(f"   ✅ Removed {duplicates_removed:,} exact duplicates")
-    
-    return unique_logs
+    print(f"   ✅ Removed {stats['duplicates']:,} exact duplicates")
 
 
 def main():
@@ -44,30 +52,33 @@ def main():
     print("CLEANING SUSPICIOUS LOGS")
     print("="*70)
     
-    # Load extracted logs
+    # Stream extracted logs through deduplication into the cleaned file
     print(f"\n📂 Loading from: {EXTRACTED_SUSPICIOUS_FILE}")
-    logs = load_json_file(EXTRACTED_SUSPICIOUS_FILE)
-    print(f"   Original count: {len(logs):,}")
-    
-    # Deduplicate
-    unique_logs = deduplicate_logs(logs)
+    dedup = {}
+    unique_logs = deduplicate_logs(iter_jsonl(EXTRACTED_SUSPICIOUS_FILE), dedup)
     
     # Save cleaned logs
     print(f"\n💾 Saving to: {CLEANED_SUSPICIOUS_FILE}")
-    save_json_file(unique_logs, CLEANED_SUSPICIOUS_FILE)
+    if EVENT_STORE:
+        # Also write the columnar store, in the same pass
+        print(f"💾 Saving event store to: {CLEANED_SUSPICIOUS_STORE}")
+        with EventStoreWriter(CLEANED_SUSPICIOUS_STORE) as store:
+            unique_count = write_jsonl(store.tee(unique_logs), CLEANED_SUSPICIOUS_FILE)
+    else:
+        unique_count = write_jsonl(unique_logs, CLEANED_SUSPICIOUS_FILE)
     
     # Print statistics
     stats = {
-        "Original logs": len(logs),
-        "Duplicates removed": len(logs) - len(unique_logs),
-        "Unique logs remaining": len(unique_logs),
-        "Deduplication rate": f"{((len(logs) - len(unique_logs)) / len(logs) * 100):.2f}%" if logs else "0%",
+        "Original logs": dedup['total'],
+        "Duplicates removed": dedup['duplicates'],
+        "Unique logs remaining": unique_count,
+        "Deduplication rate": f"{(dedup['duplicates'] / dedup['total'] * 100):.2f}%" if dedup['total'] else "0%",
         "Output file": str(CLEANED_SUSPICIOUS_FILE)
     }
     
     print_stats("✅ CLEANING COMPLETE", stats)
     
-    return unique_logs
+    return unique_count
 
 
 if __name__ == '__main__':
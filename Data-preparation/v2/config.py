@@ -3,6 +3,7 @@ Configuration file for data preparation pipeline
 Centralized configuration for both suspicious and normal data pipelines
 """
 
+import os
 from pathlib import Path
 
 # Base paths
@@ -18,19 +19,37 @@ NORMAL_LOGS_DIR = ANNOTATE_LOGS_DIR / 'normal-logs'
 OUTPUT_DIR = BASE_DIR / 'output'
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Intermediate file format: JSONL (one object per line), streamed stage to stage
+COMPRESS_INTERMEDIATE = False  # True = zstd-compressed .jsonl.zst (needs 'zstandard')
+JSONL_SUFFIX = '.jsonl.zst' if COMPRESS_INTERMEDIATE else '.jsonl'
+
 # Intermediate output files
-EXTRACTED_SUSPICIOUS_FILE = OUTPUT_DIR / 'extracted_suspicious_logs.json'
-EXTRACTED_NORMAL_FILE = OUTPUT_DIR / 'extracted_normal_logs.json'
+EXTRACTED_SUSPICIOUS_FILE = OUTPUT_DIR / f'extracted_suspicious_logs{JSONL_SUFFIX}'
+EXTRACTED_NORMAL_FILE = OUTPUT_DIR / f'extracted_normal_logs{JSONL_SUFFIX}'
+
+CLEANED_SUSPICIOUS_FILE = OUTPUT_DIR / f'cleaned_suspicious_logs{JSONL_SUFFIX}'
+CLEANED_NORMAL_FILE = OUTPUT_DIR / f'cleaned_normal_logs{JSONL_SUFFIX}'
 
-CLEANED_SUSPICIOUS_FILE = OUTPUT_DIR / 'cleaned_suspicious_logs.json'
-CLEANED_NORMAL_FILE = OUTPUT_DIR / 'cleaned_normal_logs.json'
+# Optional columnar copy of the cleaned logs (see event_store.py; needs 'pyarrow')
+# When enabled, cleaning also writes a Parquet store partitioned by session and
+# chunking reads it (sorting by timestamp in Arrow) instead of the JSONL file
+EVENT_STORE = False
+CLEANED_SUSPICIOUS_STORE = OUTPUT_DIR / 'cleaned_suspicious_logs.parquet'
+CLEANED_NORMAL_STORE = OUTPUT_DIR / 'cleaned_normal_logs.parquet'
+
+# Incremental runs (see incremental.py): per-session shards and the manifest of what built them
+SHARDS_DIR = OUTPUT_DIR / 'shards'
+MANIFEST_FILE = OUTPUT_DIR / 'manifest.json'
 
 # Training data paths
 TRAINING_DIR = BASE_DIR / 'training_data'
 TRAINING_DIR.mkdir(exist_ok=True)
 
-SUSPICIOUS_CHUNKS_FILE = TRAINING_DIR / 'suspicious_chunks.json'
-NORMAL_CHUNKS_FILE = TRAINING_DIR / 'normal_chunks.json'
+# Chunk datasets: JSONL shards + index.jsonl (see chunk_dataset.py); kept
+# uncompressed so consumers can seek to individual chunks
+SUSPICIOUS_CHUNKS_DIR = TRAINING_DIR / 'suspicious_chunks'
+NORMAL_CHUNKS_DIR = TRAINING_DIR / 'normal_chunks'
+CHUNK_SHARD_SIZE = 50_000  # Chunks per shard
 
 # Processing parameters
 CHUNK_SIZE = 7   # Number of logs per chunk (optimized for token efficiency & better learning)
@@ -38,6 +57,44 @@ CHUNK_SIZE = 7   # Number of logs per chunk (optimized for token efficiency & be
                  # Creates 3x more training examples while staying within token limits
 MIN_CHUNK_SIZE = 5  # Minimum logs to form a chunk (for last chunk in session)
 
+# Deduplication (see dedup.py)
+DEDUP_HASH_BITS = 64               # 64 or 128-bit hashes of each log's canonical JSON
+DEDUP_MAX_MEMORY_KEYS = 1_000_000  # Hashes kept in a fast set before compacting to a packed sorted run
+DEDUP_SPILL_DIR = None             # Directory for memory-mapped runs (e.g. OUTPUT_DIR); None = keep packed runs in memory
+
+# Near-duplicate chunk removal after chunking (MinHash/LSH, see near_dedup.py)
+NEAR_DEDUP_NORMAL = True           # Keep only representatives of near-identical normal chunks
+NEAR_DEDUP_SUSPICIOUS = False      # Attack chunks are all kept by default
+NEAR_DEDUP_THRESHOLD = 0.8         # Estimated Jaccard similarity of chunk shingles to count as near-duplicate
+NEAR_DEDUP_NUM_PERM = 64           # MinHash signature length
+NEAR_DEDUP_KEEP_PER_CLUSTER = 1    # Chunks kept per cluster of near-duplicates
+NEAR_DEDUP_MAX_REPRESENTATIVES = 500_000  # Clusters remembered (oldest are forgotten first; bounds memory)
+NEAR_DEDUP_FIELDS = [              # Log fields that make up a shingle (no timestamps, PIDs or source ports)
+    'event_type',
+    'winlog.event_id',
+    'winlog.event_data.Image',
+    'winlog.event_data.ParentImage',
+    'winlog.event_data.CommandLine',
+    'winlog.event_data.TargetFilename',
+    'winlog.event_data.TargetObject',
+    'winlog.event_data.QueryName',
+    'winlog.event_data.DestinationIp',
+    'winlog.event_data.DestinationPort',
+    'winlog.event_data.Protocol',
+    'layers.IP.src',
+    'layers.IP.dst',
+    'layers.IP.proto',
+    'layers.TCP.dport',
+    'layers.UDP.dport',
+]
+
+# Parallel extraction (session files are read by a process pool)
+NUM_WORKERS = max(1, (os.cpu_count() or 1) - 1)  # Set to 1 to extract serially
+
+# Full runs (main.py --full): stage DAG (see dag.py)
+MAX_PARALLEL_STAGES = 2  # Stage processes at once (the suspicious and normal branches run side by side)
+RUN_REPORT_FILE = OUTPUT_DIR / 'run_report.json'  # Per-stage status, wall time and peak RSS
+
 # MITRE techniques mapping
 MITRE_MAPPING_FILE = BASE_DIR / 'mitre_techniques.json'
 
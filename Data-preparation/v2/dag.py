@@ -0,0 +1,267 @@
+"""
+Small DAG executor for the pipeline stages
+Stages declare the files they read and write; a stage depends on the
+stages that write its inputs. Stages whose dependencies are done run in
+separate processes (independent branches run concurrently), stages whose
+outputs are newer than all their inputs are skipped, and each stage's wall
+time and peak RSS are written to a run report.
+"""
+
+import importlib
+import json
+import os
+import sys
+import time
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows: peak RSS is not reported
+    resource = None
+
+
+@dataclass
+class Stage:
+    """A pipeline stage: module.function() reading inputs and writing outputs"""
+    name: str
+    module: str
+    inputs: List[Path]
+    outputs: List[Path]
+    function: str = 'main'
+    depends_on: List[str] = field(default_factory=list)  # Filled in by resolve_dependencies()
+
+
+def resolve_dependencies(stages: List[Stage]) -> List[Stage]:
+    """
+    Link each stage to the stages that write its inputs
+    
+    Args:
+        stages: Stages in any order
+    
+    Returns:
+        The same stages with depends_on set
+    
+    Raises:
+        ValueError: If two stages write the same file or the graph has a cycle
+    """
+    writers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in writers:
+                raise ValueError(f"{output} is written by both {writers[output]} and {stage.name}")
+            writers[output] = stage.name
+    
+    for stage in stages:
+        stage.depends_on = sorted({writers[path] for path in stage.inputs if path in writers})
+    
+    # Detect cycles (Kahn's algorithm)
+    remaining = {stage.name: set(stage.depends_on) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Stage dependencies form a cycle: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    
+    return stages
+
+
+def newest_mtime(path: Path) -> float:
+    """
+    Latest modification time of a file, or of any file under a directory
+    
+    Args:
+        path: File or directory
+    
+    Returns:
+        Modification time (seconds), 0 if the path does not exist
+    """
+    if not path.exists():
+        return 0.0
+    if not path.is_dir():
+        return path.stat().st_mtime
+    
+    newest = path.stat().st_mtime
+    for root, _, files in os.walk(path):
+        for name in files:
+            newest = max(newest, os.stat(os.path.join(root, name)).st_mtime)
+    return newest
+
+
+def is_up_to_date(stage: Stage) -> bool:
+    """
+    Whether all of a stage's outputs exist and are newer than all its inputs
+    
+    Args:
+        stage: Stage to check
+    
+    Returns:
+        True if the stage can be skipped
+    """
+    if not stage.outputs or not all(output.exists() for output in stage.outputs):
+        return False
+    oldest_output = min(output.stat().st_mtime for output in stage.outputs)
+    return all(newest_mtime(path) <= oldest_output for path in stage.inputs)
+
+
+def peak_rss_mb() -> Dict[str, Optional[float]]:
+    """
+    Peak RSS of the calling stage process and of its largest worker, in MB
+    
+    Called at the end of _run_stage. ru_maxrss is a high-water mark that a
+    forked (or, on Linux, spawned) child inherits from its parent, so both
+    values have a floor: the stage's includes the DAG runner's RSS when
+    the stage started (small, the runner loads no data), and a worker's
+    includes the stage's RSS when its Pool forked. RUSAGE_CHILDREN covers
+    only that stage's own joined workers; stages that start none report
+    None.
+    """
+    if resource is None:
+        return {'peak_rss_mb': None, 'peak_worker_rss_mb': None}
+    
+    # ru_maxrss is KB on Linux, bytes on macOS
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1),
+        'peak_worker_rss_mb': round(workers / unit, 1) if workers else None
+    }
+
+
+def _run_stage(module: str, function: str, conn):
+    """Process target: run one stage and send back its wall time and peak RSS"""
+    start = time.perf_counter()
+    result = {'error': None}
+    try:
+        getattr(importlib.import_module(module), function)()
+    except BaseException as e:
+        traceback.print_exc()
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['wall_time_sec'] = round(time.perf_counter() - start, 3)
+    result.update(peak_rss_mb())
+    sys.stdout.flush()
+    conn.send(result)
+    conn.close()
+    sys.exit(1 if result['error'] else 0)
+
+
+def run_dag(stages: List[Stage], max_parallel: int = 2, force: bool = False,
+            report_file: Optional[Path] = None) -> Dict:
+    """
+    Run stages in dependency order, independent stages concurrently
+    
+    A failed stage does not stop independent branches; stages depending on
+    it are marked 'blocked'.
+    
+    Args:
+        stages: Stages to run
+        max_parallel: Stage processes running at once
+        force: Run every stage even if its outputs are up to date
+        report_file: Optional JSON path for the run report
+    
+    Returns:
+        Run report ({'started_at', 'wall_time_sec', 'success', 'stages': {name: {...}}})
+    """
+    resolve_dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    results = {stage.name: {'status': 'pending', 'depends_on': stage.depends_on} for stage in stages}
+    running = {}  # process sentinel -> (stage name, process, connection, start time)
+    
+    started_at = datetime.now().isoformat(timespec='seconds')
+    start = time.perf_counter()
+    
+    def status(name: str) -> str:
+        return results[name]['status']
+    
+    while True:
+        # Start (or skip) every stage whose dependencies are done
+        for stage in stages:
+            if status(stage.name) != 'pending':
+                continue
+            dep_statuses = [status(dep) for dep in stage.depends_on]
+            if any(s in ('failed', 'blocked') for s in dep_statuses):
+                results[stage.name]['status'] = 'blocked'
+                print(f"⏭️  {stage.name}: blocked (a dependency failed)")
+                continue
+            if not all(s in ('done', 'skipped') for s in dep_statuses):
+                continue
+            if not force and is_up_to_date(stage):
+                results[stage.name]['status'] = 'skipped'
+                print(f"⏭️  {stage.name}: up to date, skipped")
+                continue
+            if len(running) >= max_parallel:
+                continue
+            
+            # Flush first so forked children do not inherit buffered output
+            print(f"▶️  {stage.name}: started", flush=True)
+            sys.stderr.flush()
+            parent_conn, child_conn = Pipe(duplex=False)
+            process = Process(target=_run_stage, args=(stage.module, stage.function, child_conn), name=stage.name)
+            process.start()
+            child_conn.close()
+            running[process.sentinel] = (stage.name, process, parent_conn, time.perf_counter())
+            results[stage.name]['status'] = 'running'
+        
+        if not running:
+            if any(status(stage.name) == 'pending' for stage in stages):
+                continue  # Newly skipped/blocked stages may have released others
+            break
+        
+        for sentinel in wait(list(running)):
+            name, process, conn, stage_start = running.pop(sentinel)
+            process.join()
+            result = conn.recv() if conn.poll() else {'error': f"exited with code {process.exitcode}"}
+            conn.close()
+            
+            result.setdefault('wall_time_sec', round(time.perf_counter() - stage_start, 3))
+            missing = [str(path) for path in by_name[name].outputs if not path.exists()]
+            if missing and not result['error']:
+                result['error'] = f"outputs not written: {', '.join(missing)}"
+            result['status'] = 'failed' if result['error'] or process.exitcode else 'done'
+            results[name].update(result)
+            print(f"{'✅' if result['status'] == 'done' else '❌'} {name}: {result['status']} in {result['wall_time_sec']:.1f}s")
+    
+    report = {
+        'started_at': started_at,
+        'wall_time_sec': round(time.perf_counter() - start, 3),
+        'success': all(result['status'] in ('done', 'skipped') for result in results.values()),
+        'stages': {name: dict(results[name], outputs=[str(path) for path in by_name[name].outputs]) for name in results}
+    }
+    
+    if report_file is not None:
+        report_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    
+    return report
+
+
+def print_run_report(report: Dict):
+    """
+    Print per-stage status, wall time and peak RSS
+    
+    Args:
+        report: Report from run_dag()
+    """
+    def mb(value: Optional[float]) -> str:
+        return f"{value:,.1f}" if value is not None else "-"
+    
+    print(f"\n{'='*70}")
+    print("RUN REPORT")
+    print('='*70)
+    print(f"{'Stage':<22}{'Status':<10}{'Wall (s)':>10}{'RSS (MB)':>12}{'Workers (MB)':>15}")
+    for name, result in report['stages'].items():
+        wall = f"{result['wall_time_sec']:.1f}" if 'wall_time_sec' in result else "-"
+        print(f"{name:<22}{result['status']:<10}{wall:>10}"
+              f"{mb(result.get('peak_rss_mb')):>12}{mb(result.get('peak_worker_rss_mb')):>15}")
+    print('-'*70)
+    print(f"Total wall time: {report['wall_time_sec']:.1f}s")
+    print('='*70)
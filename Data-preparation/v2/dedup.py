@@ -0,0 +1,306 @@
+"""
+Deduplication engine shared by the log cleaners
+
+Records are reduced to a canonical byte encoding and a 64- or 128-bit hash;
+only the hashes are stored. Recent hashes live in a set; every
+max_memory_keys hashes the set is compacted into a sorted run of packed
+integers (8 or 16 bytes per key), kept in memory or spilled to a
+memory-mapped file with a small Bloom filter in front. Runs are merged as
+they accumulate, so a check costs a set lookup plus a few binary searches,
+and tens of millions of events fit in small, bounded memory.
+
+Standard library only (xxhash is used when installed), so it can be shared
+with the stand-alone cleaner scripts outside this pipeline.
+"""
+
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import tempfile
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import xxhash
+except ImportError:  # Optional: faster hashing
+    xxhash = None
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def canonical_bytes(record: Any) -> bytes:
+    """
+    Canonical encoding of a JSON record (key order does not matter)
+    
+    Args:
+        record: JSON-serializable record
+    
+    Returns:
+        UTF-8 bytes of the record with sorted keys and compact separators
+    """
+    return json.dumps(record, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def canonical_items_bytes(event: Dict) -> bytes:
+    """
+    Canonical encoding of an event's top-level items, compared as strings
+    
+    None values are ignored and values are compared by str(), so two events
+    are equal when their non-None fields print the same.
+    
+    Args:
+        event: Event dict
+    
+    Returns:
+        UTF-8 bytes of the sorted (key, str(value)) pairs
+    """
+    items = sorted((str(key), str(value)) for key, value in event.items() if value is not None)
+    return json.dumps(items, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def hash_bytes(data: bytes, bits: int = 64) -> int:
+    """
+    Fast non-cryptographic hash of a byte string
+    
+    Uses xxh3 when the xxhash package is installed, else BLAKE2b truncated
+    to the requested size.
+    
+    Args:
+        data: Bytes to hash
+        bits: 64 or 128
+    
+    Returns:
+        Unsigned integer hash
+    """
+    if xxhash is not None:
+        if bits == 64:
+            return xxhash.xxh3_64_intdigest(data)
+        return xxhash.xxh3_128_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=bits // 8).digest(), 'little')
+
+
+class _SortedRun:
+    """Sorted, packed hashes, in memory or memory-mapped from a spill file"""
+    
+    BLOOM_BITS_PER_KEY = 10
+    BLOOM_PROBES = 4  # ~1.2% false positives at 10 bits per key
+    
+    def __init__(self, hashes: Iterable[int], words: int, spill_dir: Optional[str]):
+        """
+        Build a run
+        
+        Args:
+            hashes: Hashes in ascending order
+            words: 64-bit words per hash (1 or 2)
+            spill_dir: Directory for the run file, or None to keep it in memory
+        """
+        self.words = words
+        if words == 1:
+            high, low = array('Q', hashes), None
+        else:
+            high, low = array('Q'), array('Q')
+            for value in hashes:
+                high.append(value >> 64)
+                low.append(value & _MASK64)
+        self.count = len(high)
+        
+        self.high, self.low = high, low
+        
+        self._path = None
+        self._mmap = None
+        self._bloom = None
+        if spill_dir is None or not self.count:
+            return
+        
+        # Spilled runs are paged in from disk: a Bloom filter in front avoids
+        # touching the file for most keys that are not in the run
+        self._bloom_size = self.count * self.BLOOM_BITS_PER_KEY
+        self._bloom = bytearray((self._bloom_size + 7) // 8)
+        for value in self:
+            for bit in self._bloom_bits(value):
+                self._bloom[bit >> 3] |= 1 << (bit & 7)
+        
+        fd, self._path = tempfile.mkstemp(prefix='dedup-run-', suffix='.bin', dir=spill_dir)
+        with os.fdopen(fd, 'wb') as f:
+            high.tofile(f)
+            if low is not None:
+                low.tofile(f)
+        with open(self._path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap).cast('Q')
+        self.high = view[:self.count]
+        self.low = view[self.count:] if low is not None else None
+    
+    def _bloom_bits(self, value: int) -> List[int]:
+        """Bloom filter bit positions (double hashing on two 32-bit halves)"""
+        h1 = value & 0xFFFFFFFF
+        h2 = ((value >> 32) & 0xFFFFFFFF) | 1
+        size = self._bloom_size
+        return [(h1 + i * h2) % size for i in range(self.BLOOM_PROBES)]
+    
+    def __contains__(self, value: int) -> bool:
+        if self._bloom is not None:
+            bloom = self._bloom
+            for bit in self._bloom_bits(value):
+                if not bloom[bit >> 3] & (1 << (bit & 7)):
+                    return False
+        
+        high = value >> 64 if self.words == 2 else value
+        i = bisect_left(self.high, high)
+        if self.words == 1:
+            return i < self.count and self.high[i] == value
+        
+        low = value & _MASK64
+        while i < self.count and self.high[i] == high:
+            if self.low[i] == low:
+                return True
+            i += 1
+        return False
+    
+    def __iter__(self) -> Iterator[int]:
+        if self.words == 1:
+            yield from self.high
+        else:
+            for high, low in zip(self.high, self.low):
+                yield (high << 64) | low
+    
+    def close(self):
+        """Release the run (and delete its file)"""
+        if self._mmap is not None:
+            self.high.release()
+            if self.low is not None:
+                self.low.release()
+            self._mmap.close()
+            self._mmap = None
+        if self._path is not None:
+            os.remove(self._path)
+            self._path = None
+
+
+class Deduplicator:
+    """
+    Exact-duplicate detector over canonical byte keys, in bounded memory
+    
+    Equality is decided by the hash of the key: with 64-bit hashes the
+    chance of any collision is about n^2 / 2^65 (3e-4 at 100 million
+    distinct keys); use hash_bits=128 to make it negligible.
+    """
+    
+    def __init__(self, hash_bits: int = 64, max_memory_keys: int = 1_000_000,
+                 spill_dir: Optional[str] = None, max_runs: int = 8):
+        """
+        Initialize the deduplicator
+        
+        Args:
+            hash_bits: 64 or 128
+            max_memory_keys: Hashes kept in the fast set before it is compacted
+                             into a packed sorted run
+            spill_dir: Directory for memory-mapped run files; None keeps runs
+                       in memory (8 or 16 bytes per key)
+            max_runs: Runs are merged into one when there are more than this
+        """
+        if hash_bits not in (64, 128):
+            raise ValueError("hash_bits must be 64 or 128")
+        
+        self.hash_bits = hash_bits
+        self.max_memory_keys = max_memory_keys
+        self.spill_dir = spill_dir
+        self.max_runs = max_runs
+        self._words = hash_bits // 64
+        self._recent = set()
+        self._runs: List[_SortedRun] = []
+        self._count = 0
+    
+    def add(self, key: bytes) -> bool:
+        """
+        Record a key
+        
+        Args:
+            key: Canonical byte encoding of a record
+        
+        Returns:
+            True if the key was not seen before, False for a duplicate
+        """
+        return self.add_hash(hash_bytes(key, self.hash_bits))
+    
+    def add_hash(self, value: int) -> bool:
+        """
+        Record a precomputed hash
+        
+        Args:
+            value: Hash from hash_bytes() with this deduplicator's hash_bits
+        
+        Returns:
+            True if the hash was not seen before, False for a duplicate
+        """
+        if value in self._recent:
+            return False
+        for run in self._runs:
+            if value in run:
+                return False
+        
+        self._recent.add(value)
+        self._count += 1
+        if len(self._recent) >= self.max_memory_keys:
+            self._compact()
+        return True
+    
+    def _compact(self):
+        """Move the recent hashes into a sorted run, merging runs if needed"""
+        recent = sorted(self._recent)
+        self._recent = set()
+        self._runs.append(_SortedRun(recent, self._words, self.spill_dir))
+        
+        if len(self._runs) > self.max_runs:
+            runs = self._runs
+            merged = _SortedRun(heapq.merge(*runs), self._words, self.spill_dir)
+            for run in runs:
+                run.close()
+            self._runs = [merged]
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def close(self):
+        """Release all runs (and delete spill files)"""
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._recent = set()
+    
+    def __enter__(self) -> 'Deduplicator':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_unique(records: Iterable[Any], key: Callable[[Any], bytes] = canonical_bytes,
+                stats: Optional[Dict] = None, **options) -> Iterator[Any]:
+    """
+    Stream records, dropping exact duplicates (first occurrence wins)
+    
+    Args:
+        records: Records (list or stream)
+        key: Canonical byte encoding of a record
+        stats: Optional dict filled in while iterating with 'total' and 'duplicates'
+        **options: Deduplicator options (hash_bits, max_memory_keys, spill_dir, max_runs)
+    
+    Yields:
+        Unique records, in input order
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault('total', 0)
+    stats.setdefault('duplicates', 0)
+    
+    with Deduplicator(**options) as seen:
+        for record in records:
+            stats['total'] += 1
+            if seen.add(key(record)):
+                yield record
+            else:
+                stats['duplicates'] += 1
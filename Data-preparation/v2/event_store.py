@@ -0,0 +1,341 @@
+"""
+Columnar event store for intermediate logs (optional, needs 'pyarrow')
+A store is a directory of Parquet files, one partition per session
+(<store>/session_id=<id>/part-0.parquet, plus part-1.parquet, ... when a
+session's logs arrive in more than one run). Well-known fields are flattened
+into typed columns (session_id, label, timestamp, event_type, event_id, ...);
+the original event is kept as a binary JSON column. Session order, parts
+and row counts are recorded in <store>/_sessions.json.
+
+Consumers that only need a few fields read just those columns, per-session
+counts come from the Parquet footers, and sorting by timestamp runs as an
+Arrow kernel instead of a Python sort over parsed events.
+
+Usage:
+    python event_store.py <logs.jsonl> <store dir>   # Convert a log JSONL file
+"""
+
+import json
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from utils import get_timestamp, iter_jsonl
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only needed for the event store
+    pa = None
+
+SESSIONS_FILE = '_sessions.json'
+
+# Column name -> (type, dotted source paths, first present wins); timestamp uses get_timestamp()
+EVENT_COLUMNS = {
+    'session_id': ('string', ['session_id']),
+    'label': ('string', ['label']),
+    'timestamp': ('string', []),
+    'event_type': ('string', ['event_type']),
+    'event_id': ('int32', ['winlog.event_id']),
+    'image': ('string', ['winlog.event_data.Image']),
+    'source_ip': ('string', ['winlog.event_data.SourceIp', 'layers.IP.src']),
+    'destination_ip': ('string', ['winlog.event_data.DestinationIp', 'layers.IP.dst']),
+    'destination_port': ('int32', ['winlog.event_data.DestinationPort', 'layers.TCP.dport', 'layers.UDP.dport'])
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The event store requires the 'pyarrow' package (pip install pyarrow)")
+
+
+def _schema() -> 'pa.Schema':
+    """Arrow schema of a store file"""
+    types = {'string': pa.string(), 'int32': pa.int32()}
+    fields = [pa.field(name, types[type_name]) for name, (type_name, _) in EVENT_COLUMNS.items()]
+    return pa.schema(fields + [pa.field('event', pa.binary())])
+
+
+def _lookup(log: Dict, path: str):
+    value = log
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def flatten_event(log: Dict) -> Dict:
+    """
+    Flatten a log into the store's column values
+    
+    Args:
+        log: Log object
+    
+    Returns:
+        Column name -> value (None when missing or not convertible), plus
+        'event' (the original log as UTF-8 JSON)
+    """
+    row = {}
+    for name, (type_name, paths) in EVENT_COLUMNS.items():
+        if name == 'timestamp':
+            row[name] = get_timestamp(log)
+            continue
+        
+        value = next((v for v in (_lookup(log, path) for path in paths) if v is not None), None)
+        if value is not None and type_name == 'int32':
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                value = None
+            if value is not None and not -2**31 <= value < 2**31:
+                value = None
+        elif value is not None:
+            value = str(value)
+        row[name] = value
+    
+    row['event'] = json.dumps(log, ensure_ascii=False).encode('utf-8')
+    return row
+
+
+def partition_name(session_id: str) -> str:
+    """Partition directory of a session (hive style, URL-quoted)"""
+    return f"session_id={quote(str(session_id), safe='')}"
+
+
+class EventStoreWriter:
+    """
+    Incremental event store writer
+    
+    Logs should arrive grouped by session (as extraction writes them); each
+    run of a session is written as one Parquet file when the next session
+    starts. A later run of an already written session becomes another part
+    (part-1.parquet, ...) of the same partition.
+    The store is built in a temporary directory and moved into place when
+    the writer is closed without error.
+    
+    Usage:
+        with EventStoreWriter(store_dir) as store:
+            store.write(log)
+    """
+    
+    def __init__(self, store_dir: Path):
+        """
+        Open the writer
+        
+        Args:
+            store_dir: Store directory (replaced on commit)
+        """
+        _require_pyarrow()
+        self.store_dir = Path(store_dir)
+        self.tmp_dir = self.store_dir.with_name(self.store_dir.name + '.tmp')
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        self.tmp_dir.mkdir(parents=True)
+        self.count = 0
+        self._schema = _schema()
+        self._sessions: Dict[str, Dict] = {}
+        self._current_id = None
+        self._rows: List[Dict] = []
+    
+    def write(self, log: Dict):
+        """Add one log"""
+        session_id = log.get('session_id', 'unknown')
+        if session_id != self._current_id:
+            self._flush()
+            self._current_id = session_id
+        self._rows.append(flatten_event(log))
+        self.count += 1
+    
+    def tee(self, logs: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Write logs to the store while passing them on (to write JSONL at the same time)
+        
+        Args:
+            logs: Log objects (list or stream)
+        
+        Yields:
+            The same logs
+        """
+        for log in logs:
+            self.write(log)
+            yield log
+    
+    def _flush(self):
+        """Write the current run's rows as the next Parquet part of its session"""
+        if not self._rows:
+            return
+        session = self._sessions.get(self._current_id)
+        if session is None:
+            session = {'session_id': self._current_id, 'partition': partition_name(self._current_id),
+                       'parts': [], 'rows': 0}
+            self._sessions[self._current_id] = session
+            (self.tmp_dir / session['partition']).mkdir()
+        part = f"part-{len(session['parts'])}.parquet"
+        table = pa.Table.from_pylist(self._rows, schema=self._schema)
+        pq.write_table(table, self.tmp_dir / session['partition'] / part)
+        session['parts'].append(part)
+        session['rows'] += len(self._rows)
+        self._rows = []
+    
+    def close(self, commit: bool = True):
+        """Finish the store; move it into place if commit, else discard it"""
+        if commit:
+            self._flush()
+            with open(self.tmp_dir / SESSIONS_FILE, 'w', encoding='utf-8') as f:
+                json.dump(list(self._sessions.values()), f, indent=2, ensure_ascii=False)
+            shutil.rmtree(self.store_dir, ignore_errors=True)
+            self.tmp_dir.replace(self.store_dir)
+        else:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def __enter__(self) -> 'EventStoreWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
+
+def write_event_store(logs: Iterable[Dict], store_dir: Path) -> int:
+    """
+    Write logs (grouped by session) to an event store
+    
+    Args:
+        logs: Log objects (list or stream)
+        store_dir: Store directory
+    
+    Returns:
+        Number of logs written
+    """
+    with EventStoreWriter(store_dir) as store:
+        for log in logs:
+            store.write(log)
+    return store.count
+
+
+def list_sessions(store_dir: Path) -> List[Dict]:
+    """
+    Sessions of a store, in the order they were first written
+    
+    Args:
+        store_dir: Store directory
+    
+    Returns:
+        [{'session_id', 'partition', 'parts', 'rows'}] per session
+    """
+    with open(Path(store_dir) / SESSIONS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def session_files(store_dir: Path, session: Dict) -> List[Path]:
+    """Parquet files of a session, in the order they were written"""
+    partition = Path(store_dir) / session['partition']
+    return [partition / part for part in session.get('parts', ['part-0.parquet'])]
+
+
+def read_session(store_dir: Path, session: Dict, columns: Optional[List[str]] = None) -> 'pa.Table':
+    """
+    Read one session's table (all of its parts, in write order)
+    
+    Args:
+        store_dir: Store directory
+        session: Entry from list_sessions()
+        columns: Columns to read (default: all)
+    
+    Returns:
+        Arrow table
+    """
+    _require_pyarrow()
+    return pa.concat_tables([pq.read_table(path, columns=columns) for path in session_files(store_dir, session)])
+
+
+def decode_events(table: 'pa.Table') -> List[Dict]:
+    """Original events of a table (its 'event' column), in row order"""
+    return [json.loads(event) for event in table.column('event').to_pylist()]
+
+
+def iter_events(store_dir: Path) -> Iterator[Dict]:
+    """
+    Stream the original events of a store, session by session (a session's
+    later runs follow its first one)
+    
+    Args:
+        store_dir: Store directory
+    
+    Yields:
+        Log objects
+    """
+    for session in list_sessions(store_dir):
+        yield from decode_events(read_session(store_dir, session, columns=['event']))
+
+
+def iter_sorted_sessions(store_dir: Path) -> Iterator[Tuple[str, List[Dict]]]:
+    """
+    Stream sessions with their events sorted by timestamp
+    
+    The sort is a stable Arrow sort on the timestamp column, so the order
+    matches sorted(logs, key=get_timestamp).
+    
+    Args:
+        store_dir: Store directory
+    
+    Yields:
+        (session_id, sorted list of logs) per session, in store order
+    """
+    for session in list_sessions(store_dir):
+        table = read_session(store_dir, session, columns=['timestamp', 'event'])
+        order = pc.sort_indices(table, sort_keys=[('timestamp', 'ascending')])
+        yield session['session_id'], decode_events(table.take(order))
+
+
+def count_logs_by_session(store_dir: Path) -> Dict[str, int]:
+    """
+    Count logs per session from the Parquet footers (no data is read)
+    
+    Args:
+        store_dir: Store directory
+    
+    Returns:
+        Dictionary mapping session_id to count
+    """
+    _require_pyarrow()
+    return {
+        session['session_id']: sum(pq.ParquetFile(path).metadata.num_rows for path in session_files(store_dir, session))
+        for session in list_sessions(store_dir)
+    }
+
+
+def value_counts(store_dir: Path, column: str) -> Dict:
+    """
+    Count values of one column across the store (e.g. label, event_type)
+    
+    Args:
+        store_dir: Store directory
+        column: Column name
+    
+    Returns:
+        Dictionary mapping value to count
+    """
+    counts = {}
+    for session in list_sessions(store_dir):
+        for item in pc.value_counts(read_session(store_dir, session, columns=[column]).column(column)).to_pylist():
+            counts[item['values']] = counts.get(item['values'], 0) + item['counts']
+    return counts
+
+
+def main():
+    """Convert a log JSONL file to an event store"""
+    if len(sys.argv) != 3:
+        print("Usage: python event_store.py <logs.jsonl> <store dir>")
+        return
+    
+    source, store_dir = Path(sys.argv[1]), Path(sys.argv[2])
+    print(f"📂 Loading from: {source}")
+    count = write_event_store(iter_jsonl(source), store_dir)
+    print(f"💾 Wrote {count:,} logs in {len(list_sessions(store_dir)):,} sessions to: {store_dir}")
+
+
+if __name__ == '__main__':
+    main()
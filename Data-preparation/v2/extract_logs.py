@@ -0,0 +1,219 @@
+"""
+Extract suspicious and normal logs in one parallel pass
+Session files are read concurrently by a process pool: each worker loads one
+session file, filters its logs and tags them with session_id. Results come
+back in session order and are streamed to the output files, so the output
+is identical to a serial run.
+"""
+
+from itertools import islice
+from multiprocessing import Pool
+from pathlib import Path
+from tqdm import tqdm
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import (
+    SUSPICIOUS_LOGS_DIR,
+    NORMAL_LOGS_DIR,
+    EXTRACTED_SUSPICIOUS_FILE,
+    EXTRACTED_NORMAL_FILE,
+    NUM_WORKERS
+)
+from utils import load_json_file, JsonlWriter, print_stats
+
+
+def select_session_logs(logs: List[Dict], label: str, session_id: str) -> List[Dict]:
+    """
+    Filter and tag the logs of one session
+    
+    Args:
+        logs: Logs from the session file
+        label: 'suspicious' keeps only logs labelled suspicious;
+               'normal' keeps all logs (normal-logs are all normal)
+        session_id: Session identifier
+    
+    Returns:
+        Selected logs with session_id (and label) set
+    """
+    selected = []
+    
+    for log in logs:
+        if label == 'suspicious' and log.get('label') != 'suspicious':
+            continue
+        # Add session_id to each log for tracking
+        log['session_id'] = session_id
+        if label == 'normal':
+            # Ensure label is set to 'normal'
+            log['label'] = 'normal'
+        selected.append(log)
+    
+    return selected
+
+
+def extract_session(task: Tuple[str, str]) -> Tuple[str, Optional[str], List[Dict], str]:
+    """
+    Pool task: load one session folder and select its logs
+    
+    Args:
+        task: (label, session folder path)
+    
+    Returns:
+        Tuple of (label, session_id, selected logs, message); session_id is
+        None and message explains why if the session could not be read
+    """
+    label, folder = task
+    folder = Path(folder)
+    json_files = list(folder.glob("*.json"))
+    
+    if not json_files:
+        return label, None, [], f"⚠️  No JSON file in {folder.name}"
+    
+    try:
+        data = load_json_file(json_files[0])
+        session_id = data.get('session_id', folder.name)
+        return label, session_id, select_session_logs(data.get('logs', []), label, session_id), ""
+    except Exception as e:
+        return label, None, [], f"❌ Error processing {folder.name}: {e}"
+
+
+def list_session_tasks(logs_dir: Path, label: str) -> List[Tuple[str, str]]:
+    """
+    List the session folders of a logs directory as extraction tasks
+    
+    Args:
+        logs_dir: Path to suspicious-logs or normal-logs directory
+        label: Label the directory holds
+    
+    Returns:
+        (label, folder path) tasks, sorted by folder name
+    """
+    session_folders = sorted([f for f in logs_dir.iterdir() if f.is_dir()])
+    
+    print(f"\n🔍 Scanning: {logs_dir}")
+    print(f"   Found {len(session_folders)} session folders")
+    
+    return [(label, str(folder)) for folder in session_folders]
+
+
+def iter_extracted_sessions(tasks: List[Tuple[str, str]], num_workers: int = NUM_WORKERS) -> Iterator[Tuple[str, str, List[Dict]]]:
+    """
+    Extract sessions on a process pool (serially when num_workers is 1)
+    
+    Tasks are handed to the pool in small windows, so at most a few
+    sessions per worker are in memory at once.
+    
+    Args:
+        tasks: (label, folder path) tasks
+        num_workers: Worker processes
+    
+    Yields:
+        (label, session_id, selected logs) in task order
+    """
+    progress = tqdm(total=len(tasks), desc="📦 Processing sessions")
+    
+    for label, session_id, logs, message in _run_tasks(tasks, num_workers):
+        progress.update()
+        if message:
+            print(f"   {message}")
+            continue
+        yield label, session_id, logs
+    
+    progress.close()
+
+
+def _run_tasks(tasks: Iterable[Tuple[str, str]], num_workers: int) -> Iterator[Tuple[str, Optional[str], List[Dict], str]]:
+    """Map extract_session over tasks, keeping task order"""
+    if num_workers <= 1:
+        yield from map(extract_session, tasks)
+        return
+    
+    window_size = num_workers * 2
+    tasks = iter(tasks)
+    with Pool(num_workers) as pool:
+        while True:
+            window = list(islice(tasks, window_size))
+            if not window:
+                break
+            yield from pool.imap(extract_session, window)
+
+
+def extract_logs(sources: Dict[str, Tuple[Path, Path]], num_workers: int = NUM_WORKERS) -> Dict[str, Dict]:
+    """
+    Extract logs for one or more labels in a single pass over the session files
+    
+    Args:
+        sources: label -> (logs directory, output JSONL file)
+        num_workers: Worker processes
+    
+    Returns:
+        label -> stats dict with 'sessions' (sessions read), 'logs' (logs
+        written) and 'session_stats' (session_id -> log count, for every
+        session read)
+    """
+    tasks = []
+    for label, (logs_dir, _) in sources.items():
+        tasks.extend(list_session_tasks(logs_dir, label))
+    
+    if num_workers > 1:
+        print(f"   Using {num_workers} worker processes")
+    
+    stats = {label: {'sessions': 0, 'logs': 0, 'session_stats': {}} for label in sources}
+    writers = {label: JsonlWriter(output_file) for label, (_, output_file) in sources.items()}
+    
+    try:
+        for label, session_id, logs in iter_extracted_sessions(tasks, num_workers):
+            writer = writers[label]
+            for log in logs:
+                writer.write(log)
+            
+            stats[label]['sessions'] += 1
+            stats[label]['logs'] += len(logs)
+            stats[label]['session_stats'][session_id] = len(logs)
+    except BaseException:
+        for writer in writers.values():
+            writer.close(commit=False)
+        raise
+    
+    for writer in writers.values():
+        writer.close()
+    
+    return stats
+
+
+def main():
+    """Main function to extract suspicious and normal logs in one pass"""
+    print("="*70)
+    print("EXTRACTING SUSPICIOUS AND NORMAL LOGS")
+    print("="*70)
+    
+    # Validate paths
+    sources = {}
+    for label, logs_dir, output_file in (
+        ('suspicious', SUSPICIOUS_LOGS_DIR, EXTRACTED_SUSPICIOUS_FILE),
+        ('normal', NORMAL_LOGS_DIR, EXTRACTED_NORMAL_FILE)
+    ):
+        if logs_dir.exists():
+            sources[label] = (logs_dir, output_file)
+        else:
+            print(f"❌ Error: {label.capitalize()} logs directory not found: {logs_dir}")
+    
+    if not sources:
+        return
+    
+    # Extract logs, streaming them straight to the output files
+    stats = extract_logs(sources)
+    
+    # Print statistics
+    for label, label_stats in stats.items():
+        print_stats(f"✅ {label.upper()} EXTRACTION COMPLETE", {
+            "Total sessions processed": label_stats['sessions'],
+            f"Sessions with {label} logs": sum(1 for count in label_stats['session_stats'].values() if count),
+            f"Total {label} logs extracted": label_stats['logs'],
+            "Output file": str(sources[label][1])
+        })
+    
+    return stats
+
+
+if __name__ == '__main__':
+    main()
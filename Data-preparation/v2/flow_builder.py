@@ -0,0 +1,240 @@
+"""
+Flow aggregation for parsed PCAP packets
+Collapses per-packet network events (as written by the PCAP parsers: a
+'layers' dict with IP/IPv6 and TCP/UDP/ICMP fields) into bidirectional
+connection records keyed by 5-tuple: start/end time, packet and byte counts
+per direction, a TCP flag histogram, inter-arrival statistics and the
+first and last original packet numbers (kept compact so a flow's size
+does not grow with its packet count).
+
+A flow ends after FLOW_IDLE_TIMEOUT seconds without packets or once it has
+been open for FLOW_ACTIVE_TIMEOUT seconds, so long-lived connections still
+show up as several records spread over the session.
+
+Flow records keep the packet event shape (timestamp, event_type 'network',
+length, layers) so cleaning, annotation, chunking and the analyzers read them
+like packets; 'length' is the flow's mean packet length.
+
+Standard library only, so it can be shared with the log cleaners.
+"""
+
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from math import sqrt
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+FLOW_IDLE_TIMEOUT = 60     # Seconds without packets before a flow is closed
+FLOW_ACTIVE_TIMEOUT = 300  # Seconds after which an open flow is split into a new record
+
+TRANSPORT_LAYERS = ('TCP', 'UDP', 'ICMP')
+
+FlowKey = Tuple[str, Tuple[str, str], Tuple[str, str]]
+
+
+def packet_epoch(event: Dict) -> Optional[float]:
+    """Seconds since the epoch of a packet event's timestamp, or None"""
+    timestamp = event.get('timestamp')
+    if not timestamp:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def packet_endpoints(event: Dict) -> Optional[Tuple[str, str, str, str, str, str]]:
+    """
+    Endpoints of a packet event
+    
+    Returns:
+        (transport, proto, src, sport, dst, dport), or None for packets
+        without an IP layer (ARP, ...). Ports are '' for ICMP.
+    """
+    layers = event.get('layers')
+    if not isinstance(layers, dict):
+        return None
+    ip = layers.get('IP') or layers.get('IPv6')
+    if not isinstance(ip, dict) or not ip.get('src') or not ip.get('dst'):
+        return None
+    
+    transport = next((name for name in TRANSPORT_LAYERS if isinstance(layers.get(name), dict)), '')
+    ports = layers.get(transport, {}) if transport in ('TCP', 'UDP') else {}
+    proto = str(ip.get('proto', ip.get('nh', '')))
+    return transport, proto, str(ip['src']), str(ports.get('sport', '')), str(ip['dst']), str(ports.get('dport', ''))
+
+
+def flow_key(endpoints: Tuple[str, str, str, str, str, str]) -> FlowKey:
+    """Direction-independent 5-tuple of a packet's endpoints"""
+    transport, proto, src, sport, dst, dport = endpoints
+    first, second = sorted([(src, sport), (dst, dport)])
+    return transport + '/' + proto, first, second
+
+
+class _Flow:
+    """Running totals of one flow"""
+    
+    __slots__ = ('transport', 'proto', 'src', 'sport', 'dst', 'dport', 'first', 'last',
+                 'start_time', 'end_time', 'packets', 'bytes', 'fwd_packets', 'fwd_bytes',
+                 'flags', 'icmp_type', 'iat_sum', 'iat_sum_sq', 'iat_min', 'iat_max',
+                 'first_packet', 'last_packet')
+    
+    def __init__(self, endpoints: Tuple[str, str, str, str, str, str], epoch: float, timestamp: str):
+        # The first packet's sender is taken as the initiator
+        self.transport, self.proto, self.src, self.sport, self.dst, self.dport = endpoints
+        self.first = self.last = epoch
+        self.start_time = self.end_time = timestamp
+        self.packets = self.bytes = self.fwd_packets = self.fwd_bytes = 0
+        self.flags = Counter()
+        self.icmp_type = None
+        self.iat_sum = self.iat_sum_sq = 0.0
+        self.iat_min = self.iat_max = None
+        self.first_packet = self.last_packet = None
+    
+    def add(self, event: Dict, endpoints: Tuple[str, str, str, str, str, str], epoch: float, packet_id):
+        if self.packets:
+            interval = epoch - self.last
+            self.iat_sum += interval
+            self.iat_sum_sq += interval * interval
+            self.iat_min = interval if self.iat_min is None else min(self.iat_min, interval)
+            self.iat_max = interval if self.iat_max is None else max(self.iat_max, interval)
+        self.last = epoch
+        self.end_time = event.get('timestamp')
+        
+        try:
+            length = int(event.get('length') or 0)
+        except (TypeError, ValueError):
+            length = 0
+        self.packets += 1
+        self.bytes += length
+        if endpoints[2] == self.src and endpoints[3] == self.sport:
+            self.fwd_packets += 1
+            self.fwd_bytes += length
+        
+        layers = event['layers']
+        if self.transport == 'TCP':
+            self.flags[str(layers['TCP'].get('flags', ''))] += 1
+        elif self.transport == 'ICMP' and self.icmp_type is None:
+            self.icmp_type = str(layers['ICMP'].get('type', ''))
+        if self.first_packet is None:
+            self.first_packet = packet_id
+        self.last_packet = packet_id
+    
+    def to_event(self) -> Dict:
+        """Flow record in the packet event shape"""
+        intervals = self.packets - 1
+        if intervals:
+            mean = self.iat_sum / intervals
+            inter_arrival = {
+                'mean': round(mean, 6),
+                'std': round(sqrt(max(0.0, self.iat_sum_sq / intervals - mean * mean)), 6),
+                'min': round(self.iat_min, 6),
+                'max': round(self.iat_max, 6)
+            }
+        else:
+            inter_arrival = {'mean': 0.0, 'std': 0.0, 'min': 0.0, 'max': 0.0}
+        
+        layers = {'IP': {'src': self.src, 'dst': self.dst, 'proto': self.proto}}
+        if self.transport == 'TCP':
+            layers['TCP'] = {'sport': self.sport, 'dport': self.dport,
+                             'flags': self.flags.most_common(1)[0][0] if self.flags else ''}
+        elif self.transport == 'UDP':
+            layers['UDP'] = {'sport': self.sport, 'dport': self.dport}
+        elif self.transport == 'ICMP':
+            layers['ICMP'] = {'type': self.icmp_type or ''}
+        
+        name = self.transport or f"proto {self.proto}"
+        source = f"{self.src}:{self.sport}" if self.sport else self.src
+        destination = f"{self.dst}:{self.dport}" if self.dport else self.dst
+        return {
+            'timestamp': self.start_time,
+            'event_type': 'network',
+            'record_type': 'flow',
+            'end_timestamp': self.end_time,
+            'duration': round(self.last - self.first, 6),
+            'length': round(self.bytes / self.packets) if self.packets else 0,
+            'summary': f"{name} {source} <-> {destination} ({self.packets} packets, {self.bytes} bytes)",
+            'layers': layers,
+            'flow': {
+                'packets': self.packets,
+                'bytes': self.bytes,
+                'fwd_packets': self.fwd_packets,
+                'fwd_bytes': self.fwd_bytes,
+                'rev_packets': self.packets - self.fwd_packets,
+                'rev_bytes': self.bytes - self.fwd_bytes,
+                'tcp_flags': dict(self.flags),
+                'inter_arrival': inter_arrival,
+                'first_packet': self.first_packet,
+                'last_packet': self.last_packet
+            }
+        }
+
+
+def build_flows(events: Iterable[Dict], idle_timeout: float = FLOW_IDLE_TIMEOUT,
+                active_timeout: float = FLOW_ACTIVE_TIMEOUT) -> Iterator[Dict]:
+    """
+    Stream packet events into flow records
+    
+    Packets should arrive in capture order. Events that are not IP packets
+    or have no timestamp are passed through unchanged. Output is not in
+    timestamp order: flows are emitted when they close.
+    
+    Args:
+        events: Packet events (e.g. from a PCAP parser)
+        idle_timeout: Seconds without packets before a flow closes
+        active_timeout: Seconds after which an open flow is split
+    
+    Yields:
+        Flow records and passed-through events
+    """
+    active: 'OrderedDict[FlowKey, _Flow]' = OrderedDict()  # Least recently active first
+    
+    for position, event in enumerate(events, 1):
+        endpoints = packet_endpoints(event) if event.get('event_type') == 'network' else None
+        epoch = packet_epoch(event) if endpoints else None
+        if epoch is None:
+            yield event
+            continue
+        
+        # Close flows idle for longer than the timeout
+        while active:
+            oldest = next(iter(active.values()))
+            if epoch - oldest.last <= idle_timeout:
+                break
+            active.popitem(last=False)
+            yield oldest.to_event()
+        
+        key = flow_key(endpoints)
+        flow = active.get(key)
+        if flow is not None and epoch - flow.first > active_timeout:
+            del active[key]
+            yield flow.to_event()
+            flow = None
+        if flow is None:
+            flow = active[key] = _Flow(endpoints, epoch, event.get('timestamp'))
+        else:
+            active.move_to_end(key)
+        flow.add(event, endpoints, epoch, event.get('packet_number', position))
+    
+    for flow in active.values():
+        yield flow.to_event()
+
+
+def aggregate_flows(events: Iterable[Dict], idle_timeout: float = FLOW_IDLE_TIMEOUT,
+                    active_timeout: float = FLOW_ACTIVE_TIMEOUT) -> List[Dict]:
+    """
+    Collapse packet events into flow records, sorted by timestamp
+    
+    Args:
+        events: Packet events in capture order
+        idle_timeout: Seconds without packets before a flow closes
+        active_timeout: Seconds after which an open flow is split
+    
+    Returns:
+        Flow records and passed-through events, sorted by timestamp
+    """
+    records = list(build_flows(events, idle_timeout, active_timeout))
+    records.sort(key=lambda record: record.get('timestamp') or '')
+    return records
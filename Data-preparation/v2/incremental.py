@@ -0,0 +1,449 @@
+"""
+Incremental pipeline runner
+Each session is extracted, cleaned and chunked on its own into per-session
+shards (output/shards/<label>/{cleaned,chunks}/<session folder>.jsonl).
+A manifest records, per session, the content hash of its log file and the
+parameters each stage ran with; a refresh only reprocesses sessions that
+are new or changed (or re-chunks them when CHUNK_SIZE/MIN_CHUNK_SIZE
+change), drops shards of removed sessions, and rebuilds the combined
+cleaned and chunks files from the shards.
+
+Logs are tagged with their session_id before cleaning, so duplicates can
+only occur within a session and per-session cleaning gives the same result
+as cleaning the whole file (as long as session folders have distinct
+session IDs).
+"""
+
+import hashlib
+import json
+import shutil
+from multiprocessing import Pool
+from pathlib import Path
+from tqdm import tqdm
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import (
+    SUSPICIOUS_LOGS_DIR,
+    NORMAL_LOGS_DIR,
+    CLEANED_SUSPICIOUS_FILE,
+    CLEANED_NORMAL_FILE,
+    SUSPICIOUS_CHUNKS_DIR,
+    NORMAL_CHUNKS_DIR,
+    SHARDS_DIR,
+    CHUNK_SHARD_SIZE,
+    MANIFEST_FILE,
+    JSONL_SUFFIX,
+    CHUNK_SIZE,
+    MIN_CHUNK_SIZE,
+    DEDUP_HASH_BITS,
+    DEDUP_MAX_MEMORY_KEYS,
+    DEDUP_SPILL_DIR,
+    NEAR_DEDUP_NORMAL,
+    NEAR_DEDUP_SUSPICIOUS,
+    NEAR_DEDUP_THRESHOLD,
+    NEAR_DEDUP_NUM_PERM,
+    NEAR_DEDUP_KEEP_PER_CLUSTER,
+    NEAR_DEDUP_MAX_REPRESENTATIVES,
+    NEAR_DEDUP_FIELDS,
+    NUM_WORKERS
+)
+from chunk_dataset import write_chunk_dataset
+from chunk_normal_logs import create_chunks, create_chunk_metadata
+from dedup import iter_unique
+from extract_logs import select_session_logs
+from near_dedup import iter_representative_chunks
+from utils import load_json_file, iter_jsonl, write_jsonl, print_stats
+
+MANIFEST_VERSION = 1
+
+# label -> (session logs directory, combined cleaned file, chunk dataset, near-dedup enabled)
+PIPELINES = {
+    'suspicious': (SUSPICIOUS_LOGS_DIR, CLEANED_SUSPICIOUS_FILE, SUSPICIOUS_CHUNKS_DIR, NEAR_DEDUP_SUSPICIOUS),
+    'normal': (NORMAL_LOGS_DIR, CLEANED_NORMAL_FILE, NORMAL_CHUNKS_DIR, NEAR_DEDUP_NORMAL)
+}
+
+# Parameters that change each stage's output; a change reruns the stage
+STAGE_PARAMS = {
+    'clean': {'dedup_hash_bits': DEDUP_HASH_BITS},
+    'chunk': {'chunk_size': CHUNK_SIZE, 'min_chunk_size': MIN_CHUNK_SIZE}
+}
+
+NEAR_DEDUP_PARAMS = {
+    'threshold': NEAR_DEDUP_THRESHOLD,
+    'num_perm': NEAR_DEDUP_NUM_PERM,
+    'keep_per_cluster': NEAR_DEDUP_KEEP_PER_CLUSTER,
+    'max_representatives': NEAR_DEDUP_MAX_REPRESENTATIVES,
+    'fields': NEAR_DEDUP_FIELDS
+}
+
+
+def fingerprint(value) -> str:
+    """
+    Short stable hash of a JSON-serializable value (stage parameters, shard lists)
+    
+    Args:
+        value: JSON-serializable value
+    
+    Returns:
+        Hex digest
+    """
+    data = json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def hash_file(filepath: Path) -> str:
+    """
+    Content hash of a file, read in 1 MB blocks
+    
+    Args:
+        filepath: File to hash
+    
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_file: Path = MANIFEST_FILE) -> Dict:
+    """
+    Load the manifest, or an empty one if missing or from another version
+    
+    Args:
+        manifest_file: Manifest path
+    
+    Returns:
+        Manifest dict ({'version', 'labels': {label: {'sessions', 'outputs'}}})
+    """
+    if manifest_file.exists():
+        manifest = load_json_file(manifest_file)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+        print(f"⚠️  Manifest version changed; rebuilding all shards")
+    return {'version': MANIFEST_VERSION, 'labels': {}}
+
+
+def save_manifest(manifest: Dict, manifest_file: Path = MANIFEST_FILE):
+    """
+    Save the manifest atomically (write to a temporary file, then rename)
+    
+    Args:
+        manifest: Manifest dict
+        manifest_file: Manifest path
+    """
+    tmp_path = manifest_file.with_name(manifest_file.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    tmp_path.replace(manifest_file)
+
+
+def shard_path(label: str, stage: str, folder_name: str) -> Path:
+    """Shard file of one session's stage output"""
+    return SHARDS_DIR / label / stage / f"{folder_name}{JSONL_SUFFIX}"
+
+
+def find_session_file(folder: Path) -> Optional[Path]:
+    """Session log file of a session folder (the first *.json, as extraction reads it)"""
+    json_files = list(folder.glob("*.json"))
+    return json_files[0] if json_files else None
+
+
+def plan_sessions(label: str, logs_dir: Path, sessions: Dict) -> Tuple[List[Tuple], List[str]]:
+    """
+    Decide which stages each session needs
+    
+    A session file is only re-hashed when its size or modification time
+    changed, so an unchanged corpus is checked without reading it.
+    
+    Args:
+        label: Pipeline label
+        logs_dir: Session logs directory
+        sessions: Manifest entries of this label (updated in place for
+                  sessions whose file was touched but not changed)
+    
+    Returns:
+        Tuple of ([(label, folder path, stages, input info)] tasks, removed folder names)
+    """
+    tasks = []
+    present = set()
+    folders = sorted([f for f in logs_dir.iterdir() if f.is_dir()])
+    params = {stage: fingerprint(value) for stage, value in STAGE_PARAMS.items()}
+    
+    for folder in folders:
+        session_file = find_session_file(folder)
+        if session_file is None:
+            print(f"   ⚠️  No JSON file in {folder.name}")
+            continue
+        present.add(folder.name)
+        
+        stat = session_file.stat()
+        source = {'file': session_file.name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        entry = sessions.get(folder.name)
+        
+        if entry is not None and all(entry['source'].get(key) == value for key, value in source.items()):
+            source['hash'] = entry['source']['hash']
+        else:
+            source['hash'] = hash_file(session_file)
+            if entry is not None and entry['source'].get('hash') == source['hash']:
+                entry['source'] = source  # Touched, not changed
+        
+        if (entry is None or entry['source']['hash'] != source['hash']
+                or entry['params'].get('clean') != params['clean']
+                or not shard_path(label, 'cleaned', folder.name).exists()):
+            stages = ['clean', 'chunk']
+        elif entry['params'].get('chunk') != params['chunk'] or not shard_path(label, 'chunks', folder.name).exists():
+            stages = ['chunk']
+        else:
+            continue
+        tasks.append((label, str(folder), stages, source))
+    
+    removed = [name for name in sessions if name not in present]
+    return tasks, removed
+
+
+def process_session(task: Tuple) -> Tuple[str, str, Dict, str]:
+    """
+    Pool task: run the given stages for one session, writing its shards
+    
+    Args:
+        task: (label, session folder path, stages, input info)
+    
+    Returns:
+        Tuple of (label, folder name, manifest entry, error message or "")
+    """
+    label, folder, stages, source = task
+    folder = Path(folder)
+    cleaned_shard = shard_path(label, 'cleaned', folder.name)
+    entry = {'source': source, 'params': {stage: fingerprint(value) for stage, value in STAGE_PARAMS.items()}}
+    
+    try:
+        if 'clean' in stages:
+            data = load_json_file(folder / source['file'])
+            session_id = data.get('session_id', folder.name)
+            logs = select_session_logs(data.get('logs', []), label, session_id)
+            
+            clean_stats = {}
+            unique_logs = iter_unique(
+                logs,
+                stats=clean_stats,
+                hash_bits=DEDUP_HASH_BITS,
+                max_memory_keys=DEDUP_MAX_MEMORY_KEYS,
+                spill_dir=DEDUP_SPILL_DIR
+            )
+            cleaned = write_jsonl(unique_logs, cleaned_shard)
+            entry.update(session_id=session_id, extracted=len(logs), cleaned=cleaned)
+        
+        # Chunk the cleaned shard (the whole shard is one session)
+        session_logs = list(iter_jsonl(cleaned_shard))
+        session_id = entry.get('session_id') or (session_logs[0]['session_id'] if session_logs else folder.name)
+        chunks = create_chunks(session_logs, CHUNK_SIZE) if session_logs else []
+        entry['chunks'] = write_jsonl((
+            {"metadata": create_chunk_metadata(chunk, idx, session_id), "logs": chunk}
+            for idx, chunk in enumerate(chunks)
+        ), shard_path(label, 'chunks', folder.name))
+        return label, folder.name, entry, ""
+    except Exception as e:
+        return label, folder.name, entry, f"❌ Error processing {folder.name}: {e}"
+
+
+def iter_processed_sessions(tasks: List[Tuple], num_workers: int = NUM_WORKERS) -> Iterator[Tuple[str, str, Dict, str]]:
+    """
+    Run session tasks on a process pool (serially when num_workers is 1)
+    
+    Args:
+        tasks: Tasks from plan_sessions()
+        num_workers: Worker processes
+    
+    Yields:
+        process_session() results, in completion order
+    """
+    if num_workers <= 1 or len(tasks) <= 1:
+        yield from map(process_session, tasks)
+        return
+    
+    with Pool(min(num_workers, len(tasks))) as pool:
+        yield from pool.imap_unordered(process_session, tasks)
+
+
+def iter_shard_records(label: str, stage: str, folder_names: List[str]) -> Iterator[Dict]:
+    """Stream the records of a stage's shards in session folder order"""
+    for folder_name in folder_names:
+        yield from iter_jsonl(shard_path(label, stage, folder_name))
+
+
+def concat_shards(label: str, stage: str, folder_names: List[str], output_file: Path) -> int:
+    """
+    Concatenate a stage's shards into one combined file
+    
+    Plain JSONL shards are copied byte for byte; compressed shards are
+    re-encoded (zstd readers stop at the end of the first frame).
+    
+    Args:
+        label: Pipeline label
+        stage: 'cleaned' or 'chunks'
+        folder_names: Session folder names, in output order
+        output_file: Combined file
+    
+    Returns:
+        Number of records written
+    """
+    if JSONL_SUFFIX != '.jsonl':
+        return write_jsonl(iter_shard_records(label, stage, folder_names), output_file)
+    
+    count = 0
+    tmp_path = output_file.with_name(output_file.name + '.tmp')
+    with open(tmp_path, 'wb') as out:
+        for folder_name in folder_names:
+            with open(shard_path(label, stage, folder_name), 'rb') as shard:
+                for line in shard:
+                    if line.strip():
+                        out.write(line)
+                        count += 1
+    tmp_path.replace(output_file)
+    return count
+
+
+def build_outputs(label: str, sessions: Dict, outputs: Dict) -> Dict:
+    """
+    Rebuild a pipeline's combined cleaned file and chunk dataset from its shards
+    
+    Skipped when the shards, near-dedup settings and output files are the
+    same as at the last build.
+    
+    Args:
+        label: Pipeline label
+        sessions: Manifest entries of this label
+        outputs: Manifest record of the last build (updated in place)
+    
+    Returns:
+        Stats of the build ('cleaned', 'chunks', 'near_duplicates', 'rebuilt')
+    """
+    _, cleaned_file, chunks_dir, near_dedup = PIPELINES[label]
+    folder_names = sorted(sessions)
+    state = fingerprint({
+        'sessions': [(name, sessions[name]['source']['hash'], sessions[name]['params']) for name in folder_names],
+        'near_dedup': NEAR_DEDUP_PARAMS if near_dedup else None
+    })
+    
+    if outputs.get('state') == state and cleaned_file.exists() and chunks_dir.exists():
+        return dict(outputs['stats'], rebuilt=False)
+    
+    print(f"\n🔗 Building {label} outputs from {len(folder_names):,} session shards...")
+    stats = {'cleaned': concat_shards(label, 'cleaned', folder_names, cleaned_file)}
+    
+    chunks = iter_shard_records(label, 'chunks', folder_names)
+    near_dedup_stats = {}
+    if near_dedup:
+        chunks = iter_representative_chunks(
+            tqdm(chunks, desc="   Removing near-duplicates"),
+            near_dedup_stats, NEAR_DEDUP_FIELDS,
+            threshold=NEAR_DEDUP_THRESHOLD,
+            num_perm=NEAR_DEDUP_NUM_PERM,
+            keep_per_cluster=NEAR_DEDUP_KEEP_PER_CLUSTER,
+            max_representatives=NEAR_DEDUP_MAX_REPRESENTATIVES
+        )
+    stats['chunks'] = write_chunk_dataset(chunks, chunks_dir, label=label, shard_size=CHUNK_SHARD_SIZE)
+    stats['near_duplicates'] = near_dedup_stats.get('near_duplicates', 0)
+    
+    outputs.update(state=state, stats=stats)
+    return dict(stats, rebuilt=True)
+
+
+def run_incremental(labels: Optional[List[str]] = None, num_workers: int = NUM_WORKERS) -> Dict[str, Dict]:
+    """
+    Bring the shards and combined outputs up to date with the session folders
+    
+    Args:
+        labels: Pipelines to run (default: all with an existing logs directory)
+        num_workers: Worker processes
+    
+    Returns:
+        label -> stats dict (sessions, processed, rechunked, removed,
+        failed, cleaned, chunks, near_duplicates, rebuilt)
+    """
+    manifest = load_manifest()
+    labels = labels or [label for label, (logs_dir, *_) in PIPELINES.items() if logs_dir.exists()]
+    
+    tasks = []
+    results = {}
+    for label in labels:
+        logs_dir = PIPELINES[label][0]
+        print(f"\n🔍 Scanning: {logs_dir}")
+        label_manifest = manifest['labels'].setdefault(label, {'sessions': {}, 'outputs': {}})
+        sessions = label_manifest['sessions']
+        
+        label_tasks, removed = plan_sessions(label, logs_dir, sessions)
+        for folder_name in removed:
+            for stage in ('cleaned', 'chunks'):
+                shard_path(label, stage, folder_name).unlink(missing_ok=True)
+            del sessions[folder_name]
+        
+        print(f"   {len(label_tasks):,} sessions to process, {len(removed):,} removed")
+        tasks.extend(label_tasks)
+        results[label] = {
+            'processed': sum(1 for t in label_tasks if 'clean' in t[2]),
+            'rechunked': sum(1 for t in label_tasks if 'clean' not in t[2]),
+            'removed': len(removed),
+            'failed': 0
+        }
+    
+    if tasks:
+        progress = tqdm(total=len(tasks), desc="📦 Processing changed sessions")
+        for label, folder_name, entry, message in iter_processed_sessions(tasks, num_workers):
+            progress.update()
+            if message:
+                print(f"   {message}")
+                results[label]['failed'] += 1
+                continue
+            manifest['labels'][label]['sessions'][folder_name] = dict(
+                manifest['labels'][label]['sessions'].get(folder_name, {}), **entry
+            )
+        progress.close()
+    
+    for label in labels:
+        label_manifest = manifest['labels'][label]
+        results[label]['sessions'] = len(label_manifest['sessions'])
+        results[label].update(build_outputs(label, label_manifest['sessions'], label_manifest['outputs']))
+    
+    save_manifest(manifest)
+    return results
+
+
+def clear_shards():
+    """Delete all shards and the manifest (the next run rebuilds everything)"""
+    shutil.rmtree(SHARDS_DIR, ignore_errors=True)
+    MANIFEST_FILE.unlink(missing_ok=True)
+
+
+def main():
+    """Main function to refresh the pipeline outputs incrementally"""
+    print("="*70)
+    print("INCREMENTAL DATA PREPARATION")
+    print(f"Chunk size: {CHUNK_SIZE} logs")
+    print(f"Minimum chunk size: {MIN_CHUNK_SIZE} logs")
+    print("="*70)
+    
+    results = run_incremental()
+    
+    for label, stats in results.items():
+        print_stats(f"✅ {label.upper()} PIPELINE UP TO DATE", {
+            "Sessions": stats['sessions'],
+            "New or changed sessions processed": stats['processed'],
+            "Sessions re-chunked (parameters changed)": stats['rechunked'],
+            "Sessions removed": stats['removed'],
+            "Sessions failed": stats['failed'],
+            "Cleaned logs": stats['cleaned'],
+            "Chunks": stats['chunks'],
+            "Near-duplicate chunks removed": stats['near_duplicates'],
+            "Outputs rebuilt": "yes" if stats['rebuilt'] else "no (unchanged)",
+            "Output file": str(PIPELINES[label][2])
+        })
+    
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -1,75 +1,75 @@
 """
 Master pipeline script to run the entire data preparation workflow
-Runs both suspicious and normal data pipelines sequentially
+By default the pipeline runs incrementally (see incremental.py): only new or
+changed sessions are extracted, cleaned and chunked into per-session shards,
+and the combined outputs are rebuilt from the shards.
+
+With --full, the extract/clean/chunk stages run as a DAG (see dag.py):
+extraction runs once for both pipelines, then the suspicious and normal
+clean/chunk branches run concurrently in separate processes. Stages whose
+outputs are newer than their inputs (and config.py) are skipped unless
+--force is given. Per-stage wall time and peak RSS go to the run report.
+
+Usage:
+    python main.py                  # incremental refresh
+    python main.py --full           # stage DAG, skipping up-to-date stages
+    python main.py --full --force   # stage DAG, rerunning every stage
 """
 
 import sys
 from pathlib import Path
+from typing import List
 
 # Add current directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import validate_paths
-import extract_suspicious_logs
-import extract_normal_logs
-import clean_suspicious_logs
-import clean_normal_logs
-import chunk_suspicious_logs
-import chunk_normal_logs
-
+import config
+from config import (
+    validate_paths,
+    SUSPICIOUS_LOGS_DIR,
+    NORMAL_LOGS_DIR,
+    EXTRACTED_SUSPICIOUS_FILE,
+    EXTRACTED_NORMAL_FILE,
+    CLEANED_SUSPICIOUS_FILE,
+    CLEANED_NORMAL_FILE,
+    CLEANED_SUSPICIOUS_STORE,
+    CLEANED_NORMAL_STORE,
+    EVENT_STORE,
+    SUSPICIOUS_CHUNKS_DIR,
+    NORMAL_CHUNKS_DIR,
+    MAX_PARALLEL_STAGES,
+    RUN_REPORT_FILE
+)
+from dag import Stage, run_dag, print_run_report
+import incremental
 
-def print_pipeline_header(step_num: int, step_name: str):
-    """Print a formatted pipeline step header"""
-    print("\n\n")
-    print("█" * 70)
-    print(f"█  STEP {step_num}: {step_name}")
-    print("█" * 70)
+CONFIG_FILE = Path(config.__file__)
 
 
-def run_suspicious_pipeline():
-    """Run the suspicious logs pipeline"""
-    print("\n" + "="*70)
-    print("🔴 SUSPICIOUS LOGS PIPELINE")
-    print("="*70)
-    
-    # Step 1: Extract
-    print_pipeline_header(1, "EXTRACT SUSPICIOUS LOGS")
-    extract_suspicious_logs.main()
+def build_stages() -> List[Stage]:
+    """
+    Declare the pipeline stages and the files they read and write
     
-    # Step 2: Clean
-    print_pipeline_header(2, "CLEAN SUSPICIOUS LOGS")
-    clean_suspicious_logs.main()
-    
-    # Step 3: Chunk
-    print_pipeline_header(3, "CREATE SUSPICIOUS CHUNKS")
-    chunk_suspicious_logs.main()
-    
-    print("\n" + "="*70)
-    print("✅ SUSPICIOUS PIPELINE COMPLETE")
-    print("="*70)
-
-
-def run_normal_pipeline():
-    """Run the normal logs pipeline"""
-    print("\n" + "="*70)
-    print("🟢 NORMAL LOGS PIPELINE")
-    print("="*70)
-    
-    # Step 1: Extract
-    print_pipeline_header(1, "EXTRACT NORMAL LOGS")
-    extract_normal_logs.main()
-    
-    # Step 2: Clean
-    print_pipeline_header(2, "CLEAN NORMAL LOGS")
-    clean_normal_logs.main()
-    
-    # Step 3: Chunk
-    print_pipeline_header(3, "CREATE NORMAL CHUNKS")
-    chunk_normal_logs.main()
-    
-    print("\n" + "="*70)
-    print("✅ NORMAL PIPELINE COMPLETE")
-    print("="*70)
+    Returns:
+        Stages (dependencies follow from the files)
+    """
+    return [
+        Stage('extract', 'extract_logs',
+              inputs=[SUSPICIOUS_LOGS_DIR, NORMAL_LOGS_DIR, CONFIG_FILE],
+              outputs=[EXTRACTED_SUSPICIOUS_FILE, EXTRACTED_NORMAL_FILE]),
+        Stage('clean_suspicious', 'clean_suspicious_logs',
+              inputs=[EXTRACTED_SUSPICIOUS_FILE, CONFIG_FILE],
+              outputs=[CLEANED_SUSPICIOUS_FILE] + ([CLEANED_SUSPICIOUS_STORE] if EVENT_STORE else [])),
+        Stage('chunk_suspicious', 'chunk_suspicious_logs',
+              inputs=[CLEANED_SUSPICIOUS_FILE, CONFIG_FILE],
+              outputs=[SUSPICIOUS_CHUNKS_DIR]),
+        Stage('clean_normal', 'clean_normal_logs',
+              inputs=[EXTRACTED_NORMAL_FILE, CONFIG_FILE],
+              outputs=[CLEANED_NORMAL_FILE] + ([CLEANED_NORMAL_STORE] if EVENT_STORE else [])),
+        Stage('chunk_normal', 'chunk_normal_logs',
+              inputs=[CLEANED_NORMAL_FILE, CONFIG_FILE],
+              outputs=[NORMAL_CHUNKS_DIR])
+    ]
 
 
 def main():
@@ -87,11 +87,27 @@ def main():
     print("✅ Configuration valid!\n")
     
     try:
-        # Run suspicious pipeline
-        run_suspicious_pipeline()
+        if '--full' not in sys.argv[1:]:
+            # Incremental refresh: only new or changed sessions are processed
+            incremental.main()
+            return
+        
+        # Full run: stage DAG, suspicious and normal branches side by side
+        report = run_dag(
+            build_stages(),
+            max_parallel=MAX_PARALLEL_STAGES,
+            force='--force' in sys.argv[1:],
+            report_file=RUN_REPORT_FILE
+        )
+        print_run_report(report)
+        print(f"Report: {RUN_REPORT_FILE}")
         
-        # Run normal pipeline
-        run_normal_pipeline()
+        if not report['success']:
+            print("\n\n❌ PIPELINE FAILED")
+            failed = [name for name, result in report['stages'].items() if result['status'] == 'failed']
+            for name in failed:
+                print(f"   - {name}: {report['stages'][name]['error']}")
+            return
         
         # Final summary
         print("\n\n")
@@ -0,0 +1,258 @@
+"""
+Near-duplicate chunk removal with MinHash/LSH
+Chunks are reduced to shingles of selected log fields (timestamps, process
+IDs and ports that change between otherwise identical events are left out),
+signed with MinHash and looked up in a banded LSH index. A chunk whose
+estimated Jaccard similarity to an already kept chunk reaches the threshold
+is dropped, so each cluster of near-identical chunks (repeated svchost
+traffic, browser heartbeats) keeps only a few representatives.
+
+Chunks are processed as a stream. The LSH index holds at most
+max_representatives clusters; older clusters are forgotten first, so memory
+stays bounded on millions of chunks.
+"""
+
+import random
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from dedup import hash_bytes
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def get_field(log: Dict, path: Sequence[str]) -> Optional[str]:
+    """
+    Get a (possibly nested) field value as a string
+    
+    Args:
+        log: Log object
+        path: Field path split on dots, e.g. ('winlog', 'event_data', 'Image')
+    
+    Returns:
+        Value as string, or None if missing
+    """
+    value = log
+    for part in path:
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return None if value is None else str(value)
+
+
+def chunk_shingles(chunk: Dict, fields: Sequence[str]) -> Set[bytes]:
+    """
+    Shingles of a chunk: one per log (its selected fields) plus one per
+    pair of consecutive logs, so event order contributes to similarity
+    
+    Args:
+        chunk: Chunk object ({"metadata": ..., "logs": [...]})
+        fields: Dotted field paths that describe an event
+    
+    Returns:
+        Set of shingles (bytes)
+    """
+    paths = [(field, tuple(field.split('.'))) for field in fields]
+    events = []
+    for log in chunk.get('logs', []):
+        parts = []
+        for field, path in paths:
+            value = get_field(log, path)
+            if value is not None:
+                parts.append(f"{field}={value}")
+        events.append('|'.join(parts))
+    
+    shingles = {event.encode('utf-8') for event in events}
+    shingles.update(f"{a}>{b}".encode('utf-8') for a, b in zip(events, events[1:]))
+    return shingles
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Choose LSH bands/rows minimizing false positive + false negative area
+    
+    Args:
+        threshold: Jaccard similarity threshold
+        num_perm: Signature length
+    
+    Returns:
+        (bands, rows per band)
+    """
+    def area(f, lo: float, hi: float, steps: int = 100) -> float:
+        width = (hi - lo) / steps
+        return sum(f(lo + (i + 0.5) * width) for i in range(steps)) * width
+    
+    best, best_error = (1, num_perm), float('inf')
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = area(lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold)
+            false_negative = area(lambda s: (1 - s ** rows) ** bands, threshold, 1.0)
+            if false_positive + false_negative < best_error:
+                best, best_error = (bands, rows), false_positive + false_negative
+    return best
+
+
+class MinHasher:
+    """MinHash signatures over universal hash permutations"""
+    
+    def __init__(self, num_perm: int = 64, seed: int = 1, cache_size: int = 65_536):
+        """
+        Initialize the permutations
+        
+        Args:
+            num_perm: Signature length
+            seed: Random seed (signatures are comparable for the same seed)
+            cache_size: Shingles whose permuted hashes are cached (the same
+                        events recur across chunks); 8 * num_perm bytes each
+        """
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.cache_size = cache_size
+        self._permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._cache: Dict[bytes, array] = {}
+    
+    def _permuted(self, shingle: bytes) -> array:
+        """Hash values of a shingle under every permutation"""
+        values = self._cache.get(shingle)
+        if values is None:
+            h = hash_bytes(shingle)
+            values = array('Q', [(a * h + b) % _MERSENNE_PRIME for a, b in self._permutations])
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[shingle] = values
+        return values
+    
+    def signature(self, shingles: Iterable[bytes]) -> List[int]:
+        """
+        MinHash signature of a shingle set
+        
+        Args:
+            shingles: Shingles (bytes)
+        
+        Returns:
+            num_perm minimum hash values
+        """
+        columns = [self._permuted(shingle) for shingle in shingles] or [self._permuted(b'')]
+        return list(map(min, zip(*columns)))
+
+
+class NearDuplicateIndex:
+    """
+    Streaming LSH index over chunk signatures
+    
+    Each cluster keeps the low byte of its representative's signature
+    (b-bit MinHash) so LSH candidates are verified against the threshold
+    before a chunk is dropped. Clusters are held in two generations; when
+    the current one fills up, the older one is discarded.
+    """
+    
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64,
+                 keep_per_cluster: int = 1, max_representatives: int = 500_000):
+        """
+        Initialize the index
+        
+        Args:
+            threshold: Estimated Jaccard similarity at which chunks are near-duplicates
+            num_perm: MinHash signature length
+            keep_per_cluster: Chunks kept per cluster (the first ones seen)
+            max_representatives: Clusters remembered at most
+        """
+        self.threshold = threshold
+        self.keep_per_cluster = keep_per_cluster
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self.signature_length = self.bands * self.rows  # Permutations actually used
+        self._generation_size = max(1, max_representatives // 2)
+        self._current: Dict[int, list] = {}
+        self._previous: Dict[int, list] = {}
+        self._current_clusters = 0
+        self.clusters = 0
+    
+    def _band_keys(self, signature: List[int]) -> List[int]:
+        rows = self.rows
+        return [hash((band,) + tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+    
+    def _similarity(self, low_bytes: bytes, other: bytes) -> float:
+        """Estimated Jaccard similarity from two b-bit (8-bit) signatures"""
+        agree = sum(1 for x, y in zip(low_bytes, other) if x == y) / len(low_bytes)
+        return (agree - 1 / 256) / (1 - 1 / 256)
+    
+    def add(self, signature: List[int]) -> bool:
+        """
+        Add a chunk signature
+        
+        Args:
+            signature: MinHash signature
+        
+        Returns:
+            True if the chunk should be kept, False if it is a near-duplicate
+        """
+        keys = self._band_keys(signature)
+        low_bytes = bytes(value & 0xFF for value in signature)
+        
+        for key in keys:
+            cluster = self._current.get(key)
+            in_current = cluster is not None
+            if cluster is None:
+                cluster = self._previous.get(key)
+            if cluster is None or self._similarity(low_bytes, cluster[0]) < self.threshold:
+                continue
+            
+            # Keep active clusters in the current generation
+            if not in_current:
+                for other_key in keys:
+                    self._current.setdefault(other_key, cluster)
+            
+            if cluster[1] < self.keep_per_cluster:
+                cluster[1] += 1
+                return True
+            return False
+        
+        # New cluster: this chunk is its representative
+        cluster = [low_bytes, 1]
+        for key in keys:
+            self._current.setdefault(key, cluster)
+        self.clusters += 1
+        self._current_clusters += 1
+        if self._current_clusters >= self._generation_size:
+            self._previous = self._current
+            self._current = {}
+            self._current_clusters = 0
+        return True
+
+
+def iter_representative_chunks(chunks: Iterable[Dict], stats: Dict, fields: Sequence[str],
+                               threshold: float = 0.8, num_perm: int = 64,
+                               keep_per_cluster: int = 1,
+                               max_representatives: int = 500_000) -> Iterator[Dict]:
+    """
+    Stream chunks, dropping near-duplicates of chunks already kept
+    
+    Args:
+        chunks: Chunk objects (list or stream)
+        stats: Dict filled in while iterating with 'total', 'kept',
+               'near_duplicates' and 'clusters'
+        fields: Dotted log field paths used for shingles
+        threshold: Estimated Jaccard similarity at which chunks are near-duplicates
+        num_perm: Permutations available for the LSH bands
+        keep_per_cluster: Chunks kept per cluster
+        max_representatives: Clusters remembered at most
+    
+    Yields:
+        Kept chunks, in input order
+    """
+    index = NearDuplicateIndex(threshold, num_perm, keep_per_cluster, max_representatives)
+    hasher = MinHasher(index.signature_length)
+    for key in ('total', 'kept', 'near_duplicates'):
+        stats.setdefault(key, 0)
+    
+    for chunk in chunks:
+        stats['total'] += 1
+        if index.add(hasher.signature(chunk_shingles(chunk, fields))):
+            stats['kept'] += 1
+            yield chunk
+        else:
+            stats['near_duplicates'] += 1
+        stats['clusters'] = index.clusters
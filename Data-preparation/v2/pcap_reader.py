@@ -0,0 +1,572 @@
+"""
+Streaming PCAP/PCAPNG reader
+Reads capture records one at a time with struct (no scapy, no full-file
+load) and decodes the link, network and transport headers the log cleaners
+keep: Ether/Dot1Q/CookedLinux/Loopback, IP/IPv6/ARP, TCP/UDP/ICMP, then Raw
+and Padding.
+
+Layers and fields use scapy's names and string forms (e.g. IP flags 'DF',
+TCP flags 'PA', TCP options "[('MSS', 1460), ('NOP', None)]"), so the
+packet events match what the cleaners built from scapy packets.
+Application protocols scapy would dissect (DNS, NTP, ...) stay in Raw.
+
+Large captures can be decoded on a process pool: split_capture indexes the
+record offsets in one pass over the headers and cuts the file into byte
+ranges that are decoded independently and merged back in file order.
+
+Standard library only, so it can be shared with the log cleaners.
+"""
+
+import os
+import socket
+import struct
+import threading
+from datetime import datetime, timezone
+from multiprocessing import Pool
+from typing import BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+
+# Link-layer types (LINKTYPE_*)
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_ARP = 0x0806
+ETHERTYPE_VLAN = 0x8100
+ETHERTYPE_IPV6 = 0x86DD
+
+RANGE_BYTES = 4 * 1024 * 1024  # Bytes of capture per parallel decoding task
+PREFETCH_PER_WORKER = 2        # Ranges per worker decoded ahead of the consumer
+
+PCAP_MAGIC_MICRO = 0xA1B2C3D4
+PCAP_MAGIC_NANO = 0xA1B23C4D
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+PCAPNG_IDB = 1
+PCAPNG_OPB = 2
+PCAPNG_SPB = 3
+PCAPNG_EPB = 6
+
+IP_FLAG_NAMES = ['MF', 'DF', 'evil']
+TCP_FLAG_NAMES = 'FSRPAUECN'
+TCP_OPTION_NAMES = {0: 'EOL', 1: 'NOP', 2: 'MSS', 3: 'WScale', 4: 'SAckOK', 5: 'SAck', 8: 'Timestamp'}
+
+_ETHER = struct.Struct('!6s6sH')
+_DOT1Q = struct.Struct('!HH')
+_SLL = struct.Struct('!HHH8sH')
+_IPV4 = struct.Struct('!BBHHHBBH4s4s')
+_IPV6 = struct.Struct('!IHBB16s16s')
+_ARP = struct.Struct('!HHBBH')
+_TCP = struct.Struct('!HHIIBBHHH')
+_UDP = struct.Struct('!HHHH')
+_ICMP = struct.Struct('!BBH')
+_ICMP_ECHO = struct.Struct('!HH')
+
+T = TypeVar('T')
+
+
+class PcapRecord(NamedTuple):
+    """One captured packet"""
+    number: int                # 1-based packet number in the capture
+    time: Optional[float]      # Seconds since the epoch (None if the block has no timestamp)
+    linktype: int              # LINKTYPE_* of the packet's interface
+    data: bytes                # Captured bytes
+    wire_length: int           # Original length on the wire
+
+
+class Interface(NamedTuple):
+    """PCAPNG interface (or the single interface of a classic pcap)"""
+    linktype: int
+    snaplen: int
+    ts_divisor: float          # Timestamp units per second
+    ts_offset: int             # Seconds added to every timestamp
+
+
+# ============================================================================
+# CAPTURE RECORDS
+# ============================================================================
+
+class CaptureRange(NamedTuple):
+    """Byte range of a capture file holding whole packet records"""
+    path: str
+    start: int                 # Offset of the first record
+    end: int                   # Offset past the last record
+    first_number: int          # Packet number of the first packet in the range
+    pcapng: bool
+    endian: str                # struct byte order of the section
+    interfaces: Tuple[Interface, ...]  # Interfaces declared before the range
+
+
+def _pcap_blocks(f: BinaryIO, capture: CaptureRange, with_data: bool) -> Iterator[Tuple[int, str, Tuple[Interface, ...], Optional[tuple]]]:
+    record = struct.Struct(capture.endian + 'IIII')
+    interface = capture.interfaces[0]
+    position = capture.start
+    f.seek(position)
+    
+    while position < capture.end:
+        head = f.read(record.size)
+        if len(head) < record.size:
+            return
+        seconds, fraction, caplen, wirelen = record.unpack(head)
+        if position + record.size + caplen > capture.end:
+            return  # Truncated capture
+        if with_data:
+            packet = (seconds + fraction / interface.ts_divisor, interface.linktype, f.read(caplen), wirelen)
+        else:
+            f.seek(caplen, 1)
+            packet = None
+        yield position, capture.endian, capture.interfaces, packet
+        position += record.size + caplen
+
+
+def _idb_interface(body: bytes, endian: str) -> Interface:
+    linktype, _, snaplen = struct.unpack(endian + 'HHI', body[:8])
+    divisor, offset = 1_000_000, 0
+    position = 8
+    while position + 4 <= len(body):
+        code, length = struct.unpack(endian + 'HH', body[position:position + 4])
+        value = body[position + 4:position + 4 + length]
+        if code == 0:
+            break
+        if code == 9 and length >= 1:  # if_tsresol
+            resolution = value[0]
+            divisor = 2 ** (resolution & 0x7F) if resolution & 0x80 else 10 ** resolution
+        elif code == 14 and length >= 8:  # if_tsoffset
+            offset = struct.unpack(endian + 'q', value[:8])[0]
+        position += 4 + ((length + 3) & ~3)
+    return Interface(linktype, snaplen, divisor, offset)
+
+
+def _pcapng_blocks(f: BinaryIO, capture: CaptureRange, with_data: bool) -> Iterator[Tuple[int, str, Tuple[Interface, ...], Optional[tuple]]]:
+    endian, interfaces = capture.endian, capture.interfaces
+    position = capture.start
+    f.seek(position)
+    
+    while position < capture.end:
+        head = f.read(12)
+        if len(head) < 12:
+            return
+        if struct.unpack('<I', head[:4])[0] == PCAPNG_SHB:
+            endian = '<' if struct.unpack('<I', head[8:12])[0] == PCAPNG_BYTE_ORDER_MAGIC else '>'
+            interfaces = ()  # Interfaces are numbered per section
+        block_type, total_length = struct.unpack(endian + 'II', head[:8])
+        if total_length < 12 or position + total_length > capture.end:
+            return  # Corrupt or truncated capture
+        
+        if block_type in (PCAPNG_EPB, PCAPNG_OPB, PCAPNG_SPB) and not with_data:
+            f.seek(total_length - 12, 1)
+            yield position, endian, interfaces, None
+        else:
+            body = (head + f.read(total_length - 12))[8:total_length - 4]
+            if block_type == PCAPNG_IDB:
+                interfaces += (_idb_interface(body, endian),)
+            elif block_type in (PCAPNG_EPB, PCAPNG_OPB):
+                if block_type == PCAPNG_EPB:
+                    interface_id, high, low, caplen, wirelen = struct.unpack(endian + 'IIIII', body[:20])
+                else:
+                    interface_id, _, high, low, caplen, wirelen = struct.unpack(endian + 'HHIIII', body[:20])
+                interface = interfaces[interface_id]
+                timestamp = ((high << 32) | low) / interface.ts_divisor + interface.ts_offset
+                yield position, endian, interfaces, (timestamp, interface.linktype, body[20:20 + caplen], wirelen)
+            elif block_type == PCAPNG_SPB:
+                interface = interfaces[0]
+                wirelen = struct.unpack(endian + 'I', body[:4])[0]
+                caplen = min(wirelen, interface.snaplen or wirelen)
+                yield position, endian, interfaces, (None, interface.linktype, body[4:4 + caplen], wirelen)
+        position += total_length
+
+
+def capture_range(path) -> CaptureRange:
+    """
+    The whole of a capture file as one range
+    
+    Raises:
+        ValueError: If the file is neither pcap nor pcapng
+    """
+    with open(path, 'rb') as f:
+        header = f.read(24)
+    size = os.path.getsize(path)
+    if len(header) < 12:
+        raise ValueError(f"Not a pcap/pcapng file (too short): {path}")
+    
+    magic = struct.unpack('<I', header[:4])[0]
+    if magic == PCAPNG_SHB:
+        return CaptureRange(str(path), 0, size, 1, True, '<', ())
+    for endian in ('<', '>'):
+        magic = struct.unpack(endian + 'I', header[:4])[0]
+        if magic in (PCAP_MAGIC_MICRO, PCAP_MAGIC_NANO) and len(header) == 24:
+            snaplen, linktype = struct.unpack(endian + 'II', header[16:24])
+            divisor = 1_000_000_000 if magic == PCAP_MAGIC_NANO else 1_000_000
+            interface = Interface(linktype & 0x0FFFFFFF, snaplen, divisor, 0)
+            return CaptureRange(str(path), 24, size, 1, False, endian, (interface,))
+    raise ValueError(f"Not a pcap/pcapng file (magic {magic:#010x}): {path}")
+
+
+def split_capture(path, parts: int) -> List[CaptureRange]:
+    """
+    Split a capture into about `parts` byte ranges on packet record boundaries
+    
+    One pass over the record headers (packet data is skipped) finds the
+    record offsets, packet numbers and the pcapng interfaces in effect at
+    each split, so every range can be read on its own.
+    
+    Args:
+        path: Capture file
+        parts: Number of ranges wanted
+    
+    Returns:
+        Ranges in file order, covering every packet exactly once
+    """
+    whole = capture_range(path)
+    if parts <= 1:
+        return [whole]
+    
+    step = (whole.end - whole.start) / parts
+    ranges = []
+    current = whole
+    boundary = whole.start + step
+    blocks = _pcapng_blocks if whole.pcapng else _pcap_blocks
+    with open(path, 'rb') as f:
+        for number, (position, endian, interfaces, _) in enumerate(blocks(f, whole, False), 1):
+            if position >= boundary and number > current.first_number:
+                ranges.append(current._replace(end=position))
+                current = whole._replace(start=position, first_number=number, endian=endian, interfaces=interfaces)
+                boundary = position + step
+    ranges.append(current)
+    return ranges
+
+
+def iter_range_records(capture: CaptureRange) -> Iterator[PcapRecord]:
+    """
+    Stream the packets of one capture range
+    
+    Args:
+        capture: Range from capture_range or split_capture
+    
+    Yields:
+        PcapRecord per packet, in file order
+    """
+    blocks = _pcapng_blocks if capture.pcapng else _pcap_blocks
+    with open(capture.path, 'rb') as f:
+        for number, (_, _, _, packet) in enumerate(blocks(f, capture, True), capture.first_number):
+            yield PcapRecord(number, *packet)
+
+
+def iter_pcap_records(path) -> Iterator[PcapRecord]:
+    """
+    Stream the packets of a pcap or pcapng file
+    
+    Args:
+        path: Capture file
+    
+    Yields:
+        PcapRecord per packet, in file order
+    
+    Raises:
+        ValueError: If the file is neither pcap nor pcapng
+    """
+    return iter_range_records(capture_range(path))
+
+
+# ============================================================================
+# HEADER DECODING
+# ============================================================================
+
+def _mac(raw: bytes) -> str:
+    return ':'.join(f'{byte:02x}' for byte in raw)
+
+
+def _flags(value: int, names, separator: str) -> str:
+    """scapy FlagValue string: names of the set bits, lowest bit first"""
+    return separator.join(names[bit] for bit in range(len(names)) if value >> bit & 1)
+
+
+def _tcp_options(raw: bytes) -> str:
+    """scapy's string form of a TCP options list"""
+    options = []
+    position = 0
+    while position < len(raw):
+        kind = raw[position]
+        if kind in (0, 1):
+            options.append((TCP_OPTION_NAMES[kind], None))
+            position += 1
+            if kind == 0:
+                break
+            continue
+        if position + 1 >= len(raw) or raw[position + 1] < 2:
+            break
+        length = raw[position + 1]
+        value = raw[position + 2:position + length]
+        name = TCP_OPTION_NAMES.get(kind, kind)
+        if kind == 2 and len(value) == 2:
+            value = struct.unpack('!H', value)[0]
+        elif kind == 3 and len(value) == 1:
+            value = value[0]
+        elif kind == 5 and len(value) % 4 == 0:
+            value = struct.unpack(f'!{len(value) // 4}I', value)
+        elif kind == 8 and len(value) == 8:
+            value = struct.unpack('!II', value)
+        options.append((name, value))
+        position += length
+    return str(options)
+
+
+def _decode_transport(layers: Dict[str, Dict[str, str]], proto: int, payload: bytes) -> bytes:
+    """Decode a TCP/UDP/ICMP header into layers; returns the remaining payload"""
+    if proto == 6 and len(payload) >= _TCP.size:
+        sport, dport, seq, ack, offset, flags, window, chksum, urgptr = _TCP.unpack_from(payload)
+        dataofs = offset >> 4
+        header_length = max(dataofs * 4, _TCP.size)
+        layers['TCP'] = {
+            'sport': str(sport), 'dport': str(dport), 'seq': str(seq), 'ack': str(ack),
+            'dataofs': str(dataofs), 'reserved': str((offset >> 1) & 0x7),
+            'flags': _flags(((offset & 1) << 8) | flags, TCP_FLAG_NAMES, ''),
+            'window': str(window), 'chksum': str(chksum), 'urgptr': str(urgptr),
+            'options': _tcp_options(payload[_TCP.size:header_length])
+        }
+        return payload[header_length:]
+    if proto == 17 and len(payload) >= _UDP.size:
+        sport, dport, length, chksum = _UDP.unpack_from(payload)
+        layers['UDP'] = {'sport': str(sport), 'dport': str(dport), 'len': str(length), 'chksum': str(chksum)}
+        return payload[_UDP.size:]
+    if proto == 1 and len(payload) >= _ICMP.size:
+        icmp_type, code, chksum = _ICMP.unpack_from(payload)
+        layers['ICMP'] = {'type': str(icmp_type), 'code': str(code), 'chksum': str(chksum)}
+        if icmp_type in (0, 8) and len(payload) >= 8:  # Echo reply/request
+            identifier, sequence = _ICMP_ECHO.unpack_from(payload, 4)
+            layers['ICMP'].update({'id': str(identifier), 'seq': str(sequence)})
+        return payload[8:]
+    return payload
+
+
+def _decode_network(layers: Dict[str, Dict[str, str]], ethertype: int, payload: bytes) -> Tuple[bytes, bytes]:
+    """Decode an IP/IPv6/ARP header and what follows; returns (payload, padding)"""
+    if ethertype == ETHERTYPE_IPV4 and len(payload) >= _IPV4.size:
+        version_ihl, tos, total_length, ident, flags_frag, ttl, proto, chksum, src, dst = _IPV4.unpack_from(payload)
+        ihl = version_ihl & 0x0F
+        header_length = max(ihl * 4, _IPV4.size)
+        options = payload[_IPV4.size:header_length]
+        layers['IP'] = {
+            'version': str(version_ihl >> 4), 'ihl': str(ihl), 'tos': str(tos), 'len': str(total_length),
+            'id': str(ident), 'flags': _flags(flags_frag >> 13, IP_FLAG_NAMES, '+'), 'frag': str(flags_frag & 0x1FFF),
+            'ttl': str(ttl), 'proto': str(proto), 'chksum': str(chksum),
+            'src': socket.inet_ntoa(src), 'dst': socket.inet_ntoa(dst),
+            'options': str([options]) if options else '[]'
+        }
+        end = total_length if header_length <= total_length <= len(payload) else len(payload)
+        if flags_frag & 0x1FFF:
+            return payload[header_length:end], payload[end:]  # Non-first fragment: no transport header
+        return _decode_transport(layers, proto, payload[header_length:end]), payload[end:]
+    
+    if ethertype == ETHERTYPE_IPV6 and len(payload) >= _IPV6.size:
+        word, plen, nh, hlim, src, dst = _IPV6.unpack_from(payload)
+        layers['IPv6'] = {
+            'version': str(word >> 28), 'tc': str((word >> 20) & 0xFF), 'fl': str(word & 0xFFFFF),
+            'plen': str(plen), 'nh': str(nh), 'hlim': str(hlim),
+            'src': socket.inet_ntop(socket.AF_INET6, src), 'dst': socket.inet_ntop(socket.AF_INET6, dst)
+        }
+        end = _IPV6.size + plen if _IPV6.size + plen <= len(payload) else len(payload)
+        return _decode_transport(layers, nh, payload[_IPV6.size:end]), payload[end:]
+    
+    if ethertype == ETHERTYPE_ARP and len(payload) >= _ARP.size:
+        hwtype, ptype, hwlen, plen, op = _ARP.unpack_from(payload)
+        position = _ARP.size
+        hwsrc = payload[position:position + hwlen]
+        psrc = payload[position + hwlen:position + hwlen + plen]
+        hwdst = payload[position + hwlen + plen:position + 2 * hwlen + plen]
+        pdst = payload[position + 2 * hwlen + plen:position + 2 * (hwlen + plen)]
+        ip = socket.inet_ntoa if plen == 4 else (lambda raw: str(raw))
+        layers['ARP'] = {
+            'hwtype': str(hwtype), 'ptype': str(ptype), 'hwlen': str(hwlen), 'plen': str(plen), 'op': str(op),
+            'hwsrc': _mac(hwsrc), 'psrc': ip(psrc) if len(psrc) == plen else '',
+            'hwdst': _mac(hwdst), 'pdst': ip(pdst) if len(pdst) == plen else ''
+        }
+        end = position + 2 * (hwlen + plen)
+        return b'', payload[end:]
+    
+    return payload, b''
+
+
+def decode_layers(data: bytes, linktype: int) -> Dict[str, Dict[str, str]]:
+    """
+    Decode a packet's headers
+    
+    Args:
+        data: Captured bytes
+        linktype: LINKTYPE_* of the packet's interface
+    
+    Returns:
+        Layer name -> {field: string value}, outermost first (scapy names);
+        undecoded bytes end up in 'Raw' (payload) and 'Padding' (link trailer)
+    """
+    layers: Dict[str, Dict[str, str]] = {}
+    ethertype = None
+    payload = data
+    
+    if linktype == LINKTYPE_ETHERNET and len(data) >= _ETHER.size:
+        dst, src, ethertype = _ETHER.unpack_from(data)
+        layers['Ether'] = {'dst': _mac(dst), 'src': _mac(src), 'type': str(ethertype)}
+        payload = data[_ETHER.size:]
+        while ethertype == ETHERTYPE_VLAN and len(payload) >= _DOT1Q.size:
+            tci, ethertype = _DOT1Q.unpack_from(payload)
+            layers['Dot1Q'] = {'prio': str(tci >> 13), 'dei': str((tci >> 12) & 1), 'vlan': str(tci & 0x0FFF),
+                               'type': str(ethertype)}
+            payload = payload[_DOT1Q.size:]
+    elif linktype == LINKTYPE_LINUX_SLL and len(data) >= _SLL.size:
+        pkttype, lladdrtype, lladdrlen, src, ethertype = _SLL.unpack_from(data)
+        layers['CookedLinux'] = {'pkttype': str(pkttype), 'lladdrtype': str(lladdrtype),
+                                 'lladdrlen': str(lladdrlen), 'src': str(src), 'proto': str(ethertype)}
+        payload = data[_SLL.size:]
+    elif linktype == LINKTYPE_NULL and len(data) >= 4:
+        family = struct.unpack('<I', data[:4])[0]
+        if family > 0xFFFF:
+            family = struct.unpack('>I', data[:4])[0]
+        layers['Loopback'] = {'type': str(family)}
+        ethertype = ETHERTYPE_IPV4 if family == 2 else ETHERTYPE_IPV6 if family in (24, 28, 30) else None
+        payload = data[4:]
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6) and data:
+        ethertype = ETHERTYPE_IPV4 if data[0] >> 4 == 4 else ETHERTYPE_IPV6 if data[0] >> 4 == 6 else None
+    
+    padding = b''
+    if ethertype is not None:
+        payload, padding = _decode_network(layers, ethertype, payload)
+    if payload:
+        layers['Raw'] = {'load': str(payload)}
+    if padding:
+        layers['Padding'] = {'load': str(padding)}
+    return layers
+
+
+def summarize_layers(layers: Dict[str, Dict[str, str]]) -> str:
+    """
+    One-line packet summary, in the style of scapy's summary()
+    
+    Example: "Ether / IP / TCP 10.0.0.2:50000 > 1.2.3.4:80 PA / Raw"
+    """
+    parts = []
+    ip = layers.get('IP') or layers.get('IPv6')
+    for name in layers:
+        if name in ('TCP', 'UDP') and ip:
+            fields = layers[name]
+            part = f"{name} {ip['src']}:{fields['sport']} > {ip['dst']}:{fields['dport']}"
+            parts.append(part + (f" {fields['flags']}" if name == 'TCP' else ''))
+        elif name == 'ICMP' and ip:
+            fields = layers[name]
+            parts.append(f"ICMP {ip['src']} > {ip['dst']} type {fields['type']} code {fields['code']}")
+        elif name == 'ARP':
+            fields = layers[name]
+            action = 'who has' if fields['op'] == '1' else 'is at'
+            parts.append(f"ARP {action} {fields['pdst']} says {fields['psrc']}")
+        else:
+            parts.append(name)
+    return ' / '.join(parts)
+
+
+def format_timestamp(seconds: Optional[float]) -> Optional[str]:
+    """Packet time as ISO 8601 UTC with milliseconds (as the log cleaners write it)"""
+    if seconds is None:
+        return None
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def packet_event(record: PcapRecord, layers: Optional[Dict[str, Dict[str, str]]] = None) -> Dict:
+    """
+    Network event of a packet, in the log cleaners' packet format
+    
+    Args:
+        record: Capture record
+        layers: Decoded layers (decoded from the record if not given)
+    
+    Returns:
+        Dict with timestamp, event_type, packet_number, length, summary, raw_hex ('') and layers
+    """
+    if layers is None:
+        layers = decode_layers(record.data, record.linktype)
+    return {
+        'timestamp': format_timestamp(record.time),
+        'event_type': 'network',
+        'packet_number': record.number,
+        'length': len(record.data),
+        'summary': summarize_layers(layers),
+        'raw_hex': '',
+        'layers': layers
+    }
+
+
+def decode_range(capture: CaptureRange) -> List[Dict]:
+    """Pool task: packet events of one capture range"""
+    return [packet_event(record) for record in iter_range_records(capture)]
+
+
+def map_capture_ranges(path, task: Callable[[CaptureRange], T], num_workers: int,
+                       range_bytes: int = RANGE_BYTES) -> Iterator[T]:
+    """
+    Run a task over the byte ranges of a capture on a process pool
+    
+    Ranges are fed to the pool from one lazy iterator with at most
+    PREFETCH_PER_WORKER ranges per worker in flight or waiting to be
+    consumed, so workers stay busy while memory is bounded by about
+    (PREFETCH_PER_WORKER x num_workers + 1) task results of range_bytes of
+    capture each.
+    
+    Args:
+        path: pcap or pcapng file
+        task: Picklable function of one CaptureRange (e.g. decode_range)
+        num_workers: Worker processes
+        range_bytes: Approximate size of each range
+    
+    Yields:
+        Task results in file order
+    """
+    ranges = split_capture(path, max(num_workers, -(-os.path.getsize(path) // range_bytes)))
+    if num_workers <= 1 or len(ranges) == 1:
+        yield from map(task, ranges)
+        return
+    
+    slots = threading.Semaphore(PREFETCH_PER_WORKER * num_workers)
+    stopped = threading.Event()
+    
+    def feed() -> Iterator[CaptureRange]:
+        # Runs on the pool's task thread: blocks until a result has been consumed
+        for capture in ranges:
+            slots.acquire()
+            if stopped.is_set():
+                return
+            yield capture
+    
+    with Pool(num_workers) as pool:
+        try:
+            for result in pool.imap(task, feed()):
+                yield result
+                slots.release()
+        finally:
+            stopped.set()
+            slots.release()  # Unblock the feeder if the consumer stopped early
+
+
+def iter_packet_events(path, num_workers: int = 1, range_bytes: int = RANGE_BYTES) -> Iterator[Dict]:
+    """
+    Stream the network events of a capture file
+    
+    With several workers the byte ranges are decoded on a process pool
+    (map_capture_ranges) and merged back in file order, so the events are
+    the same as a serial read.
+    
+    Args:
+        path: pcap or pcapng file
+        num_workers: Worker processes (1 = decode serially, constant memory)
+        range_bytes: Approximate size of each range decoded by a worker
+    
+    Yields:
+        Packet events (see packet_event), in file order
+    """
+    if num_workers <= 1:
+        for record in iter_pcap_records(path):
+            yield packet_event(record)
+        return
+    
+    for events in map_capture_ranges(path, decode_range, num_workers, range_bytes):
+        yield from events
@@ -8,10 +8,20 @@ from analyzers.base_analyzer import BaseAnalyzer
 from analyzers.process_analyzer import ProcessAnalyzer
 from analyzers.network_analyzer import NetworkAnalyzer
 from analyzers.file_analyzer import FileAnalyzer
+from analyzers.registry import AnalyzerRegistry, create_default_registry
+from analyzers.preprocess import preprocess_log
+from analyzers.chain_correlator import ChainCorrelator, timestamp_to_epoch
+from analyzers.rate_tracker import RateTracker
 
 __all__ = [
     'BaseAnalyzer',
     'ProcessAnalyzer',
     'NetworkAnalyzer',
     'FileAnalyzer',
+    'AnalyzerRegistry',
+    'create_default_registry',
+    'preprocess_log',
+    'ChainCorrelator',
+    'timestamp_to_epoch',
+    'RateTracker',
 ]
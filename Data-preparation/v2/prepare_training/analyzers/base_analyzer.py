@@ -5,13 +5,16 @@ All analyzers should implement this interface.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from models.analysis_result import EventAnalysis
 
 
 class BaseAnalyzer(ABC):
     """Abstract base class for event analyzers."""
     
+    # Event IDs this analyzer handles (used by AnalyzerRegistry for dispatch)
+    SUPPORTED_EVENT_IDS: List[int] = []
+    
     @abstractmethod
     def analyze(self, event: Dict[str, Any]) -> EventAnalysis:
         """
@@ -25,7 +28,6 @@ class BaseAnalyzer(ABC):
         """
         pass
     
-    @abstractmethod
     def can_analyze(self, event: Dict[str, Any]) -> bool:
         """
         Check if this analyzer can handle the given event.
@@ -36,7 +38,27 @@ class BaseAnalyzer(ABC):
         Returns:
             True if analyzer can process this event type
         """
-        pass
+        return self.get_event_id(event) in self.SUPPORTED_EVENT_IDS
+    
+    @staticmethod
+    def get_event_id(event: Dict[str, Any]) -> Optional[int]:
+        """
+        Resolve the numeric event ID ('event_id', falling back to 'EventID').
+        
+        Args:
+            event: Log event dictionary
+            
+        Returns:
+            Event ID as int, or None if missing/not numeric
+        """
+        event_id = event.get('event_id')
+        if not event_id:
+            event_id = event.get('EventID')
+        
+        try:
+            return int(event_id)
+        except (ValueError, TypeError):
+            return None
     
     def get_field_value(self, event: Dict[str, Any], field: str, default: Any = "") -> Any:
         """
@@ -0,0 +1,258 @@
+"""
+Streaming attack chain correlation.
+
+Matches the declared ATTACK_CHAIN_PATTERNS against time-ordered event
+analyses: each pattern's steps must occur in sequence order, all within the
+pattern's time_window_sec. Steps are defined in CHAIN_STEPS.
+
+State is kept per session, not per chunk, so a chain whose steps fall in
+different chunks of a session is still found. Per session and pattern, the
+correlator only remembers the most recent partial match that reached each
+step, so each event costs O(patterns x steps) and memory does not grow with
+the number of events.
+"""
+
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from models.analysis_result import ChainMatch, EventAnalysis
+from rules import suspicious_patterns
+
+# Partial match: (start epoch, start timestamp, epoch the last step completed, timestamp per completed step)
+Partial = Tuple[float, str, float, Tuple[str, ...]]
+
+
+def timestamp_to_epoch(timestamp: str) -> Optional[float]:
+    """
+    Parse an ISO 8601 timestamp to seconds since the epoch.
+    
+    Args:
+        timestamp: Timestamp string (timestamps without an offset are taken as UTC)
+    
+    Returns:
+        Seconds since the epoch, or None if the timestamp can't be parsed
+    """
+    if not timestamp:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(timestamp).strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _has_technique(techniques: List[str], prefixes: List[str]) -> bool:
+    """Whether any technique equals a prefix or is one of its sub-techniques."""
+    return any(technique == prefix or technique.startswith(prefix + '.')
+               for technique in techniques for prefix in prefixes)
+
+
+class _PatternState:
+    """Progress of one pattern within one session."""
+    
+    __slots__ = ('partials', 'counts')
+    
+    def __init__(self, length: int, min_counts: Dict[int, int]):
+        # partials[k]: latest-starting partial match that completed steps 0..k-1
+        self.partials: List[Optional[Partial]] = [None] * length
+        # Recent matching events (epoch, timestamp) of steps that need min_count events
+        self.counts: Dict[int, Deque[Tuple[float, str]]] = {
+            position: deque(maxlen=count) for position, count in min_counts.items()
+        }
+    
+    def reset(self):
+        self.partials = [None] * len(self.partials)
+        for count in self.counts.values():
+            count.clear()
+
+
+class ChainCorrelator:
+    """
+    Per-session state machines over time-ordered event analyses.
+    
+    Usage:
+        correlator = ChainCorrelator()
+        for analysis in analyses:            # In timestamp order
+            for match in correlator.observe(session_id, analysis):
+                ...
+    """
+    
+    def __init__(self, patterns: List[Dict[str, any]] = None, steps: Dict[str, Dict[str, any]] = None):
+        """
+        Compile the patterns.
+        
+        Args:
+            patterns: Attack chain patterns (default: ATTACK_CHAIN_PATTERNS)
+            steps: Step name -> match rule (default: CHAIN_STEPS)
+        
+        Raises:
+            ValueError: If a pattern uses a step without a match rule
+        """
+        self.patterns = list(patterns if patterns is not None else suspicious_patterns.ATTACK_CHAIN_PATTERNS)
+        self.steps = steps if steps is not None else suspicious_patterns.CHAIN_STEPS
+        
+        # Step name -> [(pattern index, position in its sequence)]
+        self._positions: Dict[str, List[Tuple[int, int]]] = {}
+        self._min_counts: List[Dict[int, int]] = []
+        for index, pattern in enumerate(self.patterns):
+            min_counts = {}
+            for position, step in enumerate(pattern['sequence']):
+                if step not in self.steps:
+                    raise ValueError(f"Attack chain '{pattern['name']}' uses undefined step: {step}")
+                self._positions.setdefault(step, []).append((index, position))
+                if self.steps[step].get('min_count', 1) > 1:
+                    min_counts[position] = self.steps[step]['min_count']
+            self._min_counts.append(min_counts)
+        
+        self._sessions: Dict[str, List[_PatternState]] = {}
+    
+    def match_steps(self, event: EventAnalysis) -> Set[str]:
+        """
+        Steps an event matches.
+        
+        Args:
+            event: Analyzed event
+        
+        Returns:
+            Set of step names
+        """
+        matched = set()
+        for step, rule in self.steps.items():
+            if 'event_types' in rule and event.event_type not in rule['event_types']:
+                continue
+            if rule.get('requires_indicators') and not event.indicators:
+                continue
+            if 'techniques' in rule and not _has_technique(event.mitre_techniques, rule['techniques']):
+                continue
+            matched.add(step)
+        return matched
+    
+    def observe(self, session_id: str, event: EventAnalysis) -> List[ChainMatch]:
+        """
+        Feed the next event of a session.
+        
+        Events must arrive in timestamp order within a session; an event
+        older than a partial match's last step does not advance it. Events
+        without a parseable timestamp are ignored.
+        
+        Args:
+            session_id: Session the event belongs to
+            event: Analyzed event
+        
+        Returns:
+            Chains completed by this event
+        """
+        steps = self.match_steps(event)
+        if not steps:
+            return []
+        epoch = timestamp_to_epoch(event.timestamp)
+        if epoch is None:
+            return []
+        
+        states = self._sessions.get(session_id)
+        if states is None:
+            states = self._sessions[session_id] = [
+                _PatternState(len(pattern['sequence']), min_counts)
+                for pattern, min_counts in zip(self.patterns, self._min_counts)
+            ]
+        
+        positions: Dict[int, List[int]] = {}
+        for step in steps:
+            for index, position in self._positions.get(step, []):
+                positions.setdefault(index, []).append(position)
+        
+        matches = []
+        for index, pattern_positions in positions.items():
+            match = self._advance(session_id, index, states[index], pattern_positions, epoch, event.timestamp)
+            if match is not None:
+                matches.append(match)
+        return matches
+    
+    def _advance(self, session_id: str, index: int, state: _PatternState, positions: List[int],
+                 epoch: float, timestamp: str) -> Optional[ChainMatch]:
+        pattern = self.patterns[index]
+        window = pattern['time_window_sec']
+        last = len(pattern['sequence']) - 1
+        
+        # Latest step first, so one event never completes two consecutive steps
+        for position in sorted(positions, reverse=True):
+            if position == 0:
+                start, start_time, reached, times = epoch, timestamp, float('-inf'), ()
+            else:
+                partial = state.partials[position]
+                if partial is None:
+                    continue
+                start, start_time, reached, times = partial
+                if epoch - start > window:
+                    state.partials[position] = None
+                    continue
+                if epoch < reached:
+                    continue
+            
+            count = state.counts.get(position)
+            if count is not None:
+                count.append((epoch, timestamp))
+                first_epoch, first_time = count[0]
+                if len(count) < count.maxlen or first_epoch < reached or epoch - first_epoch > window:
+                    continue
+                if position == 0:
+                    start, start_time = first_epoch, first_time
+            
+            completed = (start, start_time, epoch, times + (timestamp,))
+            if position == last:
+                state.reset()
+                return ChainMatch(
+                    name=pattern['name'],
+                    description=pattern.get('description', ''),
+                    session_id=session_id,
+                    start_time=start_time,
+                    end_time=timestamp,
+                    mitre_techniques=list(pattern.get('mitre_techniques', [])),
+                    step_times=list(completed[3])
+                )
+            
+            # Keep the partial that started last: it has the most of its window left
+            existing = state.partials[position + 1]
+            if existing is None or start >= existing[0]:
+                state.partials[position + 1] = completed
+        return None
+    
+    def observe_all(self, session_id: str, events: Iterable[EventAnalysis]) -> List[ChainMatch]:
+        """
+        Feed several events of a session, in order.
+        
+        Returns:
+            Chains completed by these events, in completion order
+        """
+        matches = []
+        for event in events:
+            matches.extend(self.observe(session_id, event))
+        return matches
+    
+    def correlate(self, events: Iterable[EventAnalysis], session_id: str = '') -> List[ChainMatch]:
+        """
+        Chains within one sequence of events (e.g. one chunk), from a clean state.
+        
+        Args:
+            events: Analyzed events in timestamp order
+            session_id: Session recorded in the matches (its state is discarded afterwards)
+        
+        Returns:
+            Chains completed within the events
+        """
+        self.end_session(session_id)
+        try:
+            return self.observe_all(session_id, events)
+        finally:
+            self.end_session(session_id)
+    
+    def end_session(self, session_id: str):
+        """Forget a session's partial matches."""
+        self._sessions.pop(session_id, None)
+    
+    def reset(self):
+        """Forget all sessions."""
+        self._sessions.clear()
@@ -17,17 +17,6 @@ class NetworkAnalyzer(BaseAnalyzer):
     # Event IDs this analyzer handles
     SUPPORTED_EVENT_IDS = [3, 5156, 5157]
     
-    def can_analyze(self, event: Dict[str, Any]) -> bool:
-        """Check if event is a network connection event."""
-        event_id = self.get_field_value(event, 'event_id')
-        if not event_id:
-            event_id = self.get_field_value(event, 'EventID')
-        
-        try:
-            return int(event_id) in self.SUPPORTED_EVENT_IDS
-        except (ValueError, TypeError):
-            return False
-    
     def analyze(self, event: Dict[str, Any]) -> EventAnalysis:
         """Analyze network connection event."""
         # Extract event metadata
@@ -0,0 +1,94 @@
+"""
+Log preprocessing for the analyzers.
+
+Flattens the pipeline's nested log structure (winlog.event_data, layers.IP,
+layers.TCP) into the top-level fields the analyzers read. Shared by training
+data generation and the backend.
+"""
+
+from typing import Dict
+
+
+def preprocess_log(log: Dict) -> Dict:
+    """
+    Flatten nested log structure to match analyzer expectations.
+    
+    Converts:
+    - winlog.event_data.* -> top-level fields
+    - winlog.event_id -> event_id/EventID
+    - layers.IP.* and layers.TCP.* -> top-level fields
+    
+    Args:
+        log: Original log with nested structure
+        
+    Returns:
+        Flattened log dict
+    """
+    flat_log = log.copy()
+    
+    # Flatten winlog structure (system events)
+    if 'winlog' in log:
+        winlog = log['winlog']
+        
+        # Safety check: winlog should be a dict
+        if not isinstance(winlog, dict):
+            return flat_log
+        
+        # Copy event_id to top level
+        if 'event_id' in winlog:
+            flat_log['event_id'] = winlog['event_id']
+            flat_log['EventID'] = winlog['event_id']
+        
+        # Flatten event_data fields
+        if 'event_data' in winlog:
+            event_data = winlog['event_data']
+            # Check if event_data is a dict (sometimes it could be a list)
+            if isinstance(event_data, dict):
+                for key, value in event_data.items():
+                    if key not in flat_log:  # Don't overwrite existing
+                        flat_log[key] = value
+    
+    # Flatten network layers (network events)
+    if 'layers' in log:
+        layers = log['layers']
+        
+        # Safety check: layers should be a dict
+        if not isinstance(layers, dict):
+            return flat_log
+        
+        # Flatten IP layer
+        if 'IP' in layers:
+            ip_data = layers['IP']
+            if isinstance(ip_data, dict):
+                flat_log['SourceIp'] = ip_data.get('src', '')
+                flat_log['SourceIP'] = ip_data.get('src', '')
+                flat_log['DestinationIp'] = ip_data.get('dst', '')
+                flat_log['DestIP'] = ip_data.get('dst', '')
+                flat_log['DestinationAddress'] = ip_data.get('dst', '')
+        
+        # Flatten TCP layer
+        if 'TCP' in layers:
+            tcp_data = layers['TCP']
+            if isinstance(tcp_data, dict):
+                flat_log['SourcePort'] = tcp_data.get('sport', '')
+                flat_log['DestinationPort'] = tcp_data.get('dport', '')
+                flat_log['DestPort'] = tcp_data.get('dport', '')
+                flat_log['tcp_flags'] = tcp_data.get('flags', '')
+        
+        # Add packet size from length field
+        if 'length' in log:
+            flat_log['packet_size'] = log['length']
+    
+    # Guess event_id for network events (they don't have one by default)
+    if 'event_type' in log and log['event_type'] == 'network':
+        if 'event_id' not in flat_log:
+            flat_log['event_id'] = 3  # Sysmon network connection
+            flat_log['EventID'] = 3
+    elif 'event_type' in log and log['event_type'] == 'system':
+        if 'event_id' not in flat_log and 'EventID' not in flat_log:
+            # Try to infer from Image field
+            if 'Image' in flat_log:
+                flat_log['event_id'] = 1  # Sysmon process creation
+                flat_log['EventID'] = 1
+    
+    return flat_log
@@ -16,17 +16,6 @@ class ProcessAnalyzer(BaseAnalyzer):
     # Event IDs this analyzer handles
     SUPPORTED_EVENT_IDS = [1, 4688]
     
-    def can_analyze(self, event: Dict[str, Any]) -> bool:
-        """Check if event is a process creation event."""
-        event_id = self.get_field_value(event, 'event_id')
-        if not event_id:
-            event_id = self.get_field_value(event, 'EventID')
-        
-        try:
-            return int(event_id) in self.SUPPORTED_EVENT_IDS
-        except (ValueError, TypeError):
-            return False
-    
     def analyze(self, event: Dict[str, Any]) -> EventAnalysis:
         """Analyze process creation event."""
         # Extract event metadata
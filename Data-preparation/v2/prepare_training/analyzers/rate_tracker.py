@@ -0,0 +1,258 @@
+"""
+Rate-based indicators over time-ordered events.
+
+The analyzers look at one event at a time, so the mass-operation thresholds
+in RANSOMWARE_INDICATORS and the periodicity of C2_INDICATORS'
+small_periodic_packets need state across events. RateTracker keeps it:
+
+- Sliding-window counters per (session, process) for file creation,
+  deletion and all file I/O
+- Inter-arrival statistics per (session, source, destination, port) flow,
+  flagging flows whose packets arrive at regular intervals
+
+Events are fed in timestamp order; each costs O(1) amortized (every
+timestamp enters and leaves a window once, and interval statistics are
+kept as running sums over a bounded history).
+"""
+
+from collections import deque
+from math import sqrt
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from analyzers.chain_correlator import timestamp_to_epoch
+from models.analysis_result import EventAnalysis, SeverityLevel
+from rules import suspicious_patterns
+
+FILE_CREATE_EVENT_IDS = {11}
+FILE_DELETE_EVENT_IDS = {23, 26}
+
+
+class SlidingWindowCounter:
+    """Number of events within the last window_sec seconds."""
+    
+    __slots__ = ('window', 'times')
+    
+    def __init__(self, window_sec: float):
+        self.window = window_sec
+        self.times: Deque[float] = deque()
+    
+    def add(self, epoch: float) -> int:
+        """
+        Count an event (timestamps must not decrease).
+        
+        Returns:
+            Events in the window ending at this event, including it
+        """
+        times = self.times
+        times.append(epoch)
+        while epoch - times[0] > self.window:
+            times.popleft()
+        return len(times)
+
+
+class IntervalStats:
+    """Mean and jitter of the last few inter-arrival times of a flow."""
+    
+    __slots__ = ('history', 'last', 'intervals', 'total', 'total_sq')
+    
+    def __init__(self, history: int):
+        self.history = history
+        self.last: Optional[float] = None
+        self.intervals: Deque[float] = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+    
+    def add(self, epoch: float) -> Tuple[int, float, float]:
+        """
+        Record an arrival.
+        
+        Returns:
+            (intervals in the history, mean interval, stdev / mean)
+        """
+        if self.last is not None:
+            interval = epoch - self.last
+            self.intervals.append(interval)
+            self.total += interval
+            self.total_sq += interval * interval
+            if len(self.intervals) > self.history:
+                dropped = self.intervals.popleft()
+                self.total -= dropped
+                self.total_sq -= dropped * dropped
+        self.last = epoch
+        
+        count = len(self.intervals)
+        if count == 0:
+            return 0, 0.0, 0.0
+        mean = self.total / count
+        if mean <= 0:
+            return count, 0.0, 0.0
+        variance = max(0.0, self.total_sq / count - mean * mean)
+        return count, mean, sqrt(variance) / mean
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _SessionState:
+    """Counters and flows of one session."""
+    
+    __slots__ = ('processes', 'flows')
+    
+    def __init__(self):
+        # (process, rule name) -> counter
+        self.processes: Dict[Tuple[str, str], SlidingWindowCounter] = {}
+        # (source, destination, port) -> interval statistics
+        self.flows: Dict[Tuple[str, str, str], IntervalStats] = {}
+
+
+class RateTracker:
+    """
+    Per-session rate and periodicity state over analyzed events.
+    
+    Usage:
+        tracker = RateTracker()
+        for flat_log, analysis in events:     # In timestamp order
+            tracker.observe(session_id, flat_log, analysis)
+    """
+    
+    # File rules: RANSOMWARE_INDICATORS key -> (event IDs counted (None = all file events), indicator, severity)
+    FILE_RULES = [
+        ('mass_file_creation', FILE_CREATE_EVENT_IDS, "Mass file creation", SeverityLevel.CRITICAL),
+        ('mass_file_deletion', FILE_DELETE_EVENT_IDS, "Mass file deletion", SeverityLevel.CRITICAL),
+        ('high_io_burst', None, "High file I/O burst", SeverityLevel.HIGH),
+    ]
+    
+    def __init__(self, ransomware_indicators: Dict[str, any] = None, c2_indicators: Dict[str, Dict[str, any]] = None):
+        """
+        Read thresholds from the rules.
+        
+        Args:
+            ransomware_indicators: Mass-operation thresholds (default: RANSOMWARE_INDICATORS)
+            c2_indicators: Beaconing parameters (default: C2_INDICATORS)
+        """
+        self.ransomware = ransomware_indicators if ransomware_indicators is not None else suspicious_patterns.RANSOMWARE_INDICATORS
+        self.beacon = (c2_indicators if c2_indicators is not None else suspicious_patterns.C2_INDICATORS)['small_periodic_packets']
+        self._sessions: Dict[str, _SessionState] = {}
+    
+    def observe(self, session_id: str, event: Dict[str, any], analysis: EventAnalysis) -> List[str]:
+        """
+        Feed the next event of a session.
+        
+        Rate indicators found are added to the analysis (indicators, MITRE
+        techniques and severity). Events without a parseable timestamp are
+        ignored.
+        
+        Args:
+            session_id: Session the event belongs to
+            event: Flattened log event (see preprocess_log)
+            analysis: The event's analysis (updated in place)
+        
+        Returns:
+            Rate indicators added for this event
+        """
+        if analysis.event_type not in ('File', 'Network'):
+            return []
+        epoch = timestamp_to_epoch(analysis.timestamp)
+        if epoch is None:
+            return []
+        
+        state = self._sessions.get(session_id)
+        if state is None:
+            state = self._sessions[session_id] = _SessionState()
+        
+        if analysis.event_type == 'File':
+            found = self._observe_file(state, event, epoch)
+        else:
+            found = self._observe_network(state, event, epoch)
+        
+        added = []
+        for indicator, techniques, severity in found:
+            if indicator not in analysis.indicators:
+                analysis.indicators.append(indicator)
+                added.append(indicator)
+            for technique in techniques:
+                if technique not in analysis.mitre_techniques:
+                    analysis.mitre_techniques.append(technique)
+            analysis.severity = max(analysis.severity, severity)
+        return added
+    
+    def _observe_file(self, state: _SessionState, event: Dict[str, any], epoch: float) -> List[Tuple[str, List[str], SeverityLevel]]:
+        image = str(event.get('Image') or '')
+        process_name = image.split('\\')[-1].lower() if image else 'unknown'
+        event_id = _as_int(event.get('event_id', event.get('EventID')))
+        
+        found = []
+        for name, event_ids, label, severity in self.FILE_RULES:
+            if event_ids is not None and event_id not in event_ids:
+                continue
+            rule = self.ransomware[name]
+            counter = state.processes.get((process_name, name))
+            if counter is None:
+                counter = state.processes[(process_name, name)] = SlidingWindowCounter(rule['window_sec'])
+            if counter.add(epoch) >= rule['threshold']:
+                indicator = f"{label} by {process_name}: {rule['threshold']}+ file events within {rule['window_sec']}s"
+                found.append((indicator, rule['techniques'], severity))
+        return found
+    
+    def _observe_network(self, state: _SessionState, event: Dict[str, any], epoch: float) -> List[Tuple[str, List[str], SeverityLevel]]:
+        beacon = self.beacon
+        packet_size = _as_int(event.get('packet_size'))
+        if packet_size is not None and not beacon['min_size'] <= packet_size <= beacon['max_size']:
+            return []  # Bulk traffic in the flow doesn't count as a beacon
+        
+        source = str(event.get('SourceIp') or '')
+        destination = str(event.get('DestinationIp') or event.get('DestAddress') or '')
+        port = str(event.get('DestinationPort') or event.get('DestPort') or '')
+        if not destination:
+            return []
+        
+        flow = state.flows.get((source, destination, port))
+        if flow is None:
+            flow = state.flows[(source, destination, port)] = IntervalStats(beacon['min_beacons'] - 1)
+        count, mean, jitter = flow.add(epoch)
+        if count < beacon['min_beacons'] - 1 or mean < beacon['min_interval_sec'] or jitter > beacon['max_jitter']:
+            return []
+        
+        indicator = f"Periodic beaconing to {destination}:{port} - small packets at regular intervals (C2)"
+        return [(indicator, beacon['techniques'], SeverityLevel.HIGH)]
+    
+    def observe_all(self, session_id: str, events: Iterable[Tuple[Dict[str, any], EventAnalysis]]) -> List[str]:
+        """
+        Feed several (flattened event, analysis) pairs of a session, in order.
+        
+        Returns:
+            Rate indicators added, in order
+        """
+        added = []
+        for event, analysis in events:
+            added.extend(self.observe(session_id, event, analysis))
+        return added
+    
+    def track(self, events: Iterable[Tuple[Dict[str, any], EventAnalysis]], session_id: str = '') -> List[str]:
+        """
+        Rate indicators within one sequence of events (e.g. one chunk), from a clean state.
+        
+        Args:
+            events: (flattened event, analysis) pairs in timestamp order
+            session_id: Session key (its state is discarded afterwards)
+        
+        Returns:
+            Rate indicators added, in order
+        """
+        self.end_session(session_id)
+        try:
+            return self.observe_all(session_id, events)
+        finally:
+            self.end_session(session_id)
+    
+    def end_session(self, session_id: str):
+        """Forget a session's counters and flows."""
+        self._sessions.pop(session_id, None)
+    
+    def reset(self):
+        """Forget all sessions."""
+        self._sessions.clear()
@@ -0,0 +1,99 @@
+"""
+Analyzer registry - dispatches events to analyzers by event ID.
+
+Builds an event ID -> analyzer table once and reuses the analyzer
+instances for every chunk, so each event costs one event ID lookup
+instead of a can_analyze() probe per analyzer.
+
+Adding an analyzer (e.g. registry events 12/13/14, logon 4624, DNS 22)
+only needs a BaseAnalyzer subclass with SUPPORTED_EVENT_IDS, registered
+in create_default_registry().
+"""
+
+from typing import Dict, Any, List, Optional
+from analyzers.base_analyzer import BaseAnalyzer
+from analyzers.process_analyzer import ProcessAnalyzer
+from analyzers.network_analyzer import NetworkAnalyzer
+from analyzers.file_analyzer import FileAnalyzer
+from models.analysis_result import EventAnalysis, SeverityLevel
+
+
+class AnalyzerRegistry:
+    """Maps event IDs to shared analyzer instances."""
+    
+    def __init__(self, analyzers: List[BaseAnalyzer] = None):
+        """
+        Build the dispatch table.
+        
+        Args:
+            analyzers: Analyzers in priority order (first registered wins
+                       when two analyzers claim the same event ID)
+        """
+        self._by_event_id: Dict[int, BaseAnalyzer] = {}
+        for analyzer in analyzers or []:
+            self.register(analyzer)
+    
+    def register(self, analyzer: BaseAnalyzer):
+        """
+        Register an analyzer for all of its SUPPORTED_EVENT_IDS.
+        
+        Args:
+            analyzer: Analyzer instance (shared by all chunks, so it must
+                      not keep per-event state)
+        """
+        for event_id in analyzer.SUPPORTED_EVENT_IDS:
+            self._by_event_id.setdefault(int(event_id), analyzer)
+    
+    def get_analyzer(self, event: Dict[str, Any]) -> Optional[BaseAnalyzer]:
+        """
+        Find the analyzer for an event.
+        
+        Args:
+            event: Flattened log event
+            
+        Returns:
+            Analyzer, or None if no analyzer handles the event ID
+        """
+        return self._by_event_id.get(BaseAnalyzer.get_event_id(event))
+    
+    def analyze(self, event: Dict[str, Any]) -> EventAnalysis:
+        """
+        Analyze an event with its analyzer.
+        
+        Args:
+            event: Flattened log event (see preprocess_log)
+            
+        Returns:
+            The analyzer's EventAnalysis, or a basic 'Generic' analysis if
+            no analyzer handles the event ID
+        """
+        analyzer = self.get_analyzer(event)
+        if analyzer is not None:
+            return analyzer.analyze(event)
+        
+        event_id = str(event.get('event_id', event.get('EventID', 'Unknown')))
+        timestamp = event.get('timestamp', event.get('TimeCreated', ''))
+        return EventAnalysis(
+            event_id=event_id,
+            event_type='Generic',
+            timestamp=timestamp,
+            analysis_text=f"EventID {event_id} - standard system event",
+            indicators=[],
+            severity=SeverityLevel.LOW,
+            field_references=[],
+            mitre_techniques=[]
+        )
+    
+    @property
+    def event_ids(self) -> List[int]:
+        """Event IDs with a registered analyzer."""
+        return sorted(self._by_event_id)
+
+
+def create_default_registry() -> AnalyzerRegistry:
+    """Create the registry with the standard analyzers."""
+    return AnalyzerRegistry([
+        ProcessAnalyzer(),
+        NetworkAnalyzer(),
+        FileAnalyzer(),
+    ])
@@ -0,0 +1,326 @@
+"""
+Per-chunk feature matrix (optional, needs 'numpy')
+Each chunk becomes one row of integer features: event-type counts, distinct
+IPs and ports, process counts, suspicious rule hits and an approximate token
+length. Rows follow the chunk dataset's order, so row i is index entry i.
+
+Balancing, stratified sampling, test extraction and dataset reports can then
+work on column slices and boolean masks instead of re-parsing chunks.
+
+merge_and_balance.py builds the matrix of the merged chunks while writing
+them (when numpy is installed) and prints the per-label report.
+
+Usage:
+    python chunk_features.py                                        # Merged chunks -> chunk_features.npz
+    python chunk_features.py <chunk dataset> <out.npz> [--label L]  # Any chunk dataset or chunks file
+"""
+
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tqdm import tqdm
+
+from config import MERGED_CHUNKS_FILE, FEATURES_FILE
+from chunk_dataset import is_chunk_dataset, iter_chunks, load_index
+from rules import suspicious_patterns
+from utils import iter_jsonl
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only needed for the feature matrix
+    np = None
+
+FEATURE_NAMES = [
+    'system_events',       # Logs with event_type 'system'
+    'network_events',      # Logs with event_type 'network'
+    'other_events',        # Any other event_type
+    'distinct_ips',        # Source/destination IPs seen in the chunk
+    'distinct_ports',      # Destination ports seen in the chunk
+    'process_events',      # Logs with a process image
+    'distinct_processes',  # Distinct process images
+    'rule_hits',           # Suspicious command patterns, AppData executables, suspicious IPs, high-risk ports
+    'approx_tokens'        # Length of the chunk's logs as JSON / CHARS_PER_TOKEN
+]
+
+CHARS_PER_TOKEN = 4  # Rough estimate; exact counts need the model's tokenizer
+
+IP_FIELDS = [
+    ('winlog', 'event_data', 'SourceIp'),
+    ('winlog', 'event_data', 'DestinationIp'),
+    ('layers', 'IP', 'src'),
+    ('layers', 'IP', 'dst')
+]
+PORT_FIELDS = [
+    ('winlog', 'event_data', 'DestinationPort'),
+    ('layers', 'TCP', 'dport'),
+    ('layers', 'UDP', 'dport')
+]
+
+
+def numpy_available() -> bool:
+    """Whether the feature matrix can be built"""
+    return np is not None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The feature matrix requires the 'numpy' package (pip install numpy)")
+
+
+def _get(log: Dict, path: Tuple[str, ...]):
+    value = log
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _as_port(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def chunk_feature_row(chunk: Dict) -> List[int]:
+    """
+    Features of one chunk, in FEATURE_NAMES order (single pass over its logs)
+    
+    Args:
+        chunk: Chunk object ({"metadata": ..., "logs": [...]})
+    
+    Returns:
+        List of integer feature values
+    """
+    logs = chunk.get('logs', [])
+    counts = {'system': 0, 'network': 0}
+    other_events = 0
+    ips, ports, processes = set(), set(), set()
+    process_events = 0
+    rule_hits = 0
+    
+    for log in logs:
+        event_type = log.get('event_type')
+        if event_type in counts:
+            counts[event_type] += 1
+        else:
+            other_events += 1
+        
+        for path in IP_FIELDS:
+            ip = _get(log, path)
+            if ip:
+                ips.add(ip)
+                if suspicious_patterns.is_suspicious_ip(ip)[0]:
+                    rule_hits += 1
+        
+        for path in PORT_FIELDS:
+            port = _as_port(_get(log, path))
+            if port is not None:
+                ports.add(port)
+                if port in suspicious_patterns.HIGH_RISK_PORTS:
+                    rule_hits += 1
+        
+        image = _get(log, ('winlog', 'event_data', 'Image'))
+        if image:
+            process_events += 1
+            processes.add(image.lower())
+            if suspicious_patterns.is_appdata_executable(image):
+                rule_hits += 1
+        
+        command_line = _get(log, ('winlog', 'event_data', 'CommandLine'))
+        if command_line:
+            rule_hits += len(suspicious_patterns.get_command_pattern_info(command_line))
+    
+    approx_tokens = len(json.dumps(logs, ensure_ascii=False)) // CHARS_PER_TOKEN
+    return [
+        counts['system'], counts['network'], other_events,
+        len(ips), len(ports), process_events, len(processes),
+        rule_hits, approx_tokens
+    ]
+
+
+@dataclass
+class ChunkFeatures:
+    """Feature matrix of a chunk set: one row per chunk, in dataset order"""
+    features: 'np.ndarray'     # (chunks, len(FEATURE_NAMES)) int32
+    labels: 'np.ndarray'       # Chunk label per row ('suspicious', 'normal', ...)
+    session_ids: 'np.ndarray'  # Session id per row
+    
+    def column(self, name: str) -> 'np.ndarray':
+        """One feature column by name"""
+        return self.features[:, FEATURE_NAMES.index(name)]
+    
+    def save(self, path: Path):
+        """Write the matrix to an .npz file"""
+        np.savez(path, features=self.features, labels=self.labels,
+                 session_ids=self.session_ids, columns=np.array(FEATURE_NAMES))
+    
+    @classmethod
+    def load(cls, path: Path) -> 'ChunkFeatures':
+        """
+        Read a matrix written by save()
+        
+        Raises:
+            ValueError: If the file was built with different feature columns
+        """
+        _require_numpy()
+        with np.load(path) as data:
+            if data['columns'].tolist() != FEATURE_NAMES:
+                raise ValueError(f"{path} has different feature columns; rebuild it with chunk_features.py")
+            return cls(data['features'], data['labels'], data['session_ids'])
+
+
+class FeatureMatrixBuilder:
+    """
+    Collects feature rows from a chunk stream
+    
+    Usage:
+        builder = FeatureMatrixBuilder()
+        chunks = builder.collect(chunks)     # Pass-through while writing
+        ...
+        features = builder.build()
+    """
+    
+    def __init__(self, label: Optional[str] = None):
+        """
+        Args:
+            label: Label for chunks without 'chunk_label' (e.g. a single-label dataset)
+        
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        _require_numpy()
+        self.label = label
+        self.rows, self.labels, self.session_ids = [], [], []
+    
+    def add(self, chunk: Dict):
+        """Add one chunk's row"""
+        self.rows.append(chunk_feature_row(chunk))
+        self.labels.append(chunk.get('chunk_label', self.label) or 'unknown')
+        self.session_ids.append(chunk.get('metadata', {}).get('session_id', 'unknown'))
+    
+    def collect(self, chunks: Iterable[Dict]) -> Iterator[Dict]:
+        """Add each chunk of a stream and pass it on"""
+        for chunk in chunks:
+            self.add(chunk)
+            yield chunk
+    
+    def build(self) -> ChunkFeatures:
+        """Feature matrix of the chunks added so far"""
+        features = np.array(self.rows, dtype=np.int32).reshape(len(self.rows), len(FEATURE_NAMES))
+        return ChunkFeatures(features, np.array(self.labels, dtype=str), np.array(self.session_ids, dtype=str))
+
+
+def build_feature_matrix(chunks: Iterable[Dict], label: Optional[str] = None) -> ChunkFeatures:
+    """
+    Build the feature matrix of a chunk set
+    
+    Args:
+        chunks: Chunk objects (list or stream)
+        label: Label for chunks without 'chunk_label' (e.g. a single-label dataset)
+    
+    Returns:
+        ChunkFeatures with one row per chunk
+    """
+    builder = FeatureMatrixBuilder(label)
+    for chunk in chunks:
+        builder.add(chunk)
+    return builder.build()
+
+
+def iter_labeled_chunks(source: Path) -> Iterator[Dict]:
+    """
+    Stream the chunks of a chunk dataset or chunks file, in dataset order
+    
+    Chunks of a chunk dataset get their index entry's label as
+    'chunk_label' when they don't carry one.
+    
+    Args:
+        source: Chunk dataset directory or chunks file
+    
+    Yields:
+        Chunk objects
+    """
+    if not is_chunk_dataset(source):
+        yield from iter_jsonl(source)
+        return
+    
+    index = load_index(source)
+    for entry, chunk in zip(index, iter_chunks(source, index)):
+        if entry.get('label'):
+            chunk.setdefault('chunk_label', entry['label'])
+        yield chunk
+
+
+def summarize(features: ChunkFeatures) -> Dict[str, Dict]:
+    """
+    Per-label chunk counts and feature means
+    
+    Args:
+        features: Feature matrix
+    
+    Returns:
+        label -> {'chunks': count, 'mean': {feature: mean}, 'with_rule_hits': count}
+    """
+    summary = {}
+    rule_hits = features.column('rule_hits')
+    for label in np.unique(features.labels):
+        mask = features.labels == label
+        means = features.features[mask].mean(axis=0)
+        summary[str(label)] = {
+            'chunks': int(mask.sum()),
+            'mean': {name: round(float(value), 2) for name, value in zip(FEATURE_NAMES, means)},
+            'with_rule_hits': int((rule_hits[mask] > 0).sum())
+        }
+    return summary
+
+
+def print_feature_report(features: ChunkFeatures):
+    """
+    Print per-label feature means
+    
+    Args:
+        features: Feature matrix
+    """
+    summary = summarize(features)
+    labels = list(summary)
+    
+    print(f"\n{'='*70}")
+    print("CHUNK FEATURE REPORT")
+    print('='*70)
+    print(f"{'Feature':<28}" + "".join(f"{label:>16}" for label in labels))
+    print(f"{'chunks':<28}" + "".join(f"{summary[label]['chunks']:>16,}" for label in labels))
+    for name in FEATURE_NAMES:
+        print(f"{name + ' (mean)':<28}" + "".join(f"{summary[label]['mean'][name]:>16,.2f}" for label in labels))
+    print(f"{'with rule hits':<28}" + "".join(f"{summary[label]['with_rule_hits']:>16,}" for label in labels))
+    print('='*70)
+
+
+def main():
+    """Build the feature matrix of the merged chunks (or of the given dataset)"""
+    args = sys.argv[1:]
+    label = None
+    if '--label' in args:
+        position = args.index('--label')
+        label = args[position + 1] if position + 1 < len(args) else None
+        del args[position:position + 2]
+    if len(args) not in (0, 2) or ('--label' in sys.argv and not label):
+        print("Usage: python chunk_features.py [<chunk dataset> <out.npz>] [--label <label>]")
+        print("       --label: label for chunks without one (chunk datasets use their index labels)")
+        return
+    
+    source, output = (Path(args[0]), Path(args[1])) if args else (MERGED_CHUNKS_FILE, FEATURES_FILE)
+    print(f"📂 Loading from: {source}")
+    features = build_feature_matrix(tqdm(iter_labeled_chunks(source), desc="   Extracting features"), label)
+    features.save(output)
+    print(f"💾 Saved {len(features.features):,} x {len(FEATURE_NAMES)} features to: {output}")
+    print_feature_report(features)
+    return features
+
+
+if __name__ == '__main__':
+    main()
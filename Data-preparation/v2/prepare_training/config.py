@@ -4,22 +4,41 @@ Configuration for training data preparation
 
 from pathlib import Path
 import json
+import os
+import sys
 
 # Base paths
 BASE_DIR = Path(__file__).parent
 V2_DIR = BASE_DIR.parent
 TRAINING_DATA_DIR = V2_DIR / 'training_data'
 
-# Input files (chunks from previous pipeline)
-SUSPICIOUS_CHUNKS_FILE = TRAINING_DATA_DIR / 'suspicious_chunks.json'
-NORMAL_CHUNKS_FILE = TRAINING_DATA_DIR / 'normal_chunks.json'
+# Shared v2 pipeline utilities (JSONL streaming helpers in utils.py)
+if str(V2_DIR) not in sys.path:
+    sys.path.append(str(V2_DIR))
+
+
+def _chunks_file(name: str) -> Path:
+    """Chunks written by the v2 pipeline: chunk dataset directory, or legacy .jsonl, .jsonl.zst or .json"""
+    for suffix in ('', '.jsonl', '.jsonl.zst', '.json'):
+        path = TRAINING_DATA_DIR / f'{name}{suffix}'
+        if path.exists():
+            return path
+    return TRAINING_DATA_DIR / name
+
+
+# Input chunks from previous pipeline (dataset directory or legacy file)
+SUSPICIOUS_CHUNKS_FILE = _chunks_file('suspicious_chunks')
+NORMAL_CHUNKS_FILE = _chunks_file('normal_chunks')
 
 # Output directory for final training data
 FINAL_OUTPUT_DIR = BASE_DIR / 'final_training_data'
 FINAL_OUTPUT_DIR.mkdir(exist_ok=True)
 
 # Intermediate files
-MERGED_CHUNKS_FILE = BASE_DIR / 'merged_balanced_chunks.json'
+MERGED_CHUNKS_FILE = BASE_DIR / 'merged_balanced_chunks'                   # Chunk dataset (shards + index)
+CONVERTED_EXAMPLES_FILE = BASE_DIR / 'converted_examples.jsonl'        # One converted example per line
+CONVERTED_INDEX_FILE = BASE_DIR / 'converted_examples.index.json'      # session_id, label, byte offset per line
+FEATURES_FILE = BASE_DIR / 'chunk_features.npz'                        # Per-chunk feature matrix (see chunk_features.py)
 
 # Final training files (JSONL format)
 TRAIN_FILE = FINAL_OUTPUT_DIR / 'train.jsonl'
@@ -40,9 +59,24 @@ TRAIN_SPLIT = 0.8   # 80% for training
 VAL_SPLIT = 0.1     # 10% for validation
 TEST_SPLIT = 0.1    # 10% for testing
 
+# Parallel conversion (chunks -> training examples)
+NUM_WORKERS = max(1, (os.cpu_count() or 1) - 1)  # Set to 1 to convert serially
+CONVERSION_CHUNKSIZE = 32  # Chunks sent to a worker at a time
+
 # Instruction template
 INSTRUCTION_TEMPLATE = "Analyze this session log chunk and determine if it contains normal or suspicious activity. If suspicious, identify all MITRE ATT&CK techniques and explain why."
 
+# Token accounting (tokenize_examples.py; optional, needs 'transformers' and the tokenizer download)
+TOKENIZE_EXAMPLES = True                  # Measure exact lengths between conversion and splitting (skipped if the tokenizer can't load)
+TOKENIZER_MODEL = 'Qwen/Qwen2.5-1.5B-Instruct'  # Same tokenizer as fine-tuning
+PROMPT_TEMPLATE = "{instruction}\n\n{input}\n\nAnalysis:\n"  # Prompt as built by the fine-tuning notebook (output follows)
+MAX_SEQ_TOKENS = 2000                     # Fine-tuning max_length (prompt + output)
+OVER_BUDGET_ACTION = 'rechunk'            # 'rechunk' = split the logs and re-convert, 'flag' = keep and report
+TOKENIZE_BATCH_SIZE = 256                 # Examples per tokenizer call
+LENGTH_BUCKETS = [512, 1024, 1536, 2000]  # Upper bounds (tokens) of the length-bucketed shards
+BUCKETS_DIR = FINAL_OUTPUT_DIR / 'buckets'               # <split>_<bound>.jsonl (and <split>_over.jsonl)
+TOKEN_REPORT_FILE = FINAL_OUTPUT_DIR / 'token_report.json'  # Length percentiles, bucket counts, over-budget examples
+
 # Validation
 def validate_paths():
     """Validate that required input files exist"""
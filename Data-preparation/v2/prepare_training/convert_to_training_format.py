@@ -6,110 +6,44 @@ Based on real attack patterns from documented penetration tests.
 """
 
 import json
+from itertools import islice
+from multiprocessing import Pool
 from pathlib import Path
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Set, Tuple, Iterable, Iterator, Optional
 from tqdm import tqdm
 
 from config import (
     MERGED_CHUNKS_FILE,
+    CONVERTED_EXAMPLES_FILE,
+    CONVERTED_INDEX_FILE,
     load_mitre_mapping,
-    INSTRUCTION_TEMPLATE
+    INSTRUCTION_TEMPLATE,
+    NUM_WORKERS,
+    CONVERSION_CHUNKSIZE
 )
 
+from utils import iter_jsonl
+
 # Import modular components
-from models.analysis_result import AnalysisResult, EventAnalysis, SeverityLevel
-from analyzers import ProcessAnalyzer, NetworkAnalyzer, FileAnalyzer
+from models.analysis_result import AnalysisResult, EventAnalysis
+from analyzers import ChainCorrelator, RateTracker, create_default_registry, preprocess_log
 from formatters import SuspiciousFormatter, NormalFormatter
-from rules import suspicious_patterns
 
 
 # ============================================================================
 # MODULAR ANALYSIS FUNCTIONS
 # ============================================================================
 
-def preprocess_log(log: Dict) -> Dict:
-    """
-    Flatten nested log structure to match analyzer expectations.
-    
-    Converts:
-    - winlog.event_data.* -> top-level fields
-    - winlog.event_id -> event_id/EventID
-    - layers.IP.* and layers.TCP.* -> top-level fields
-    
-    Args:
-        log: Original log with nested structure
-        
-    Returns:
-        Flattened log dict
-    """
-    flat_log = log.copy()
-    
-    # Flatten winlog structure (system events)
-    if 'winlog' in log:
-        winlog = log['winlog']
-        
-        # Safety check: winlog should be a dict
-        if not isinstance(winlog, dict):
-            return flat_log
-        
-        # Copy event_id to top level
-        if 'event_id' in winlog:
-            flat_log['event_id'] = winlog['event_id']
-            flat_log['EventID'] = winlog['event_id']
-        
-        # Flatten event_data fields
-        if 'event_data' in winlog:
-            event_data = winlog['event_data']
-            # Check if event_data is a dict (sometimes it could be a list)
-            if isinstance(event_data, dict):
-                for key, value in event_data.items():
-                    if key not in flat_log:  # Don't overwrite existing
-                        flat_log[key] = value
-    
-    # Flatten network layers (network events)
-    if 'layers' in log:
-        layers = log['layers']
-        
-        # Safety check: layers should be a dict
-        if not isinstance(layers, dict):
-            return flat_log
-        
-        # Flatten IP layer
-        if 'IP' in layers:
-            ip_data = layers['IP']
-            if isinstance(ip_data, dict):
-                flat_log['SourceIp'] = ip_data.get('src', '')
-                flat_log['SourceIP'] = ip_data.get('src', '')
-                flat_log['DestinationIp'] = ip_data.get('dst', '')
-                flat_log['DestIP'] = ip_data.get('dst', '')
-                flat_log['DestinationAddress'] = ip_data.get('dst', '')
-        
-        # Flatten TCP layer
-        if 'TCP' in layers:
-            tcp_data = layers['TCP']
-            if isinstance(tcp_data, dict):
-                flat_log['SourcePort'] = tcp_data.get('sport', '')
-                flat_log['DestinationPort'] = tcp_data.get('dport', '')
-                flat_log['DestPort'] = tcp_data.get('dport', '')
-                flat_log['tcp_flags'] = tcp_data.get('flags', '')
-        
-        # Add packet size from length field
-        if 'length' in log:
-            flat_log['packet_size'] = log['length']
-    
-    # Guess event_id for network events (they don't have one by default)
-    if 'event_type' in log and log['event_type'] == 'network':
-        if 'event_id' not in flat_log:
-            flat_log['event_id'] = 3  # Sysmon network connection
-            flat_log['EventID'] = 3
-    elif 'event_type' in log and log['event_type'] == 'system':
-        if 'event_id' not in flat_log and 'EventID' not in flat_log:
-            # Try to infer from Image field
-            if 'Image' in flat_log:
-                flat_log['event_id'] = 1  # Sysmon process creation
-                flat_log['EventID'] = 1
-    
-    return flat_log
+# Event ID -> analyzer dispatch table, shared by all chunks
+ANALYZER_REGISTRY = create_default_registry()
+
+# Rate-based indicators, one chunk at a time. Only periodic beaconing (min_beacons
+# packets) fits in a chunk of CHUNK_SIZE logs; the mass file thresholds (15+ events)
+# are larger than a chunk and only fire on whole sessions (backend correlate_session)
+RATE_TRACKER = RateTracker()
+
+# Time-windowed attack chain matching (ATTACK_CHAIN_PATTERNS), one chunk at a time
+CHAIN_CORRELATOR = ChainCorrelator()
 
 
 def analyze_chunk(logs: List[Dict]) -> AnalysisResult:
@@ -122,39 +56,12 @@ def analyze_chunk(logs: List[Dict]) -> AnalysisResult:
     Returns:
         AnalysisResult with all event analyses
     """
-    # Initialize analyzers
-    analyzers = [
-        ProcessAnalyzer(),
-        NetworkAnalyzer(),
-        FileAnalyzer(),
-    ]
-    
-    # Analyze each event
-    event_analyses = []
-    for log in logs:
-        # Preprocess log to flatten nested structure
-        flat_log = preprocess_log(log)
-        
-        # Find appropriate analyzer
-        for analyzer in analyzers:
-            if analyzer.can_analyze(flat_log):
-                analysis = analyzer.analyze(flat_log)
-                event_analyses.append(analysis)
-                break
-        # If no specialized analyzer, create basic analysis
-        else:
-            event_id = str(flat_log.get('event_id', flat_log.get('EventID', 'Unknown')))
-            timestamp = flat_log.get('timestamp', flat_log.get('TimeCreated', ''))
-            event_analyses.append(EventAnalysis(
-                event_id=event_id,
-                event_type='Generic',
-                timestamp=timestamp,
-                analysis_text=f"EventID {event_id} - standard system event",
-                indicators=[],
-                severity=SeverityLevel.LOW,
-                field_references=[],
-                mitre_techniques=[]
-            ))
+    # Analyze each event (flattened to match analyzer expectations)
+    flat_logs = [preprocess_log(log) for log in logs]
+    event_analyses = [ANALYZER_REGISTRY.analyze(flat_log) for flat_log in flat_logs]
+    
+    # Add rate-based indicators that need several events
+    RATE_TRACKER.track(zip(flat_logs, event_analyses))
     
     # Detect attack chains
     attack_chain = detect_attack_chain(event_analyses)
@@ -173,29 +80,21 @@ def detect_attack_chain(events: List[EventAnalysis]) -> str:
     """
     Detect attack chain patterns from event sequence.
     
+    Declared chains must match in sequence order within their time window
+    (see ChainCorrelator); the generic checks below are a fallback for
+    chunks that only show part of a chain.
+    
     Args:
-        events: List of analyzed events
+        events: List of analyzed events, in timestamp order
         
     Returns:
         Attack chain name or empty string
     """
-    # Get event types and check for patterns
+    matches = CHAIN_CORRELATOR.correlate(events)
+    if matches:
+        return matches[0].name
+    
     event_types = [e.event_type for e in events]
-    all_techniques = []
-    for e in events:
-        all_techniques.extend(e.mitre_techniques)
-    
-    # Check against known attack chain patterns (it's a list of dicts)
-    for pattern in suspicious_patterns.ATTACK_CHAIN_PATTERNS:
-        chain_name = pattern['name']
-        required_techniques = pattern.get('mitre_techniques', [])
-        required_sequence = pattern.get('sequence', [])
-        
-        # Check if required techniques are present
-        if all(tech in all_techniques for tech in required_techniques[:2]):  # At least 2 main techniques
-            # Check if event sequence matches
-            if all(event_type in event_types for event_type in required_sequence):
-                return chain_name
     
     # Check for generic patterns
     if 'Process' in event_types and 'Network' in event_types:
@@ -313,6 +212,72 @@ def create_training_example(chunk: Dict, mitre_mapping: Dict) -> Dict:
     }
 
 
+# MITRE mapping for pool workers (sent once per worker, not once per chunk)
+_worker_mitre_mapping = None
+
+
+def _init_worker(mitre_mapping: Dict):
+    """Pool initializer: keep the MITRE mapping in the worker process"""
+    global _worker_mitre_mapping
+    _worker_mitre_mapping = mitre_mapping
+
+
+def _convert_chunk(chunk: Dict) -> Tuple[Optional[Dict], str]:
+    """Pool task: convert one chunk, returning (example, error message)"""
+    try:
+        return create_training_example(chunk, _worker_mitre_mapping), ""
+    except Exception as e:
+        error_info = type(chunk).__name__
+        if isinstance(chunk, dict):
+            error_info += f" with keys: {list(chunk.keys())}"
+        elif isinstance(chunk, list):
+            error_info += f" with {len(chunk)} items, first item type: {type(chunk[0]).__name__ if chunk else 'empty'}"
+        return None, f"{error_info}\n      Error: {e}"
+
+
+def iter_converted_chunks(chunks: Iterable[Dict], mitre_mapping: Dict, total: Optional[int] = None) -> Iterator[Tuple[Dict, Optional[Dict], str]]:
+    """
+    Convert chunks to training examples, on a process pool when NUM_WORKERS > 1
+    
+    Chunks may be a stream; they are handed to the pool in bounded windows
+    so a large input is never fully in memory.
+    
+    Args:
+        chunks: Chunk objects (list or stream)
+        mitre_mapping: MITRE technique ID to name mapping
+        total: Number of chunks, for the progress bar (optional)
+        
+    Yields:
+        (chunk, example or None, error message) in the same order as chunks
+    """
+    if total is None and isinstance(chunks, list):
+        total = len(chunks)
+    progress = tqdm(total=total, desc="   Processing")
+    
+    if NUM_WORKERS > 1:
+        print(f"   Using {NUM_WORKERS} worker processes")
+        window_size = NUM_WORKERS * CONVERSION_CHUNKSIZE * 4
+        chunks = iter(chunks)
+        with Pool(NUM_WORKERS, initializer=_init_worker, initargs=(mitre_mapping,)) as pool:
+            while True:
+                window = list(islice(chunks, window_size))
+                if not window:
+                    break
+                # imap keeps input order, so output is identical to the serial conversion
+                results = pool.imap(_convert_chunk, window, chunksize=CONVERSION_CHUNKSIZE)
+                for chunk, (example, error) in zip(window, results):
+                    progress.update()
+                    yield chunk, example, error
+    else:
+        _init_worker(mitre_mapping)
+        for chunk in chunks:
+            example, error = _convert_chunk(chunk)
+            progress.update()
+            yield chunk, example, error
+    
+    progress.close()
+
+
 def convert_chunks_to_training_format(chunks: List[Dict]) -> List[Dict]:
     """
     Convert all chunks to training format
@@ -330,26 +295,14 @@ def convert_chunks_to_training_format(chunks: List[Dict]) -> List[Dict]:
     
     training_examples = []
     failed = 0
-    error_details = []
     
-    for i, chunk in enumerate(tqdm(chunks, desc="   Processing")):
-        try:
-            example = create_training_example(chunk, mitre_mapping)
+    for chunk, example, error in iter_converted_chunks(chunks, mitre_mapping):
+        if example is not None:
             training_examples.append(example)
-        except Exception as e:
+        else:
             failed += 1
             if failed <= 3:  # Show first 3 errors with details
-                error_info = f"Chunk {i}: {type(chunk).__name__}"
-                if isinstance(chunk, dict):
-                    error_info += f" with keys: {list(chunk.keys())}"
-                elif isinstance(chunk, list):
-                    error_info += f" with {len(chunk)} items, first item type: {type(chunk[0]).__name__ if chunk else 'empty'}"
-                error_details.append(f"{error_info}\n      Error: {e}")
-    
-    if error_details:
-        print("\n   ⚠️  Error Details:")
-        for detail in error_details:
-            print(f"      {detail}")
+                print(f"\n   ⚠️  Chunk conversion error: {error}")
     
     if failed > 0:
         print(f"\n   ⚠️  {failed} chunks failed to convert")
@@ -359,6 +312,73 @@ def convert_chunks_to_training_format(chunks: List[Dict]) -> List[Dict]:
     return training_examples
 
 
+def write_converted_examples(chunks: Iterable[Dict], output_file: Path, index_file: Path) -> Dict:
+    """
+    Convert all chunks once and write them to the intermediate JSONL file
+    
+    Each line holds the training example plus its session_id and chunk_label.
+    The index file lists [session_id, chunk_label, byte_offset, byte_length]
+    per line so the split step can work without re-reading or re-analyzing.
+    
+    Args:
+        chunks: Chunk objects (list or stream)
+        output_file: Intermediate JSONL path
+        index_file: Index JSON path
+        
+    Returns:
+        Statistics dict (converted, failed, suspicious, normal, output length,
+        one sample output per label)
+    """
+    print("\n🔄 Converting chunks to training format...")
+    
+    mitre_mapping = load_mitre_mapping()
+    
+    stats = {
+        'converted': 0,
+        'failed': 0,
+        'suspicious': 0,
+        'normal': 0,
+        'total_output_chars': 0,
+        'samples': {}
+    }
+    index = []
+    offset = 0
+    
+    with open(output_file, 'wb') as f:
+        for chunk, example, error in iter_converted_chunks(chunks, mitre_mapping):
+            if example is None:
+                stats['failed'] += 1
+                if stats['failed'] <= 3:  # Show first 3 errors with details
+                    print(f"\n   ⚠️  Chunk conversion error: {error}")
+                continue
+            
+            session_id = chunk.get('metadata', {}).get('session_id', 'unknown')
+            chunk_label = chunk.get('chunk_label', 'unknown')
+            record = {'session_id': session_id, 'chunk_label': chunk_label, **example}
+            line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+            
+            f.write(line)
+            index.append([session_id, chunk_label, offset, len(line)])
+            offset += len(line)
+            
+            status = 'suspicious' if 'Suspicious' in example['output'] else 'normal'
+            stats[status] += 1
+            stats['converted'] += 1
+            stats['total_output_chars'] += len(example['output'])
+            stats['samples'].setdefault(status, example['output'])
+    
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    
+    if stats['failed'] > 0:
+        print(f"\n   ⚠️  {stats['failed']} chunks failed to convert")
+    
+    print(f"   ✅ Successfully converted {stats['converted']:,} examples")
+    print(f"   [+] Saved to: {output_file} (index: {index_file.name})")
+    
+    return stats
+
+
 def main():
     """Main function to convert chunks to training format with IMPROVED QUALITY"""
     print("="*70)
@@ -368,36 +388,31 @@ def main():
     print("✅ Model will learn HOW to analyze, not just output format")
     print("="*70)
     
-    # Load merged chunks
+    # Stream merged chunks
     print(f"\n📂 Loading: {MERGED_CHUNKS_FILE}")
-    with open(MERGED_CHUNKS_FILE, 'r', encoding='utf-8') as f:
-        chunks = json.load(f)
-    print(f"   Loaded {len(chunks):,} chunks")
+    chunks = iter_jsonl(MERGED_CHUNKS_FILE)
     
-    # Convert to training format
-    training_examples = convert_chunks_to_training_format(chunks)
+    # Convert to training format (written once, reused by the split step)
+    stats = write_converted_examples(chunks, CONVERTED_EXAMPLES_FILE, CONVERTED_INDEX_FILE)
+    total = stats['converted']
     
     # Check if we have any examples
-    if len(training_examples) == 0:
+    if total == 0:
         print("\n" + "="*70)
         print("❌ CONVERSION FAILED - NO EXAMPLES GENERATED")
         print("="*70)
         print("All chunks failed to convert. Please check the error details above.")
-        return []
-    
-    # Statistics
-    suspicious_count = sum(1 for ex in training_examples if 'Suspicious' in ex['output'])
-    normal_count = len(training_examples) - suspicious_count
+        return stats
     
     # Calculate output lengths to show improvement
-    avg_output_len = sum(len(ex['output']) for ex in training_examples) / len(training_examples)
+    avg_output_len = stats['total_output_chars'] / total
     
     print("\n" + "="*70)
     print("✅ CONVERSION COMPLETE (IMPROVED QUALITY)")
     print("="*70)
-    print(f"Total examples: {len(training_examples):,}")
-    print(f"Suspicious examples: {suspicious_count:,} ({suspicious_count/len(training_examples)*100:.1f}%)")
-    print(f"Normal examples: {normal_count:,} ({normal_count/len(training_examples)*100:.1f}%)")
+    print(f"Total examples: {total:,}")
+    print(f"Suspicious examples: {stats['suspicious']:,} ({stats['suspicious']/total*100:.1f}%)")
+    print(f"Normal examples: {stats['normal']:,} ({stats['normal']/total*100:.1f}%)")
     print(f"\n📊 Quality Metrics:")
     print(f"   Average output length: {avg_output_len:.0f} characters")
     print(f"   (vs ~150 chars with old generic templates)")
@@ -408,19 +423,14 @@ def main():
     print(f"   ✓ Unique analysis (not templates)")
     
     # Show sample outputs
-    print(f"\n📋 Sample Training Output (Suspicious):")
-    print("="*70)
-    suspicious_example = next((ex for ex in training_examples if 'Suspicious' in ex['output']), None)
-    if suspicious_example:
-        print(suspicious_example['output'][:500] + "..." if len(suspicious_example['output']) > 500 else suspicious_example['output'])
-    
-    print(f"\n📋 Sample Training Output (Normal):")
-    print("="*70)
-    normal_example = next((ex for ex in training_examples if 'Normal' in ex['output']), None)
-    if normal_example:
-        print(normal_example['output'][:500] + "..." if len(normal_example['output']) > 500 else normal_example['output'])
+    for status in ('suspicious', 'normal'):
+        print(f"\n📋 Sample Training Output ({status.capitalize()}):")
+        print("="*70)
+        sample = stats['samples'].get(status)
+        if sample:
+            print(sample[:500] + "..." if len(sample) > 500 else sample)
     
-    return training_examples
+    return stats
 
 
 if __name__ == '__main__':
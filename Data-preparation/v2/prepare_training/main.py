@@ -2,7 +2,8 @@
 Master script to run the complete training preparation pipeline
 1. Merge and balance chunks
 2. Convert to instruction-tuning format (NEW: modular SOLID architecture)
-3. Split into train/val/test
+3. Count exact token lengths, re-chunking over-budget examples
+4. Split converted examples into train/val/test (+ length-bucketed shards)
 """
 
 import sys
@@ -11,9 +12,10 @@ from pathlib import Path
 # Add current directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import validate_paths, FINAL_OUTPUT_DIR
+from config import validate_paths, FINAL_OUTPUT_DIR, TOKENIZE_EXAMPLES
 import merge_and_balance
 import convert_to_training_format
+import tokenize_examples
 import split_train_val_test
 
 
@@ -38,7 +40,9 @@ def main():
     print("="*70)
     print("\nPipeline Steps:")
     print("   [1] Merge & Balance chunks")
-    print("   [2] Split into train/val/test with modular conversion (80/10/10)")
+    print("   [2] Convert chunks with modular analysis (once, to converted_examples.jsonl)")
+    print("   [3] Count exact token lengths (re-chunk over-budget examples)")
+    print("   [4] Split converted examples into train/val/test (80/10/10)")
     print("="*70)
     
     # Validate configuration
@@ -54,13 +58,32 @@ def main():
         print_step_header(1, "MERGE ALL CHUNKS")
         merge_and_balance.main()
         
-        # Step 2: Split into train/val/test (with modular conversion inside)
-        print_step_header(2, "SPLIT & CONVERT WITH MODULAR ANALYSIS")
+        # Step 2: Convert every chunk once (examples + session/label index)
+        print_step_header(2, "CONVERT WITH MODULAR ANALYSIS")
         print("[*] Using NEW modular analyzers with real attack patterns")
         print("   - ProcessAnalyzer: EventID 1, 4688")
         print("   - NetworkAnalyzer: EventID 3, 5156 (C2 detection)")
         print("   - FileAnalyzer: EventID 11, 23 (ransomware detection)")
         print("")
+        convert_to_training_format.main()
+        
+        # Step 3: Exact token lengths with the fine-tuning tokenizer
+        print_step_header(3, "TOKEN-LENGTH ACCOUNTING")
+        tokenized = False
+        if TOKENIZE_EXAMPLES:
+            try:
+                tokenizer = tokenize_examples.load_tokenizer()
+            except (ImportError, OSError) as e:
+                # Optional step: missing 'transformers' or tokenizer download
+                print(f"[!] Skipped: tokenizer unavailable ({e})")
+                print("    Splitting without token counts")
+            else:
+                tokenized = tokenize_examples.main(tokenizer) is not None
+        else:
+            print("[*] Skipped (TOKENIZE_EXAMPLES = False)")
+        
+        # Step 4: Split the converted examples by session (no re-analysis)
+        print_step_header(4, "SPLIT INTO TRAIN/VAL/TEST")
         split_train_val_test.main()
         
         # Final summary
@@ -73,6 +96,8 @@ def main():
         print("  - train.jsonl (training set)")
         print("  - val.jsonl (validation set)")
         print("  - test.jsonl (test set)")
+        if tokenized:
+            print("  - buckets/<split>_<max tokens>.jsonl (length-bucketed, with num_tokens)")
         print("\n[+] Key Improvements:")
         print("   > Outputs reference specific log fields")
         print("   > Explains WHY suspicious/normal based on field values")
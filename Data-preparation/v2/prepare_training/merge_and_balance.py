@@ -1,74 +1,135 @@
 """
 Merge suspicious and normal chunks
 Keeps ALL chunks without balancing/sampling
+
+Chunks are streamed: only the chunk datasets' index entries (shard, byte
+offset, length) are kept in memory and shuffled, then each chunk is read
+back in shuffled order and written to the merged chunk dataset. When numpy
+is installed, the chunks' feature matrix (chunk_features.py) is built on
+the way and a per-label feature report is printed.
 """
 
-import json
 import random
+import tempfile
+from contextlib import ExitStack
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterator, List, Tuple
 
 from config import (
     SUSPICIOUS_CHUNKS_FILE,
     NORMAL_CHUNKS_FILE,
-    MERGED_CHUNKS_FILE
+    MERGED_CHUNKS_FILE,
+    FEATURES_FILE
 )
+from chunk_dataset import ChunkReader, is_chunk_dataset, load_index, write_chunk_dataset
+from chunk_features import FeatureMatrixBuilder, numpy_available, print_feature_report
+from utils import iter_jsonl
 
 
-def load_chunks(filepath: Path) -> List[Dict]:
-    """Load chunks from JSON file"""
+def index_chunks(filepath: Path, stack: ExitStack) -> Tuple[ChunkReader, List[Dict]]:
+    """
+    Open a chunk dataset for random access and load its index
+    
+    Legacy chunk files (.jsonl, .jsonl.zst or .json) have no index, so they
+    are first copied to a temporary chunk dataset.
+    
+    Args:
+        filepath: Chunk dataset directory or legacy chunks file
+        stack: Exit stack that owns the reader and any temporary dataset
+    
+    Returns:
+        Tuple of (open reader, index entries in dataset order)
+    """
     print(f"\n📂 Loading: {filepath.name}")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        chunks = json.load(f)
-    print(f"   Loaded {len(chunks):,} chunks")
-    return chunks
+    if not is_chunk_dataset(filepath):
+        dataset_dir = Path(stack.enter_context(tempfile.TemporaryDirectory())) / 'chunks'
+        write_chunk_dataset(iter_jsonl(filepath), dataset_dir)
+        filepath = dataset_dir
+    
+    index = load_index(filepath)
+    print(f"   Loaded {len(index):,} chunks")
+    return stack.enter_context(ChunkReader(filepath)), index
 
 
-def merge_all_chunks(suspicious_chunks: List[Dict], normal_chunks: List[Dict]) -> List[Dict]:
+def iter_shuffled_chunks(entries: List[Tuple[str, Dict]], readers: Dict[str, ChunkReader]) -> Iterator[Dict]:
     """
-    Merge all suspicious and normal chunks without balancing
+    Read chunks back in the order of the (shuffled) index entries
     
     Args:
-        suspicious_chunks: List of suspicious chunk objects
-        normal_chunks: List of normal chunk objects
-        
-    Returns:
-        Merged list of all chunks
-    """
-    print(f"\n🔗 Merging all chunks...")
+        entries: (chunk_label, index entry) tuples
+        readers: chunk_label -> open chunk dataset reader
     
-    num_suspicious = len(suspicious_chunks)
-    num_normal = len(normal_chunks)
+    Yields:
+        Chunk objects with 'chunk_label' set
+    """
+    for chunk_label, entry in entries:
+        chunk = readers[chunk_label].read(entry)
+        chunk['chunk_label'] = chunk_label
+        yield chunk
+
+
+def merge_all_chunks(suspicious_file: Path, normal_file: Path, output_file: Path,
+                     features_file: Path = None) -> int:
+    """
+    Merge all suspicious and normal chunks without balancing
     
-    print(f"\n   Available:")
-    print(f"   - Suspicious: {num_suspicious:,} chunks")
-    print(f"   - Normal: {num_normal:,} chunks")
+    Args:
+        suspicious_file: Suspicious chunk dataset (or legacy chunks file)
+        normal_file: Normal chunk dataset (or legacy chunks file)
+        output_file: Merged chunk dataset directory
+        features_file: Where to save the merged chunks' feature matrix
+                       (None or no numpy = skipped)
     
-    # Label chunks for tracking
-    for chunk in suspicious_chunks:
-        chunk['chunk_label'] = 'suspicious'
+    Returns:
+        Number of merged chunks
+    """
+    readers = {}
+    entries = []
+    counts = {}
     
-    for chunk in normal_chunks:
-        chunk['chunk_label'] = 'normal'
+    with ExitStack() as stack:
+        # Label chunks for tracking
+        for chunk_label, filepath in (('suspicious', suspicious_file), ('normal', normal_file)):
+            reader, index = index_chunks(filepath, stack)
+            readers[chunk_label] = reader
+            counts[chunk_label] = len(index)
+            entries.extend((chunk_label, entry) for entry in index)
+        
+        print(f"\n🔗 Merging all chunks...")
+        
+        num_suspicious = counts['suspicious']
+        num_normal = counts['normal']
+        
+        print(f"\n   Available:")
+        print(f"   - Suspicious: {num_suspicious:,} chunks")
+        print(f"   - Normal: {num_normal:,} chunks")
+        
+        # Shuffle the index (same permutation as shuffling the chunks themselves)
+        random.seed(42)  # Reproducible shuffling
+        random.shuffle(entries)
+        
+        chunks = iter_shuffled_chunks(entries, readers)
+        builder = FeatureMatrixBuilder() if features_file and numpy_available() else None
+        if builder:
+            chunks = builder.collect(chunks)
+        
+        print(f"\n💾 Saving to: {output_file}")
+        total = write_chunk_dataset(chunks, output_file)
     
-    # Combine all chunks and shuffle
-    all_chunks = suspicious_chunks + normal_chunks
-    random.seed(42)  # Reproducible shuffling
-    random.shuffle(all_chunks)
+    print(f"\n   ✅ Total merged chunks: {total:,}")
+    if total:
+        print(f"   - Suspicious: {num_suspicious:,} ({num_suspicious/total*100:.1f}%)")
+        print(f"   - Normal: {num_normal:,} ({num_normal/total*100:.1f}%)")
     
-    print(f"\n   ✅ Total merged chunks: {len(all_chunks):,}")
-    print(f"   - Suspicious: {num_suspicious:,} ({num_suspicious/len(all_chunks)*100:.1f}%)")
-    print(f"   - Normal: {num_normal:,} ({num_normal/len(all_chunks)*100:.1f}%)")
+    if builder:
+        features = builder.build()
+        features.save(features_file)
+        print(f"\n💾 Chunk features saved to: {features_file}")
+        print_feature_report(features)
+    elif features_file:
+        print("\n[*] Chunk feature report skipped (numpy not installed)")
     
-    return all_chunks
-
-
-def save_chunks(chunks: List[Dict], filepath: Path):
-    """Save chunks to JSON file"""
-    print(f"\n💾 Saving to: {filepath}")
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(chunks, f, indent=2, ensure_ascii=False)
-    print(f"   ✅ Saved {len(chunks):,} chunks")
+    return total
 
 
 def main():
@@ -77,24 +138,17 @@ def main():
     print("MERGING ALL CHUNKS (NO BALANCING)")
     print("="*70)
     
-    # Load chunks
-    suspicious_chunks = load_chunks(SUSPICIOUS_CHUNKS_FILE)
-    normal_chunks = load_chunks(NORMAL_CHUNKS_FILE)
-    
-    # Merge all chunks
-    merged_chunks = merge_all_chunks(suspicious_chunks, normal_chunks)
-    
-    # Save merged chunks
-    save_chunks(merged_chunks, MERGED_CHUNKS_FILE)
+    # Merge all chunks (streamed to disk)
+    total = merge_all_chunks(SUSPICIOUS_CHUNKS_FILE, NORMAL_CHUNKS_FILE, MERGED_CHUNKS_FILE, FEATURES_FILE)
     
     # Print statistics
     print("\n" + "="*70)
     print("✅ MERGING COMPLETE")
     print("="*70)
     print(f"Output: {MERGED_CHUNKS_FILE}")
-    print(f"Total chunks: {len(merged_chunks):,}")
+    print(f"Total chunks: {total:,}")
     
-    return merged_chunks
+    return total
 
 
 if __name__ == '__main__':
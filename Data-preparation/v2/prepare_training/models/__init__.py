@@ -3,6 +3,6 @@ Data models for training data generation.
 Provides type-safe data structures for analysis results.
 """
 
-from models.analysis_result import AnalysisResult, EventAnalysis, SeverityLevel
+from models.analysis_result import AnalysisResult, ChainMatch, EventAnalysis, SeverityLevel
 
-__all__ = ['AnalysisResult', 'EventAnalysis', 'SeverityLevel']
+__all__ = ['AnalysisResult', 'ChainMatch', 'EventAnalysis', 'SeverityLevel']
@@ -140,3 +140,38 @@ class AnalysisResult:
     def get_suspicious_event_count(self) -> int:
         """Get count of events with indicators."""
         return sum(1 for analysis in self.event_analyses if analysis.indicators)
+
+
+@dataclass
+class ChainMatch:
+    """
+    Attack chain completed within its time window.
+    
+    Attributes:
+        name: Attack chain pattern name (ATTACK_CHAIN_PATTERNS)
+        description: Pattern description
+        session_id: Session the chain was observed in
+        start_time: Timestamp of the event that completed the first step
+        end_time: Timestamp of the event that completed the last step
+        mitre_techniques: Techniques of the pattern
+        step_times: Timestamp at which each step of the sequence completed
+    """
+    name: str
+    description: str
+    session_id: str
+    start_time: str
+    end_time: str
+    mitre_techniques: List[str] = field(default_factory=list)
+    step_times: List[str] = field(default_factory=list)
+    
+    def to_dict(self) -> Dict[str, any]:
+        """Convert to a JSON-serializable dict."""
+        return {
+            'name': self.name,
+            'description': self.description,
+            'session_id': self.session_id,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'mitre_techniques': list(self.mitre_techniques),
+            'step_times': list(self.step_times)
+        }
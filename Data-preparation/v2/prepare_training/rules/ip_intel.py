@@ -0,0 +1,173 @@
+"""
+IP intelligence - CIDR-aware classification of IP addresses.
+
+Addresses are parsed once to integers and looked up in sorted, disjoint
+intervals with bisect, so membership is O(log n) for feeds of thousands of
+CIDRs (cloud provider ranges, threat intel). IPv4 and IPv6 are supported;
+IPv4-mapped IPv6 addresses (::ffff:a.b.c.d) are treated as IPv4.
+
+Standard library only, so it can be shared with the stand-alone helper
+scripts outside this package.
+"""
+
+import ipaddress
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+@lru_cache(maxsize=65536)
+def parse_ip(ip: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse an IP address string.
+
+    Args:
+        ip: IPv4 or IPv6 address (an IPv6 zone suffix like %eth0 is ignored)
+
+    Returns:
+        (version, integer value) tuple, or None if not a valid address
+    """
+    if not ip or not isinstance(ip, str):
+        return None
+    try:
+        address = ipaddress.ip_address(ip.strip().split('%', 1)[0])
+    except ValueError:
+        return None
+
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return address.version, int(address)
+
+
+class IPRangeIndex:
+    """
+    Sorted interval index over labelled CIDR ranges.
+
+    Nested ranges are allowed; a lookup returns the label of the most
+    specific range containing the address. Plain addresses are treated as
+    single-host ranges.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()):
+        """
+        Build the index.
+
+        Args:
+            entries: (cidr_or_ip, label) tuples
+        """
+        self._ranges: Dict[int, List[Tuple[int, int, str]]] = {4: [], 6: []}
+        self._tables: Dict[int, Tuple[List[int], List[int], List[str]]] = {}
+        for cidr, label in entries:
+            self.add(cidr, label)
+
+    def add(self, cidr: str, label: str):
+        """
+        Add a CIDR range (or single address).
+
+        Args:
+            cidr: Range such as '10.0.0.0/8', '2001:db8::/32' or '1.2.3.4'
+            label: Value returned by lookup() for addresses in the range
+
+        Raises:
+            ValueError: If cidr is not a valid network or address
+        """
+        network = ipaddress.ip_network(cidr.strip(), strict=False)
+        start = int(network.network_address)
+        end = int(network.broadcast_address)
+        self._ranges[network.version].append((start, end, label))
+        self._tables.pop(network.version, None)
+
+    def add_feed(self, path: str, label: str) -> int:
+        """
+        Add every range listed in a feed file.
+
+        One CIDR or address per line; blank lines and '#' comments are
+        skipped. An optional second column (comma or whitespace separated)
+        overrides the label for that line.
+
+        Args:
+            path: Feed file path
+            label: Label for lines without their own
+
+        Returns:
+            Number of ranges added
+        """
+        added = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                parts = line.replace(',', ' ').split(None, 1)
+                self.add(parts[0], parts[1].strip() if len(parts) > 1 else label)
+                added += 1
+        return added
+
+    def _table(self, version: int) -> Tuple[List[int], List[int], List[str]]:
+        """Flatten the ranges of one IP version into disjoint sorted intervals."""
+        table = self._tables.get(version)
+        if table is not None:
+            return table
+
+        starts: List[int] = []
+        ends: List[int] = []
+        labels: List[str] = []
+
+        def emit(start: int, end: int, label: str):
+            if start > end:
+                return
+            if starts and ends[-1] + 1 == start and labels[-1] == label:
+                ends[-1] = end
+                return
+            starts.append(start)
+            ends.append(end)
+            labels.append(label)
+
+        # CIDR blocks are either nested or disjoint: sweep with a stack of
+        # enclosing ranges, letting inner (more specific) ranges win
+        stack: List[Tuple[int, str]] = []
+        cursor = 0
+        for start, end, label in sorted(self._ranges[version], key=lambda r: (r[0], -r[1])):
+            while stack and stack[-1][0] < start:
+                top_end, top_label = stack.pop()
+                emit(cursor, top_end, top_label)
+                cursor = max(cursor, top_end + 1)
+            if stack:
+                emit(cursor, start - 1, stack[-1][1])
+            stack.append((end, label))
+            cursor = start
+        while stack:
+            top_end, top_label = stack.pop()
+            emit(cursor, top_end, top_label)
+            cursor = max(cursor, top_end + 1)
+
+        table = (starts, ends, labels)
+        self._tables[version] = table
+        return table
+
+    def lookup(self, ip: str) -> Optional[str]:
+        """
+        Find the label of the most specific range containing an address.
+
+        Args:
+            ip: IP address string
+
+        Returns:
+            Label, or None if the address is invalid or not in any range
+        """
+        parsed = parse_ip(ip)
+        if parsed is None:
+            return None
+
+        version, value = parsed
+        starts, ends, labels = self._table(version)
+        position = bisect_right(starts, value) - 1
+        if position >= 0 and value <= ends[position]:
+            return labels[position]
+        return None
+
+    def __contains__(self, ip: str) -> bool:
+        return self.lookup(ip) is not None
+
+    def __len__(self) -> int:
+        return sum(len(ranges) for ranges in self._ranges.values())
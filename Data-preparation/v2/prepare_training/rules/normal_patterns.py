@@ -7,6 +7,8 @@ Helps teach the model what normal looks like (as important as suspicious pattern
 
 from typing import Set, List, Tuple, Dict
 
+from rules.ip_intel import IPRangeIndex
+
 # ============================================================================
 # NORMAL PROCESSES
 # ============================================================================
@@ -59,13 +61,13 @@ STANDARD_PORTS: Dict[int, str] = {
 
 # Internal network ranges (RFC1918 private addresses)
 INTERNAL_IP_RANGES: List[str] = [
-    '10.',
-    '192.168.',
-    '172.16.', '172.17.', '172.18.', '172.19.',
-    '172.20.', '172.21.', '172.22.', '172.23.',
-    '172.24.', '172.25.', '172.26.', '172.27.',
-    '172.28.', '172.29.', '172.30.', '172.31.',
-    '127.',  # Localhost
+    '10.0.0.0/8',
+    '172.16.0.0/12',
+    '192.168.0.0/16',
+    '127.0.0.0/8',  # Localhost
+    '::1/128',      # IPv6 localhost
+    'fc00::/7',     # IPv6 unique local addresses
+    'fe80::/10',    # IPv6 link-local
 ]
 
 # Trusted cloud services
@@ -146,6 +148,9 @@ BASELINE_THRESHOLDS: Dict[str, int] = {
 # HELPER FUNCTIONS
 # ============================================================================
 
+_INTERNAL_IP_INDEX = IPRangeIndex((cidr, 'internal') for cidr in INTERNAL_IP_RANGES)
+
+
 def is_internal_ip(ip: str) -> bool:
     """
     Check if IP is in internal/private range.
@@ -156,7 +161,7 @@ def is_internal_ip(ip: str) -> bool:
     Returns:
         True if internal IP
     """
-    return any(ip.startswith(prefix) for prefix in INTERNAL_IP_RANGES)
+    return ip in _INTERNAL_IP_INDEX
 
 
 def is_standard_port(port: int) -> Tuple[bool, str]:
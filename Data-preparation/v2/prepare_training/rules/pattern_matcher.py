@@ -0,0 +1,102 @@
+"""
+Compiled multi-pattern matcher for literal rule patterns.
+
+Builds one regex per pattern list, with the (lowercased) alternation
+factored into a prefix trie, so a single scan of the lowercased input
+reports every pattern it contains. Scan cost depends on the input length,
+not on how many patterns the rule list holds.
+"""
+
+import re
+from typing import Dict, List
+
+
+def _trie_regex(words: List[str]) -> str:
+    """
+    Build a regex alternation factored by common prefixes.
+
+    Optional branches are greedy, so at each position the longest pattern
+    starting there is matched.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class MultiPatternMatcher:
+    """
+    Case-insensitive substring matcher for a fixed list of literal patterns.
+
+    Equivalent to checking `pattern.lower() in text.lower()` for every
+    pattern, but done in one pass over the text.
+    """
+
+    def __init__(self, patterns: List[str]):
+        """
+        Compile the matcher.
+
+        Args:
+            patterns: Literal patterns (matched case-insensitively)
+        """
+        self.patterns = list(patterns)
+
+        self._indexes: Dict[str, List[int]] = {}
+        for index, pattern in enumerate(self.patterns):
+            self._indexes.setdefault(pattern.lower(), []).append(index)
+
+        # A pattern inside a longer one that matched at the same position is
+        # never reported by the regex itself, so report it alongside
+        keys = list(self._indexes)
+        self._contained = {key: [other for other in keys if other != key and other in key] for key in keys}
+
+        # Lowercasing the text once is much cheaper than re.IGNORECASE
+        self._regex = re.compile('(?=(' + _trie_regex(keys) + '))') if keys else None
+
+    def find_all(self, text: str) -> List[int]:
+        """
+        Find every pattern contained in the text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Sorted indexes (into patterns) of all matching patterns
+        """
+        if not text or self._regex is None:
+            return []
+
+        found = set()
+        for match in self._regex.finditer(text.lower()):
+            key = match.group(1)
+            if key in found:
+                continue
+            found.add(key)
+            found.update(self._contained.get(key, []))
+
+        return sorted(index for key in found for index in self._indexes.get(key, []))
+
+    def search(self, text: str) -> bool:
+        """
+        Check whether any pattern occurs in the text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            True if at least one pattern matches
+        """
+        if not text or self._regex is None:
+            return False
+        return self._regex.search(text.lower()) is not None
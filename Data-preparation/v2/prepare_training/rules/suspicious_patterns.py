@@ -11,6 +11,9 @@ Follows Open/Closed Principle - easy to extend with new patterns without modific
 
 from typing import Dict, List, Set, Tuple
 
+from rules.ip_intel import IPRangeIndex
+from rules.pattern_matcher import MultiPatternMatcher
+
 # ============================================================================
 # PROCESS-BASED INDICATORS
 # ============================================================================
@@ -120,6 +123,10 @@ C2_INDICATORS: Dict[str, Dict[str, any]] = {
     'small_periodic_packets': {
         'min_size': 50,
         'max_size': 100,
+        # Periodicity of a flow's inter-arrival times (see analyzers/rate_tracker.py)
+        'min_beacons': 5,         # Packets in a row before the flow can be called periodic
+        'max_jitter': 0.2,        # Max stdev / mean of the inter-arrival times
+        'min_interval_sec': 1.0,  # Shorter intervals are bulk transfer, not beaconing
         'techniques': ['T1071', 'T1571', 'T1090', 'T1572']
     },
     'external_ip_beaconing': {
@@ -139,10 +146,10 @@ C2_INDICATORS: Dict[str, Dict[str, any]] = {
 
 # Suspicious IP ranges (from actual attacks)
 SUSPICIOUS_IP_PATTERNS: List[Tuple[str, str]] = [
-    ('185.', 'Commonly associated with malicious infrastructure'),
-    ('194.', 'Known hosting malicious services'),
-    ('147.185.221.22', 'Documented C2 server from attack traces'),
-    ('150.171.27.10', 'RevengeRAT C2 server from traces'),
+    ('185.0.0.0/8', 'Commonly associated with malicious infrastructure'),
+    ('194.0.0.0/8', 'Known hosting malicious services'),
+    ('147.185.221.22/32', 'Documented C2 server from attack traces'),
+    ('150.171.27.10/32', 'RevengeRAT C2 server from traces'),
 ]
 
 # Download indicators (from download_trace.md)
@@ -167,17 +174,20 @@ DOWNLOAD_INDICATORS: Dict[str, Dict[str, any]] = {
 
 # Ransomware file operations (from ransom_trace.md)
 RANSOMWARE_INDICATORS: Dict[str, any] = {
-    # Thresholds for mass operations
+    # Thresholds for mass operations (events by one process within window_sec)
     'mass_file_creation': {
         'threshold': 20,
+        'window_sec': 300,
         'techniques': ['T1486', 'T1560.001']
     },
     'mass_file_deletion': {
         'threshold': 15,
+        'window_sec': 300,
         'techniques': ['T1485', 'T1486']
     },
     'high_io_burst': {
         'threshold': 50,
+        'window_sec': 60,
         'techniques': ['T1083', 'T1486']
     },
     '7z_spawn_frequency': {
@@ -246,6 +256,58 @@ ATTACK_CHAIN_PATTERNS: List[Dict[str, any]] = [
     }
 ]
 
+# How an analyzed event counts as a step of a chain sequence (see
+# analyzers/chain_correlator.py). An event matches a step when:
+# - its event_type is one of 'event_types' (if given)
+# - it has threat indicators (if 'requires_indicators')
+# - one of its techniques equals or is a sub-technique of one of 'techniques' (if given)
+# A step with 'min_count' completes once that many matching events fall
+# within the pattern's time window.
+CHAIN_STEPS: Dict[str, Dict[str, any]] = {
+    'network_download': {
+        'event_types': ['Network'],
+        'techniques': ['T1105']
+    },
+    'process_execution': {
+        'event_types': ['Process'],
+        'requires_indicators': True
+    },
+    'credential_access': {
+        'techniques': ['T1003']
+    },
+    'network_upload': {
+        'event_types': ['Network'],
+        'requires_indicators': True,
+        'techniques': ['T1041', 'T1048', 'T1071']
+    },
+    '7z_spawn': {
+        'event_types': ['Process', 'File'],
+        'techniques': ['T1560.001'],
+        'min_count': RANSOMWARE_INDICATORS['7z_spawn_frequency']['threshold']
+    },
+    'mass_file_ops': {
+        'event_types': ['File'],
+        'min_count': RANSOMWARE_INDICATORS['mass_file_deletion']['threshold']
+    },
+    'network_activity': {
+        'event_types': ['Network']
+    },
+    'periodic_network': {
+        'event_types': ['Network'],
+        'techniques': ['T1071', 'T1095'],
+        'min_count': 3
+    }
+}
+
+
+# ============================================================================
+# COMPILED MATCHERS (built once at import - extend the pattern lists above)
+# ============================================================================
+
+_COMMAND_MATCHER = MultiPatternMatcher([pattern for pattern, _, _ in SUSPICIOUS_COMMAND_PATTERNS])
+_APPDATA_MATCHER = MultiPatternMatcher(APPDATA_SUSPICIOUS_PATTERNS)
+_SUSPICIOUS_IP_INDEX = IPRangeIndex(SUSPICIOUS_IP_PATTERNS)
+
 
 # ============================================================================
 # HELPER FUNCTIONS
@@ -261,14 +323,7 @@ def get_command_pattern_info(command_line: str) -> List[Tuple[str, str, List[str
     Returns:
         List of (pattern, description, techniques) tuples that matched
     """
-    matches = []
-    command_lower = command_line.lower()
-    
-    for pattern, description, techniques in SUSPICIOUS_COMMAND_PATTERNS:
-        if pattern.lower() in command_lower:
-            matches.append((pattern, description, techniques))
-    
-    return matches
+    return [SUSPICIOUS_COMMAND_PATTERNS[index] for index in _COMMAND_MATCHER.find_all(command_line)]
 
 
 def is_appdata_executable(path: str) -> bool:
@@ -284,8 +339,7 @@ def is_appdata_executable(path: str) -> bool:
     if not path:
         return False
     
-    path_lower = path.lower()
-    return any(pattern.lower() in path_lower for pattern in APPDATA_SUSPICIOUS_PATTERNS)
+    return _APPDATA_MATCHER.search(path)
 
 
 def is_suspicious_ip(ip: str) -> Tuple[bool, str]:
@@ -298,13 +352,27 @@ def is_suspicious_ip(ip: str) -> Tuple[bool, str]:
     Returns:
         (is_suspicious, reason) tuple
     """
-    for pattern, reason in SUSPICIOUS_IP_PATTERNS:
-        if ip.startswith(pattern):
-            return True, reason
+    reason = _SUSPICIOUS_IP_INDEX.lookup(ip)
+    if reason is not None:
+        return True, reason
     
     return False, ""
 
 
+def load_suspicious_ip_feed(path: str, reason: str) -> int:
+    """
+    Add a CIDR feed (threat intel, hosting ranges) to the suspicious IP rules.
+    
+    Args:
+        path: Feed file with one CIDR or IP per line (optional reason column)
+        reason: Reason reported for matches without their own
+        
+    Returns:
+        Number of ranges loaded
+    """
+    return _SUSPICIOUS_IP_INDEX.add_feed(path, reason)
+
+
 def get_port_risk_info(port: int) -> Dict[str, any]:
     """
     Get risk information for a network port.
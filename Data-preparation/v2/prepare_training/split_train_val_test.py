@@ -10,7 +10,8 @@ from typing import List, Dict, Tuple
 from collections import defaultdict
 
 from config import (
-    MERGED_CHUNKS_FILE,
+    CONVERTED_EXAMPLES_FILE,
+    CONVERTED_INDEX_FILE,
     TRAIN_FILE,
     VAL_FILE,
     TEST_FILE,
@@ -18,16 +19,45 @@ from config import (
     VAL_SPLIT,
     TEST_SPLIT,
     FINAL_OUTPUT_DIR,
-    load_mitre_mapping,
-    INSTRUCTION_TEMPLATE
+    BUCKETS_DIR,
+    LENGTH_BUCKETS
 )
+from tokenize_examples import bucket_name
 
-# Import the NEW modular conversion function
-from convert_to_training_format import create_training_example
+# Chunks are converted ONCE by convert_to_training_format.py, which writes
+# converted_examples.jsonl plus an index (session_id, label, byte offset).
+# Splitting works on the index entries and copies the converted lines.
+# When tokenize_examples.py has recorded token counts, each split is also
+# written as length-bucketed shards.
 
 
-# OLD template-based conversion removed - now using the new modular system
-# The new create_training_example() provides field-specific analysis
+def load_converted_index(index_file: Path) -> List[Dict]:
+    """
+    Load the index written by the conversion step
+    
+    Args:
+        index_file: Path to converted_examples.index.json
+        
+    Returns:
+        List of index entries shaped like chunks (metadata.session_id,
+        chunk_label) plus the byte offset/length of the converted line and,
+        once tokenized, its token count
+    """
+    with open(index_file, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    
+    entries = []
+    for session_id, chunk_label, offset, length, *tokens in index:
+        entry = {
+            'metadata': {'session_id': session_id},
+            'chunk_label': chunk_label,
+            'offset': offset,
+            'length': length
+        }
+        if tokens:
+            entry['tokens'] = tokens[0]
+        entries.append(entry)
+    return entries
 
 
 def group_chunks_by_session(chunks: List[Dict]) -> Dict[str, List[Dict]]:
@@ -196,14 +226,66 @@ def split_by_label_and_session(chunks: List[Dict], train_ratio: float, val_ratio
     return train_chunks, val_chunks, test_chunks
 
 
-def save_training_examples(examples: List[Dict], filepath: Path):
-    """Save training examples to JSONL file (one JSON object per line)"""
-    with open(filepath, 'w', encoding='utf-8') as f:
-        for example in examples:
+def save_training_examples(entries: List[Dict], examples_file: Path, filepath: Path):
+    """
+    Save the converted examples of a split to JSONL file (one JSON object per line)
+    
+    Args:
+        entries: Index entries of the split (in output order)
+        examples_file: Intermediate converted_examples.jsonl
+        filepath: Output JSONL path
+    """
+    with open(examples_file, 'rb') as source, open(filepath, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            source.seek(entry['offset'])
+            record = json.loads(source.read(entry['length']))
+            example = {
+                "instruction": record["instruction"],
+                "input": record["input"],
+                "output": record["output"]
+            }
             f.write(json.dumps(example, ensure_ascii=False) + '\n')
     
     file_size_mb = filepath.stat().st_size / (1024 * 1024)
-    print(f"   [+] Saved to: {filepath} ({len(examples):,} lines, {file_size_mb:.1f} MB)")
+    print(f"   [+] Saved to: {filepath} ({len(entries):,} lines, {file_size_mb:.1f} MB)")
+
+
+def save_length_buckets(entries: List[Dict], examples_file: Path, split_name: str):
+    """
+    Save a split as length-bucketed shards (<split>_<bound>.jsonl, <split>_over.jsonl)
+    
+    Examples keep their split order within a bucket and carry 'num_tokens'.
+    
+    Args:
+        entries: Index entries of the split, with token counts
+        examples_file: Intermediate converted_examples.jsonl
+        split_name: 'train', 'val' or 'test'
+    """
+    buckets = defaultdict(list)
+    for entry in entries:
+        buckets[bucket_name(entry['tokens'])].append(entry)
+    
+    BUCKETS_DIR.mkdir(parents=True, exist_ok=True)
+    for old_shard in BUCKETS_DIR.glob(f'{split_name}_*.jsonl'):
+        old_shard.unlink()
+    
+    with open(examples_file, 'rb') as source:
+        for bucket, bucket_entries in buckets.items():
+            with open(BUCKETS_DIR / f'{split_name}_{bucket}.jsonl', 'w', encoding='utf-8') as f:
+                for entry in bucket_entries:
+                    source.seek(entry['offset'])
+                    record = json.loads(source.read(entry['length']))
+                    example = {
+                        "instruction": record["instruction"],
+                        "input": record["input"],
+                        "output": record["output"],
+                        "num_tokens": entry['tokens']
+                    }
+                    f.write(json.dumps(example, ensure_ascii=False) + '\n')
+    
+    order = [str(bound) for bound in LENGTH_BUCKETS] + ['over']
+    sizes = ", ".join(f"{bucket}: {len(buckets[bucket]):,}" for bucket in order if bucket in buckets)
+    print(f"   [+] Length buckets ({split_name}): {sizes}")
 
 
 def main():
@@ -214,44 +296,45 @@ def main():
     print("(Suspicious and normal chunks split separately)")
     print("="*70)
     
-    # Load merged chunks
-    print("\n[*] Loading: {}".format(MERGED_CHUNKS_FILE))
-    with open(MERGED_CHUNKS_FILE, 'r', encoding='utf-8') as f:
-        chunks = json.load(f)
-    print(f"   Loaded {len(chunks):,} chunks")
+    # Load the index of converted examples
+    if not CONVERTED_INDEX_FILE.exists():
+        print(f"\n[!] Converted examples not found: {CONVERTED_INDEX_FILE}")
+        print("    Run convert_to_training_format.py first")
+        return [], [], []
+    
+    print("\n[*] Loading: {}".format(CONVERTED_INDEX_FILE))
+    chunks = load_converted_index(CONVERTED_INDEX_FILE)
+    print(f"   Loaded {len(chunks):,} converted examples")
     
     # Split by label and session (ensures 80/10/10 for both suspicious and normal)
     train_chunks, val_chunks, test_chunks = split_by_label_and_session(
         chunks, TRAIN_SPLIT, VAL_SPLIT, TEST_SPLIT
     )
     
-    # Load MITRE mapping
-    print("\n🔄 Converting to training format...")
-    mitre_mapping = load_mitre_mapping()
-    
-    # Convert each split to training format
-    train_examples = [create_training_example(chunk, mitre_mapping) for chunk in train_chunks]
-    val_examples = [create_training_example(chunk, mitre_mapping) for chunk in val_chunks]
-    test_examples = [create_training_example(chunk, mitre_mapping) for chunk in test_chunks]
-    
-    # Save splits
+    # Save splits (copies already converted examples, no re-analysis)
     print("\n[*] Saving splits...")
-    save_training_examples(train_examples, TRAIN_FILE)
-    save_training_examples(val_examples, VAL_FILE)
-    save_training_examples(test_examples, TEST_FILE)
+    save_training_examples(train_chunks, CONVERTED_EXAMPLES_FILE, TRAIN_FILE)
+    save_training_examples(val_chunks, CONVERTED_EXAMPLES_FILE, VAL_FILE)
+    save_training_examples(test_chunks, CONVERTED_EXAMPLES_FILE, TEST_FILE)
+    
+    # Length-bucketed shards (only when token counts were recorded)
+    if chunks and all('tokens' in chunk for chunk in chunks):
+        print("\n[*] Saving length-bucketed shards...")
+        for split_name, split_chunks in (('train', train_chunks), ('val', val_chunks), ('test', test_chunks)):
+            save_length_buckets(split_chunks, CONVERTED_EXAMPLES_FILE, split_name)
     
     # Print statistics
     print("\n" + "="*70)
     print("[+] SPLITTING COMPLETE")
     print("="*70)
-    print(f"Train: {len(train_examples):,} examples")
-    print(f"Val:   {len(val_examples):,} examples")
-    print(f"Test:  {len(test_examples):,} examples")
-    print(f"Total: {len(train_examples) + len(val_examples) + len(test_examples):,} examples")
+    print(f"Train: {len(train_chunks):,} examples")
+    print(f"Val:   {len(val_chunks):,} examples")
+    print(f"Test:  {len(test_chunks):,} examples")
+    print(f"Total: {len(train_chunks) + len(val_chunks) + len(test_chunks):,} examples")
     print(f"\n📁 Output format: JSONL (one example per line)")
     print(f"📁 Output directory: {FINAL_OUTPUT_DIR}")
     
-    return train_examples, val_examples, test_examples
+    return train_chunks, val_chunks, test_chunks
 
 
 if __name__ == '__main__':
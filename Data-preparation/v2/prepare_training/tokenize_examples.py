@@ -0,0 +1,273 @@
+"""
+Exact token lengths of the converted examples (needs 'transformers')
+Runs the fine-tuning tokenizer over every full prompt (instruction + input +
+output, built exactly as the fine-tuning notebook builds it) in batches and
+records the token count in the converted examples' index.
+
+Examples over MAX_SEQ_TOKENS are either re-chunked (their logs are split in
+halves and each half is converted again, until every part fits) or flagged
+and kept. The split step then writes length-bucketed shards from the counts,
+so fine-tuning can batch examples of similar length with little padding.
+"""
+
+import json
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from tqdm import tqdm
+
+from config import (
+    CONVERTED_EXAMPLES_FILE,
+    CONVERTED_INDEX_FILE,
+    TOKENIZER_MODEL,
+    PROMPT_TEMPLATE,
+    MAX_SEQ_TOKENS,
+    OVER_BUDGET_ACTION,
+    TOKENIZE_BATCH_SIZE,
+    LENGTH_BUCKETS,
+    TOKEN_REPORT_FILE,
+    load_mitre_mapping
+)
+from convert_to_training_format import create_training_example
+from utils import iter_jsonl, get_timestamp
+
+try:
+    from transformers import AutoTokenizer
+except ImportError:  # Optional: only needed for token accounting
+    AutoTokenizer = None
+
+
+def load_tokenizer(model_name: str = TOKENIZER_MODEL):
+    """
+    Load the fine-tuning tokenizer
+    
+    Raises:
+        ImportError: If 'transformers' is not installed
+    """
+    if AutoTokenizer is None:
+        raise ImportError("Token accounting requires the 'transformers' package (pip install transformers)")
+    return AutoTokenizer.from_pretrained(model_name, trust_remote_code=True)
+
+
+def build_full_text(example: Dict) -> str:
+    """Full training text of an example: prompt followed by the output"""
+    return PROMPT_TEMPLATE.format(instruction=example['instruction'], input=example['input']) + example['output']
+
+
+def count_tokens(tokenizer, examples: List[Dict]) -> List[int]:
+    """
+    Exact token counts of a batch of examples (one tokenizer call)
+    
+    Args:
+        tokenizer: Fine-tuning tokenizer
+        examples: Training examples (instruction, input, output)
+    
+    Returns:
+        Token count per example, with special tokens as in fine-tuning
+    """
+    if not examples:
+        return []
+    encoded = tokenizer([build_full_text(example) for example in examples],
+                        add_special_tokens=True, padding=False, truncation=False)
+    return [len(ids) for ids in encoded['input_ids']]
+
+
+def iter_counted(tokenizer, records: Iterable[Dict], batch_size: int) -> Iterator[Tuple[Dict, int]]:
+    """
+    Stream records with their token counts, tokenizing batch_size at a time
+    
+    Yields:
+        (record, token count) in input order
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield from zip(batch, count_tokens(tokenizer, batch))
+            batch = []
+    yield from zip(batch, count_tokens(tokenizer, batch))
+
+
+def split_record(record: Dict, mitre_mapping: Dict) -> List[Dict]:
+    """
+    Split an example's logs in halves and convert each half again
+    
+    Args:
+        record: Converted example (session_id, chunk_label, instruction, input, output)
+        mitre_mapping: MITRE technique ID to name mapping
+    
+    Returns:
+        Two converted records covering the same logs
+    """
+    input_data = json.loads(record['input'])
+    logs = input_data['logs']
+    middle = len(logs) // 2
+    
+    parts = []
+    for part_logs in (logs[:middle], logs[middle:]):
+        metadata = dict(input_data['metadata'],
+                        start_time=get_timestamp(part_logs[0]),
+                        end_time=get_timestamp(part_logs[-1]))
+        chunk = {'metadata': metadata, 'logs': part_logs, 'chunk_label': record['chunk_label']}
+        example = create_training_example(chunk, mitre_mapping)
+        parts.append({'session_id': record['session_id'], 'chunk_label': record['chunk_label'], **example})
+    return parts
+
+
+def fit_to_budget(tokenizer, record: Dict, tokens: int, max_tokens: int, mitre_mapping: Dict) -> List[Tuple[Dict, int]]:
+    """
+    Re-chunk an over-budget example until every part fits
+    
+    A single log that is still over budget is returned as is (flagged).
+    
+    Returns:
+        [(record, token count)] covering the original logs, in order
+    """
+    if tokens <= max_tokens or len(json.loads(record['input'])['logs']) < 2:
+        return [(record, tokens)]
+    
+    parts = split_record(record, mitre_mapping)
+    fitted = []
+    for part, part_tokens in zip(parts, count_tokens(tokenizer, parts)):
+        fitted.extend(fit_to_budget(tokenizer, part, part_tokens, max_tokens, mitre_mapping))
+    return fitted
+
+
+def bucket_name(tokens: int, buckets: List[int] = LENGTH_BUCKETS) -> str:
+    """Length bucket of a token count: its upper bound, or 'over' past the last bucket"""
+    position = bisect_left(buckets, tokens)
+    return str(buckets[position]) if position < len(buckets) else 'over'
+
+
+def percentile(sorted_values: List[int], fraction: float) -> int:
+    """Nearest-rank percentile of a sorted list"""
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def write_tokenized_examples(examples_file: Path, index_file: Path, tokenizer,
+                             max_tokens: int = MAX_SEQ_TOKENS, action: str = OVER_BUDGET_ACTION,
+                             batch_size: int = TOKENIZE_BATCH_SIZE) -> Dict:
+    """
+    Count tokens of every converted example and rewrite the examples and index
+    
+    Index entries become [session_id, chunk_label, byte_offset, byte_length, tokens].
+    
+    Args:
+        examples_file: converted_examples.jsonl (rewritten in place)
+        index_file: converted_examples.index.json (rewritten in place)
+        tokenizer: Fine-tuning tokenizer
+        max_tokens: Token budget per example
+        action: 'rechunk' or 'flag' for examples over budget
+        batch_size: Examples per tokenizer call
+    
+    Returns:
+        Report dict (examples, over_budget, rechunked, flagged, lengths, buckets)
+    """
+    if action not in ('rechunk', 'flag'):
+        raise ValueError(f"Unknown over-budget action: {action} (expected 'rechunk' or 'flag')")
+    
+    mitre_mapping = load_mitre_mapping() if action == 'rechunk' else None
+    report = {'examples': 0, 'over_budget': 0, 'rechunked': 0, 'flagged': [], 'buckets': {}}
+    lengths = []
+    index = []
+    offset = 0
+    
+    tmp_path = examples_file.with_name(examples_file.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        counted = iter_counted(tokenizer, iter_jsonl(examples_file), batch_size)
+        for record, tokens in tqdm(counted, desc="   Tokenizing"):
+            fitted = [(record, tokens)]
+            if tokens > max_tokens:
+                report['over_budget'] += 1
+                if action == 'rechunk':
+                    fitted = fit_to_budget(tokenizer, record, tokens, max_tokens, mitre_mapping)
+                    if len(fitted) > 1:
+                        report['rechunked'] += 1
+            
+            for part, part_tokens in fitted:
+                if part_tokens > max_tokens:
+                    report['flagged'].append({'session_id': part['session_id'], 'chunk_label': part['chunk_label'],
+                                              'tokens': part_tokens, 'offset': offset})
+                
+                line = (json.dumps(part, ensure_ascii=False) + '\n').encode('utf-8')
+                f.write(line)
+                index.append([part['session_id'], part['chunk_label'], offset, len(line), part_tokens])
+                offset += len(line)
+                
+                lengths.append(part_tokens)
+                bucket = bucket_name(part_tokens)
+                report['buckets'][bucket] = report['buckets'].get(bucket, 0) + 1
+    tmp_path.replace(examples_file)
+    
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    
+    lengths.sort()
+    report['examples'] = len(lengths)
+    report['lengths'] = {
+        'max_tokens': max_tokens,
+        'mean': round(sum(lengths) / len(lengths), 1) if lengths else 0,
+        'p50': percentile(lengths, 0.5),
+        'p90': percentile(lengths, 0.9),
+        'p99': percentile(lengths, 0.99),
+        'max': lengths[-1] if lengths else 0
+    }
+    return report
+
+
+def print_token_report(report: Dict):
+    """
+    Print token length percentiles and bucket counts
+    
+    Args:
+        report: Report from write_tokenized_examples()
+    """
+    lengths = report['lengths']
+    print(f"\n   Examples: {report['examples']:,} (budget: {lengths['max_tokens']:,} tokens)")
+    print(f"   Tokens: mean {lengths['mean']:,.0f} | p50 {lengths['p50']:,} | p90 {lengths['p90']:,}"
+          f" | p99 {lengths['p99']:,} | max {lengths['max']:,}")
+    print(f"   Over budget: {report['over_budget']:,} (re-chunked: {report['rechunked']:,},"
+          f" still over budget: {len(report['flagged']):,})")
+    print("   Buckets:")
+    for bucket in [str(bound) for bound in LENGTH_BUCKETS] + ['over']:
+        if bucket in report['buckets']:
+            label = f"<= {int(bucket):,}" if bucket != 'over' else f"> {LENGTH_BUCKETS[-1]:,}"
+            print(f"     {label:>10}: {report['buckets'][bucket]:,}")
+
+
+def main(tokenizer=None):
+    """
+    Count tokens of the converted examples, re-chunking or flagging over-budget ones
+    
+    Args:
+        tokenizer: Fine-tuning tokenizer (loaded with load_tokenizer if not given)
+    """
+    print("="*70)
+    print("TOKEN-LENGTH ACCOUNTING")
+    print(f"Tokenizer: {TOKENIZER_MODEL} | Budget: {MAX_SEQ_TOKENS:,} tokens | Over budget: {OVER_BUDGET_ACTION}")
+    print("="*70)
+    
+    if not CONVERTED_EXAMPLES_FILE.exists():
+        print(f"\n[!] Converted examples not found: {CONVERTED_EXAMPLES_FILE}")
+        print("    Run convert_to_training_format.py first")
+        return None
+    
+    if tokenizer is None:
+        tokenizer = load_tokenizer()
+    print(f"\n📂 Loading: {CONVERTED_EXAMPLES_FILE}")
+    report = write_tokenized_examples(CONVERTED_EXAMPLES_FILE, CONVERTED_INDEX_FILE, tokenizer)
+    print_token_report(report)
+    
+    TOKEN_REPORT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(TOKEN_REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Report saved to: {TOKEN_REPORT_FILE}")
+    
+    return report
+
+
+if __name__ == '__main__':
+    main()
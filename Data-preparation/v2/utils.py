@@ -2,10 +2,18 @@
 Utility functions shared across the pipeline
 """
 
+import io
 import json
 import hashlib
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Any, IO, Iterable, Iterator
+
+try:
+    import zstandard
+except ImportError:  # Optional: only needed for .zst files
+    zstandard = None
+
+from chunk_dataset import is_chunk_dataset, iter_chunks
 
 
 def load_json_file(filepath: Path) -> Any:
@@ -39,6 +47,133 @@ def save_json_file(data: Any, filepath: Path, indent: int = 2):
         json.dump(data, f, indent=indent, ensure_ascii=False)
 
 
+def open_text(filepath: Path, mode: str = 'r') -> IO[str]:
+    """
+    Open a text file for reading or writing, zstd-compressed if it ends in .zst
+    
+    Args:
+        filepath: File path (.jsonl or .jsonl.zst)
+        mode: 'r' or 'w'
+        
+    Returns:
+        Text file object (UTF-8)
+    """
+    filepath = Path(filepath)
+    if mode == 'w':
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+    
+    if filepath.suffix != '.zst':
+        return open(filepath, mode, encoding='utf-8')
+    
+    if zstandard is None:
+        raise ImportError("Reading/writing .zst files requires the 'zstandard' package (pip install zstandard)")
+    
+    if mode == 'w':
+        stream = zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(open(filepath, 'wb'), closefd=True)
+    else:
+        stream = zstandard.ZstdDecompressor().stream_reader(open(filepath, 'rb'), closefd=True)
+    return io.TextIOWrapper(stream, encoding='utf-8')
+
+
+def iter_jsonl(filepath: Path) -> Iterator[Dict]:
+    """
+    Stream records from a JSONL file (one JSON object per line)
+    Only one record is held in memory at a time
+    
+    Legacy .json files (one JSON array) are still accepted, but are
+    loaded whole. Chunk dataset directories (see chunk_dataset.py) are read
+    shard by shard.
+    
+    Args:
+        filepath: Path to .jsonl, .jsonl.zst or .json file, or a chunk dataset
+        
+    Yields:
+        Parsed records in file order
+    """
+    filepath = Path(filepath)
+    if is_chunk_dataset(filepath):
+        yield from iter_chunks(filepath)
+        return
+    
+    if filepath.suffix == '.json':
+        yield from load_json_file(filepath)
+        return
+    
+    with open_text(filepath, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise Exception(f"Error loading {filepath} (line {line_number}): {e}")
+
+
+class JsonlWriter:
+    """
+    Incremental JSONL writer, for stages that write several outputs at once
+    
+    The file is written to a temporary path and renamed when the writer is
+    closed without error, so an interrupted run leaves no partial output.
+    
+    Usage:
+        with JsonlWriter(path) as writer:
+            writer.write(record)
+    """
+    
+    def __init__(self, filepath: Path):
+        """
+        Open the writer
+        
+        Args:
+            filepath: Path to .jsonl or .jsonl.zst file
+        """
+        self.filepath = Path(filepath)
+        self.tmp_path = self.filepath.with_name(self.filepath.name + '.tmp' + ''.join(self.filepath.suffixes[-1:]))
+        self.count = 0
+        self._file = open_text(self.tmp_path, 'w')
+    
+    def write(self, record: Dict):
+        """Write one record as a line"""
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+        self.count += 1
+    
+    def close(self, commit: bool = True):
+        """Close the file; rename it into place if commit, else discard it"""
+        self._file.close()
+        if commit:
+            self.tmp_path.replace(self.filepath)
+        else:
+            self.tmp_path.unlink(missing_ok=True)
+    
+    def __enter__(self) -> 'JsonlWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
+
+def write_jsonl(records: Iterable[Dict], filepath: Path) -> int:
+    """
+    Stream records to a JSONL file (one JSON object per line)
+    
+    Records are written as they are produced, so generator stages never
+    materialize the full dataset.
+    
+    Args:
+        records: Iterable of records (usually a generator)
+        filepath: Path to .jsonl or .jsonl.zst file
+        
+    Returns:
+        Number of records written
+    """
+    with JsonlWriter(filepath) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
 def get_log_signature(log: Dict) -> str:
     """
     Create a signature for the log based on all fields
@@ -117,18 +252,23 @@ def print_stats(title: str, stats: Dict[str, Any]):
     print('='*70)
 
 
-def count_logs_by_session(logs: List[Dict]) -> Dict[str, int]:
+def count_logs_by_session(logs: Iterable[Dict]) -> Dict[str, int]:
     """
     Count logs per session
     
     Args:
-        logs: List of log objects
+        logs: Log objects (list or stream), or the directory of an event
+              store (counts are then read from its Parquet footers)
         
     Returns:
         Dictionary mapping session_id to count
     """
     from collections import defaultdict
     
+    if isinstance(logs, (str, Path)) and Path(logs).is_dir():
+        from event_store import count_logs_by_session as count_store_logs
+        return count_store_logs(logs)
+    
     session_counts = defaultdict(int)
     for log in logs:
         session_id = log.get('session_id', 'unknown')
@@ -1,8 +1,15 @@
 """Log parsing functions for different log types."""
 import json
 import os
+import sys
 import hashlib
 
+# Shared deduplication engine and PCAP reader from the data preparation pipeline
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'Data-preparation', 'v2'))
+from dedup import iter_unique, canonical_items_bytes
+from pcap_reader import iter_packet_events
+
 
 def anonymize_id(value):
     """Anonymize machine-specific IDs by hashing."""
@@ -136,84 +143,35 @@ def parse_system_logs(sys_path):
     return events
 
 
-def parse_pcap_logs(pcap_path):
-    """Parse PCAP file using Scapy to preserve all packet data without loss."""
-    try:
-        import scapy.all as scapy
-    except ImportError:
-        print("Error: Scapy not installed. Install with: pip install scapy")
-        return []
-    
-    from datetime import datetime, timezone
-    events = []
-    
+def iter_pcap_logs(pcap_path):
+    """
+    Stream the packets of a PCAP/PCAPNG file as network events.
+    Headers are decoded with the shared struct-based reader, one packet at
+    a time, so memory stays constant however large the capture is.
+    """
+    count = 0
     try:
-        print("Reading PCAP file with Scapy...")
-        packets = scapy.rdpcap(pcap_path)
-        
-        for i, pkt in enumerate(packets):
-            raw_timestamp = float(pkt.time) if hasattr(pkt, 'time') else None
-            timestamp = None
-            
-            if raw_timestamp:
-                try:
-                    dt = datetime.fromtimestamp(raw_timestamp, tz=timezone.utc)
-                    timestamp = dt.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
-                except Exception as e:
-                    print(f"Network log timestamp error for packet {i+1}: {str(e)}")
-                    timestamp = None
-            
-            # Preserve all packet data
-            event = {
-                'timestamp': timestamp,
-                'event_type': 'network',
-                'packet_number': i + 1,
-                'length': len(pkt),
-                'summary': pkt.summary(),
-                'raw_hex': "",
-                'layers': {}
-            }
-            
-            # Extract information from each layer
-            for layer in pkt.layers():
-                layer_name = layer.__name__
-                layer_data = {}
-                if hasattr(pkt[layer], 'fields'):
-                    for field_name, field_value in pkt[layer].fields.items():
-                        if hasattr(field_value, '__str__'):
-                            layer_data[field_name] = str(field_value)
-                        else:
-                            layer_data[field_name] = field_value
-                event['layers'][layer_name] = layer_data
-            
-            events.append(event)
-        
-        print(f"Parsed {len(events)} network packets")
+        print("Reading PCAP file...")
+        for event in iter_packet_events(pcap_path):
+            count += 1
+            yield event
+        print(f"Parsed {count} network packets")
         
     except Exception as e:
-        print(f"Error parsing PCAP with Scapy: {e}")
-    
-    return events
+        print(f"Error parsing PCAP after {count} packets: {e}")
+
+
+def parse_pcap_logs(pcap_path):
+    """Parse PCAP file to a list of network events (see iter_pcap_logs)."""
+    return list(iter_pcap_logs(pcap_path))
 
 
 def remove_duplicates(events):
     """Identify exact duplicates while preserving event order and integrity."""
-    seen_events = set()
-    unique_events = []
-    duplicates = 0
-    
-    for event in events:
-        # Create a frozen set of event items for hashing
-        event_items = frozenset(
-            (k, str(v)) for k, v in event.items() 
-            if v is not None  # Ignore None values
-        )
-        
-        if event_items not in seen_events:
-            seen_events.add(event_items)
-            unique_events.append(event)
-        else:
-            duplicates += 1
+    # Events compare equal when their non-None fields match as strings
+    stats = {}
+    unique_events = list(iter_unique(events, key=canonical_items_bytes, stats=stats))
+    duplicates = stats['duplicates']
     
     if duplicates:
         print(f"Removed {duplicates} exact duplicate events")
@@ -10,14 +10,18 @@ from gdrive_helper import (
     get_processed_sessions
 )
 from log_parser import (
-    parse_browser_logs, parse_system_logs, parse_pcap_logs,
+    parse_browser_logs, parse_system_logs, parse_pcap_logs, iter_pcap_logs,
     remove_duplicates, standardize_timestamps
 )
+from flow_builder import aggregate_flows  # Shared module, on sys.path via log_parser
 
 load_dotenv()
 
 TEMP_DOWNLOAD_DIR = "temp_downloads"
 
+# Collapse network packets into bidirectional flow records (False = keep one event per packet)
+AGGREGATE_FLOWS = True
+
 
 def get_env_or_fail(var):
     """Get environment variable or exit if not set."""
@@ -112,7 +116,13 @@ def merge_and_clean_logs(pcap_paths, browser_paths, sys_paths, session_name):
         for pcap_path in pcap_paths:
             if pcap_path and os.path.exists(pcap_path):
                 print(f"\nProcessing PCAP: {pcap_path}")
-                all_events.extend(parse_pcap_logs(pcap_path))
+                if AGGREGATE_FLOWS:
+                    # Packets stream straight into the flow builder
+                    flows = aggregate_flows(iter_pcap_logs(pcap_path))
+                    print(f"Aggregated into {len(flows)} flow records")
+                    all_events.extend(flows)
+                else:
+                    all_events.extend(parse_pcap_logs(pcap_path))
     
     # Process all Browser logs
     if browser_paths:
@@ -3,9 +3,13 @@ Application configuration management.
 Loads environment variables and provides typed settings.
 """
 from pydantic_settings import BaseSettings
+from pathlib import Path
 from typing import List
 
 
+DEFAULT_MODEL_SERVER_AUTHKEY = "mitre-model-server"
+
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
@@ -34,11 +38,27 @@ class Settings(BaseSettings):
     TEMPERATURE: float = 0.7
     TOP_P: float = 0.9
     
+
+    INFERENCE_MODE: str = "local"  # local (model in this process) or remote (model servers)
+    MODEL_SERVER_ADDRESSES: str = "127.0.0.1:6001"
+    MODEL_SERVER_AUTHKEY: str = DEFAULT_MODEL_SERVER_AUTHKEY  # serve.py generates a random key when unset
+    MODEL_SERVER_CONNECTIONS: int = 4
+    MODEL_SERVER_MAX_BATCH_SIZE: int = 4
+    MODEL_SERVER_MAX_WAIT_MS: float = 20.0
+    
+
+    RULES_DIR: str = str(Path(__file__).resolve().parent.parent.parent.parent / "Data-preparation" / "v2" / "prepare_training")
+    
     @property
     def cors_origins_list(self) -> List[str]:
         """Parse CORS origins from comma-separated string."""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
+    @property
+    def model_server_addresses_list(self) -> List[str]:
+        """Parse model server addresses from comma-separated string."""
+        return [address.strip() for address in self.MODEL_SERVER_ADDRESSES.split(",") if address.strip()]
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
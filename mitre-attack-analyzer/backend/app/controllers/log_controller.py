@@ -536,7 +536,8 @@ async def get_session_details(session_id: str, skip: int = 0, limit: int = 50):
                 "analysis_result": c.analysis_result,
                 "analyzed_at": c.analyzed_at.isoformat() if c.analyzed_at else None,
                 "start_time": c.start_time,
-                "end_time": c.end_time
+                "end_time": c.end_time,
+                "risk_score": (c.logs_metadata or {}).get("risk_score", 0)
             }
             for c in chunks
         ]
@@ -561,6 +562,38 @@ async def get_session_details(session_id: str, skip: int = 0, limit: int = 50):
         )
 
 
+@router.get("/sessions/{session_id}/queue", response_model=dict)
+async def get_analysis_queue(session_id: str, limit: int = 1000):
+    """
+    Get the unanalyzed chunks of a session in analysis priority order.
+    
+    Chunks are scored with the suspicious pattern rules at upload time, so
+    high-risk chunks come first and reach the model before the rest.
+    """
+    try:
+        entries = await session_chunk_repository.find_analysis_queue(session_id, limit)
+        
+        return {
+            "session_id": session_id,
+            "count": len(entries),
+            "queue": [
+                {
+                    "chunk_index": e.chunk_index,
+                    "risk_score": e.logs_metadata.get("risk_score", 0),
+                    "risk_indicators": e.logs_metadata.get("risk_indicators", [])
+                }
+                for e in entries
+            ]
+        }
+        
+    except Exception as e:
+        logger.error(f"Error fetching analysis queue: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch analysis queue: {str(e)}"
+        )
+
+
 @router.get("/sessions/{session_id}/chunks/{chunk_index}", response_model=dict)
 async def get_chunk_data(session_id: str, chunk_index: int):
     """Get the log data for a specific chunk."""
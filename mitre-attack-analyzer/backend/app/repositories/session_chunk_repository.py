@@ -6,11 +6,18 @@ Handles database interactions for session chunks
 from typing import List, Optional
 from datetime import datetime
 from beanie import PydanticObjectId
+from pydantic import BaseModel
 from loguru import logger
 
 from app.models.session_chunk_model import SessionChunk
 
 
+class ChunkQueueEntry(BaseModel):
+    """Projection of a chunk used to build the analysis queue"""
+    chunk_index: int
+    logs_metadata: dict = {}
+
+
 class SessionChunkRepository:
     """Repository for session chunk data access"""
     
@@ -72,6 +79,25 @@ class SessionChunkRepository:
         
         return chunks, total
     
+    async def find_analysis_queue(self, session_id: str, limit: int = 1000) -> List[ChunkQueueEntry]:
+        """
+        Find unanalyzed chunks of a session ordered by rule-derived risk
+        Highest risk_score first, ties broken by chunk_index
+        
+        Args:
+            session_id: Session identifier
+            limit: Maximum chunks to return
+            
+        Returns:
+            List of chunk queue entries (chunk_index and metadata only)
+        """
+        return await SessionChunk.find(
+            SessionChunk.session_id == session_id,
+            SessionChunk.is_analyzed == False
+        ).sort(
+            "-logs_metadata.risk_score", "+chunk_index"
+        ).limit(limit).project(ChunkQueueEntry).to_list()
+    
     async def find_chunk_by_id(self, chunk_id: str) -> Optional[SessionChunk]:
         """
         Find a chunk by its ID
@@ -8,6 +8,8 @@ from typing import List, Dict, Any
 from datetime import datetime
 from loguru import logger
 
+from app.services.risk_scoring_service import risk_scoring_service
+
 
 class ChunkingService:
     """Service to chunk full session logs into smaller pieces"""
@@ -110,7 +112,8 @@ class ChunkingService:
         chunk: List[Dict[str, Any]], 
         chunk_index: int, 
         session_id: str,
-        total_chunks: int
+        total_chunks: int,
+        correlation: Dict[str, List] = None
     ) -> Dict[str, Any]:
         """
         Create metadata for a chunk
@@ -120,6 +123,8 @@ class ChunkingService:
             chunk_index: Index of this chunk in the session
             session_id: Session identifier
             total_chunks: Total number of chunks in session
+            correlation: Rate indicators and attack chains found in this chunk
+                         (may span earlier chunks, see correlate_session)
             
         Returns:
             Metadata dictionary
@@ -137,6 +142,14 @@ class ChunkingService:
             "created_at": datetime.utcnow().isoformat()
         }
         
+        metadata.update(risk_scoring_service.score_chunk(chunk))
+        
+        correlation = correlation or {"rate_indicators": [], "attack_chains": []}
+        metadata["attack_chains"] = correlation["attack_chains"]
+        session_risk = risk_scoring_service.score_correlations(correlation)
+        metadata["risk_score"] += session_risk["risk_score"]
+        metadata["risk_indicators"].extend(session_risk["risk_indicators"])
+        
         return metadata
     
     def chunk_session_logs(
@@ -164,9 +177,11 @@ class ChunkingService:
             logger.info(f"Created {len(chunks)} chunks from session {session_id}")
             
 
+            correlations = risk_scoring_service.correlate_session(chunks, session_id)
+            
             chunk_objects = []
             for idx, chunk in enumerate(chunks):
-                metadata = self.create_chunk_metadata(chunk, idx, session_id, len(chunks))
+                metadata = self.create_chunk_metadata(chunk, idx, session_id, len(chunks), correlations[idx])
                 
                 chunk_obj = {
                     "metadata": metadata,
@@ -6,7 +6,7 @@ import json
 import re
 import os
 from transformers import AutoModelForCausalLM, AutoTokenizer
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 from loguru import logger
 from app.config import settings
 
@@ -69,6 +69,8 @@ class MLService:
             )
             # Set pad token (transformers default)
             self.tokenizer.pad_token = self.tokenizer.eos_token
+            # Left padding so batched prompts all end where generation starts
+            self.tokenizer.padding_side = "left"
             logger.success("✅ Tokenizer loaded!")
             logger.info(f"   EOS token: {self.tokenizer.eos_token}")
             
@@ -236,6 +238,153 @@ Response:
         
         return result
     
+    def _validate_log_content(self, log_content: str) -> str:
+        """
+        Validate JSON if the log content looks like JSON.
+        
+        Args:
+            log_content: Log content as string
+            
+        Returns:
+            Error message, or empty string if the content is usable
+        """
+        if log_content.strip().startswith('{') or log_content.strip().startswith('['):
+            try:
+                json.loads(log_content)
+            except json.JSONDecodeError as e:
+                return str(e)
+        return ""
+    
+    def _generate(self, prompts: List[str]) -> List[Dict[str, any]]:
+        """
+        Run the model on one or more prompts in a single generate() call.
+        
+        Prompts are left-padded so that every sequence in the batch ends
+        right where generation starts.
+        
+        Args:
+            prompts: Formatted prompts
+            
+        Returns:
+            List of dicts with generated_text, prompt_tokens and generated_tokens
+        """
+        # Tokenize
+        inputs = self.tokenizer(
+            prompts,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=settings.MAX_LENGTH_TOKENS
+        )
+        inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
+        
+        # Generate with sampling (EXACT MATCH TO NOTEBOOK EVALUATION)
+        logger.info(f"Generating prediction for {len(prompts)} prompt(s)...")
+        logger.info(f"Settings: temp={settings.TEMPERATURE}, top_p={settings.TOP_P}, max_tokens={settings.MAX_NEW_TOKENS}")
+        
+        # Use tokenizer's default EOS token (don't override)
+        logger.info(f"Using default EOS token ID: {self.tokenizer.eos_token_id} ({self.tokenizer.eos_token})")
+        
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=settings.MAX_NEW_TOKENS,
+                temperature=settings.TEMPERATURE,  # 0.7 like notebook
+                do_sample=True,  # Enable sampling like notebook
+                top_p=settings.TOP_P,  # Nucleus sampling
+                pad_token_id=self.tokenizer.eos_token_id,
+                eos_token_id=self.tokenizer.eos_token_id  # Use tokenizer's default
+            )
+        
+        # Decode only the generated part of each sequence
+        prompt_length = inputs['input_ids'].shape[1]
+        prompt_token_counts = inputs['attention_mask'].sum(dim=1).tolist()
+        
+        generations = []
+        for i, output in enumerate(outputs):
+            generated_ids = output[prompt_length:]
+            generations.append({
+                "generated_text": self.tokenizer.decode(generated_ids, skip_special_tokens=True),
+                "prompt_tokens": int(prompt_token_counts[i]),
+                "generated_tokens": int((generated_ids != self.tokenizer.eos_token_id).sum().item())
+            })
+        
+        return generations
+    
+    def _clean_generated_text(self, generated_text: str) -> str:
+        """
+        Remove conversational follow-ups and unwanted continuations.
+        
+        The model sometimes continues generating after the Reason, adding
+        conversational text. Be VERY aggressive with stopping patterns.
+        
+        Args:
+            generated_text: Decoded model output
+            
+        Returns:
+            Trimmed model output
+        """
+        logger.info(f"Generated {len(generated_text)} characters (before cleanup)")
+        
+        stopping_patterns = [
+            "\n\nPlease",           # Any "Please" continuation
+            "\n\nHuman:",           # Chat-style continuation
+            "\n\nAssistant:",       # Chat-style continuation  
+            "\n\nInput:",           # Trying to analyze another log
+            "\n\n### Example",      # Trying to give more examples
+            "\n\nCan you",          # Asking follow-up questions
+            "\n\nNote:",            # Additional notes
+            "\n\n###",              # New section markers
+            "\n\n---",              # Separator lines
+            "\n\nI ",               # First-person continuation
+            "\n\nThe analysis",     # Meta-commentary
+            "\nHuman:",             # Single newline variant
+            "\nAssistant:",         # Single newline variant
+            "Human:",               # No newline at all
+            "Assistant:",           # No newline at all
+            "\nPlease provide",     # Asking for more details
+            "\nI want to",          # Conversational continuation
+            "\nFor example,",       # Providing examples
+            "\nThank you",          # Polite endings
+            "\nCould you",          # Questions
+            "\nWould you",          # Questions
+        ]
+        
+        original_length = len(generated_text)
+        for pattern in stopping_patterns:
+            if pattern in generated_text:
+                generated_text = generated_text.split(pattern)[0]
+                logger.info(f"✂️ Trimmed at '{pattern}': {original_length} -> {len(generated_text)} chars")
+                break
+        
+        # Additional aggressive trimming: if we see anything that looks like a question or continuation
+        # after "Reason:", cut it off
+        lines = generated_text.split('\n')
+        clean_lines = []
+        found_reason = False
+        
+        for line in lines:
+            clean_lines.append(line)
+            if line.strip().startswith('Reason:'):
+                found_reason = True
+            # After finding Reason, stop at any line that looks conversational
+            elif found_reason and line.strip():
+                # Check if this line looks like conversational continuation
+                lower_line = line.lower().strip()
+                if any(lower_line.startswith(phrase) for phrase in [
+                    'please', 'human:', 'assistant:', 'i want', 'could you', 
+                    'would you', 'for example', 'thank you', 'can you'
+                ]):
+                    clean_lines.pop()  # Remove this line
+                    logger.info(f"✂️ Removed conversational line after Reason: '{line[:50]}...'")
+                    break
+        
+        generated_text = '\n'.join(clean_lines).rstrip()
+        
+        logger.info(f"Final output: {len(generated_text)} characters")
+        
+        return generated_text
+    
     async def analyze_log(self, log_content: str) -> Tuple[str, str, list, str, str]:
         """
         Analyze a log chunk and return classification results.
@@ -251,11 +400,9 @@ Response:
         
         try:
             # Validate JSON if it looks like JSON
-            if log_content.strip().startswith('{') or log_content.strip().startswith('['):
-                try:
-                    json.loads(log_content)
-                except json.JSONDecodeError as e:
-                    return "Error", f"Invalid JSON: {str(e)}", [], "", str(e)
+            error = self._validate_log_content(log_content)
+            if error:
+                return "Error", f"Invalid JSON: {error}", [], "", error
             
             # Format prompt
             prompt = self._format_prompt(log_content)
@@ -267,100 +414,8 @@ Response:
             logger.info(f"Last 100 chars: {prompt[-100:]}")
             logger.info("=" * 80)
             
-            # Tokenize
-            inputs = self.tokenizer(
-                prompt,
-                return_tensors="pt",
-                truncation=True,
-                max_length=settings.MAX_LENGTH_TOKENS
-            )
-            inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
-            
-            # Generate with sampling (EXACT MATCH TO NOTEBOOK EVALUATION)
-            logger.info("Generating prediction...")
-            logger.info(f"Settings: temp={settings.TEMPERATURE}, top_p={settings.TOP_P}, max_tokens={settings.MAX_NEW_TOKENS}")
-            
-            # Use tokenizer's default EOS token (don't override)
-            logger.info(f"Using default EOS token ID: {self.tokenizer.eos_token_id} ({self.tokenizer.eos_token})")
-            
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_new_tokens=settings.MAX_NEW_TOKENS,
-                    temperature=settings.TEMPERATURE,  # 0.7 like notebook
-                    do_sample=True,  # Enable sampling like notebook
-                    top_p=settings.TOP_P,  # Nucleus sampling
-                    pad_token_id=self.tokenizer.eos_token_id,
-                    eos_token_id=self.tokenizer.eos_token_id  # Use tokenizer's default
-                )
-            
-            # Decode
-            generated_text = self.tokenizer.decode(
-                outputs[0][inputs['input_ids'].shape[1]:],
-                skip_special_tokens=True
-            )
-            
-            logger.info(f"Generated {len(generated_text)} characters (before cleanup)")
-            
-            # Post-process: Remove conversational follow-ups and unwanted continuations
-            # The model sometimes continues generating after the Reason, adding conversational text
-            # Be VERY aggressive with stopping patterns
-            stopping_patterns = [
-                "\n\nPlease",           # Any "Please" continuation
-                "\n\nHuman:",           # Chat-style continuation
-                "\n\nAssistant:",       # Chat-style continuation  
-                "\n\nInput:",           # Trying to analyze another log
-                "\n\n### Example",      # Trying to give more examples
-                "\n\nCan you",          # Asking follow-up questions
-                "\n\nNote:",            # Additional notes
-                "\n\n###",              # New section markers
-                "\n\n---",              # Separator lines
-                "\n\nI ",               # First-person continuation
-                "\n\nThe analysis",     # Meta-commentary
-                "\nHuman:",             # Single newline variant
-                "\nAssistant:",         # Single newline variant
-                "Human:",               # No newline at all
-                "Assistant:",           # No newline at all
-                "\nPlease provide",     # Asking for more details
-                "\nI want to",          # Conversational continuation
-                "\nFor example,",       # Providing examples
-                "\nThank you",          # Polite endings
-                "\nCould you",          # Questions
-                "\nWould you",          # Questions
-            ]
-            
-            original_length = len(generated_text)
-            for pattern in stopping_patterns:
-                if pattern in generated_text:
-                    generated_text = generated_text.split(pattern)[0]
-                    logger.info(f"✂️ Trimmed at '{pattern}': {original_length} -> {len(generated_text)} chars")
-                    break
-            
-            # Additional aggressive trimming: if we see anything that looks like a question or continuation
-            # after "Reason:", cut it off
-            lines = generated_text.split('\n')
-            clean_lines = []
-            found_reason = False
-            
-            for line in lines:
-                clean_lines.append(line)
-                if line.strip().startswith('Reason:'):
-                    found_reason = True
-                # After finding Reason, stop at any line that looks conversational
-                elif found_reason and line.strip():
-                    # Check if this line looks like conversational continuation
-                    lower_line = line.lower().strip()
-                    if any(lower_line.startswith(phrase) for phrase in [
-                        'please', 'human:', 'assistant:', 'i want', 'could you', 
-                        'would you', 'for example', 'thank you', 'can you'
-                    ]):
-                        clean_lines.pop()  # Remove this line
-                        logger.info(f"✂️ Removed conversational line after Reason: '{line[:50]}...'")
-                        break
-            
-            generated_text = '\n'.join(clean_lines).rstrip()
-            
-            logger.info(f"Final output: {len(generated_text)} characters")
+            generation = self._generate([prompt])[0]
+            generated_text = self._clean_generated_text(generation["generated_text"])
             
             # Parse output
             result = self._parse_output(generated_text)
@@ -377,10 +432,77 @@ Response:
             logger.error(f"Analysis error: {str(e)}")
             return "Error", f"Analysis failed: {str(e)}", [], "", str(e)
     
+    def analyze_batch(self, log_contents: List[str]) -> List[Dict[str, any]]:
+        """
+        Analyze several log chunks with one batched generate() call.
+        
+        Used by offline tooling (batch inference, benchmarks) where chunks
+        are not tied to a request. Invalid chunks get an error result and
+        are left out of the batch.
+        
+        Args:
+            log_contents: Log contents as strings (JSON format expected)
+            
+        Returns:
+            List of dicts with status, reason, mitre_techniques, raw_output,
+            error, prompt_tokens and generated_tokens (same order as input)
+        """
+        results = [None] * len(log_contents)
+        
+        if not self._model_loaded:
+            error = "Model not initialized. Please wait for model loading."
+            return [self._error_result("Model not loaded", error) for _ in log_contents]
+        
+        batch_positions = []
+        prompts = []
+        for i, log_content in enumerate(log_contents):
+            error = self._validate_log_content(log_content)
+            if error:
+                results[i] = self._error_result(f"Invalid JSON: {error}", error)
+            else:
+                batch_positions.append(i)
+                prompts.append(self._format_prompt(log_content))
+        
+        if not prompts:
+            return results
+        
+        try:
+            generations = self._generate(prompts)
+        except Exception as e:
+            logger.error(f"Batch analysis error: {str(e)}")
+            for i in batch_positions:
+                results[i] = self._error_result(f"Analysis failed: {str(e)}", str(e))
+            return results
+        
+        for i, generation in zip(batch_positions, generations):
+            result = self._parse_output(self._clean_generated_text(generation["generated_text"]))
+            result["error"] = ""
+            result["prompt_tokens"] = generation["prompt_tokens"]
+            result["generated_tokens"] = generation["generated_tokens"]
+            results[i] = result
+        
+        return results
+    
+    def _error_result(self, reason: str, error: str) -> Dict[str, any]:
+        """Build a batch result entry for a chunk that could not be analyzed."""
+        return {
+            "status": "Error",
+            "reason": reason,
+            "mitre_techniques": [],
+            "raw_output": "",
+            "error": error,
+            "prompt_tokens": 0,
+            "generated_tokens": 0
+        }
+    
     def is_loaded(self) -> bool:
         """Check if model is loaded."""
         return self._model_loaded
 
 
-# Global ML service instance
-ml_service = MLService()
+# Global ML service instance (model servers handle inference in remote mode)
+if settings.INFERENCE_MODE == "remote":
+    from app.services.model_client import RemoteMLService
+    ml_service = RemoteMLService(settings.model_server_addresses_list, settings.MODEL_SERVER_CONNECTIONS)
+else:
+    ml_service = MLService()
@@ -0,0 +1,149 @@
+"""
+Remote ML Service - Forwards inference from API workers to model servers.
+
+Used instead of MLService when INFERENCE_MODE=remote, so that API workers
+stay stateless (no model in memory) and can be scaled with uvicorn --workers.
+Exposes the same interface as MLService.
+"""
+import asyncio
+import time
+from multiprocessing.connection import Client
+from typing import Dict, List, Tuple
+from loguru import logger
+
+from app.config import settings
+from app.services.model_server import parse_address
+
+
+class RemoteMLService:
+    """Pool of connections to one or more model server processes."""
+
+    def __init__(self, addresses: List[str], connections_per_server: int):
+        """
+        Initialize remote ML service.
+
+        Args:
+            addresses: Model server addresses
+            connections_per_server: Concurrent requests allowed per model server
+        """
+        self.addresses = addresses
+        self.connections_per_server = connections_per_server
+        self.device = "remote"
+        self._pool = None
+        self._model_loaded = False
+        self._reconnects = set()  # Background reconnect tasks (kept referenced)
+
+    def _connect(self, address: str):
+        return Client(parse_address(address), authkey=settings.MODEL_SERVER_AUTHKEY.encode())
+
+    async def _connect_when_ready(self, address: str, timeout: float = 600.0):
+        """Connect to a model server, waiting while it is still loading the model."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return await asyncio.to_thread(self._connect, address)
+            except (ConnectionError, OSError):
+                if time.monotonic() > deadline:
+                    raise
+                logger.info(f"⏳ Waiting for model server {address}...")
+                await asyncio.sleep(2)
+
+    def _request(self, conn, message: Dict) -> Dict:
+        conn.send(message)
+        return conn.recv()
+
+    async def _replace_connection(self, address: str, conn):
+        """Close a broken connection and return a new one to the same server to the pool."""
+        conn.close()
+        try:
+            conn = await asyncio.to_thread(self._connect, address)
+        except (ConnectionError, OSError):
+            logger.error(f"Model server {address} unavailable, reconnecting in the background")
+            self._schedule_reconnect(address)
+            return
+        self._pool.put_nowait((address, conn))
+
+    def _schedule_reconnect(self, address: str):
+        """Restore a dropped connection slot once the model server is back."""
+        task = asyncio.create_task(self._reconnect(address))
+        self._reconnects.add(task)
+        task.add_done_callback(self._reconnects.discard)
+
+    async def _reconnect(self, address: str):
+        try:
+            conn = await self._connect_when_ready(address)
+        except (ConnectionError, OSError):
+            logger.error(f"Model server {address} did not come back, connection slot dropped")
+            return
+        self._pool.put_nowait((address, conn))
+        logger.info(f"🔌 Reconnected to model server {address}")
+
+    async def load_model(self):
+        """Connect to the model servers (the model itself lives there)."""
+        if not self.addresses:
+            raise RuntimeError("INFERENCE_MODE=remote requires MODEL_SERVER_ADDRESSES")
+
+        self._pool = asyncio.Queue()
+
+        # Interleave servers so consecutive requests spread across them
+        for _ in range(self.connections_per_server):
+            for address in self.addresses:
+                conn = await self._connect_when_ready(address)
+                reply = await asyncio.to_thread(self._request, conn, {"type": "ping"})
+                if not reply.get("model_loaded"):
+                    raise RuntimeError(f"Model server {address} has no model loaded")
+                self._pool.put_nowait((address, conn))
+
+        self._model_loaded = True
+        logger.success(f"✅ Connected to {len(self.addresses)} model server(s)")
+
+    async def analyze_log(self, log_content: str) -> Tuple[str, str, list, str, str]:
+        """
+        Analyze a log chunk on a model server.
+
+        Args:
+            log_content: Log content as string (JSON format expected)
+
+        Returns:
+            Tuple of (status, reason, mitre_techniques, raw_output, error_message)
+        """
+        if not self._model_loaded:
+            return "Error", "Model not loaded", [], "", "Model not initialized. Please wait for model loading."
+
+        address, conn = await self._pool.get()
+        try:
+            result = await asyncio.to_thread(
+                self._request, conn, {"type": "analyze", "log_content": log_content}
+            )
+        except (EOFError, ConnectionError, OSError) as e:
+            logger.error(f"Model server {address} connection lost: {str(e)}")
+            await self._replace_connection(address, conn)
+            return "Error", f"Analysis failed: {str(e)}", [], "", str(e)
+        except asyncio.CancelledError:
+            # The request may still be in flight on this connection: don't reuse it
+            conn.close()
+            self._schedule_reconnect(address)
+            raise
+        except Exception as e:
+            # The reply stream may be out of sync, so start over with a new connection
+            logger.error(f"Model server {address} request failed: {str(e)}")
+            await self._replace_connection(address, conn)
+            return "Error", f"Analysis failed: {str(e)}", [], "", str(e)
+
+        self._pool.put_nowait((address, conn))
+
+        try:
+            return (
+                result["status"],
+                result["reason"],
+                result["mitre_techniques"],
+                result["raw_output"],
+                result["error"]
+            )
+        except (KeyError, TypeError) as e:
+            logger.error(f"Malformed reply from model server {address}: {str(e)}")
+            return "Error", "Analysis failed: malformed model server reply", [], "", str(e)
+
+    def is_loaded(self) -> bool:
+        """Check if the model servers are reachable."""
+        return self._model_loaded
@@ -0,0 +1,146 @@
+"""
+Model Server - Dedicated inference process for multi-worker deployments.
+
+Each model server loads the model once and answers analysis requests from
+any number of API workers over a local multiprocessing connection (TCP on
+localhost, a Unix socket path or a Windows named pipe). Requests that arrive
+together are grouped and run through MLService.analyze_batch.
+
+Run one server per GPU / model copy:
+    python -m app.services.model_server --address 127.0.0.1:6001
+"""
+import argparse
+import asyncio
+import ipaddress
+import queue
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import Listener
+from typing import Tuple, Union
+from loguru import logger
+
+from app.config import DEFAULT_MODEL_SERVER_AUTHKEY, settings
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """
+    Convert a configured address into a multiprocessing.connection address.
+
+    "host:port" becomes a TCP address; anything else (Unix socket path,
+    \\\\.\\pipe\\name) is used as-is.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and not address.startswith("\\\\"):
+        return host, int(port)
+    return address
+
+
+def is_loopback_address(address: str) -> bool:
+    """True for localhost TCP addresses, Unix socket paths and named pipes."""
+    parsed = parse_address(address)
+    if not isinstance(parsed, tuple):
+        return True
+    host = parsed[0].strip("[]")
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class ModelServer:
+    """Serve one loaded MLService to many API worker connections."""
+
+    def __init__(self, address: str, max_batch_size: int, max_wait_ms: float):
+        """
+        Initialize model server.
+
+        Args:
+            address: Address to listen on
+            max_batch_size: Maximum requests grouped into one generate() call
+            max_wait_ms: How long to wait for more requests before running a batch
+        """
+        self.address = address
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._requests = queue.Queue()
+
+    def serve_forever(self):
+        """Load the model and accept API worker connections until interrupted."""
+        if settings.MODEL_SERVER_AUTHKEY == DEFAULT_MODEL_SERVER_AUTHKEY and not is_loopback_address(self.address):
+            raise RuntimeError(
+                f"Refusing to listen on {self.address} with the built-in MODEL_SERVER_AUTHKEY; "
+                "set a secret key (e.g. python -c \"import secrets; print(secrets.token_hex())\")"
+            )
+
+        from app.services.ml_service import MLService
+
+        self.ml_service = MLService()
+        asyncio.run(self.ml_service.load_model())
+
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+
+        listener = Listener(parse_address(self.address), authkey=settings.MODEL_SERVER_AUTHKEY.encode())
+        logger.success(f"🧠 Model server listening on {self.address}")
+
+        try:
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            logger.info("Shutting down model server...")
+        finally:
+            listener.close()
+
+    def _handle_connection(self, conn):
+        """Answer requests from one API worker connection (one at a time)."""
+        try:
+            while True:
+                request = conn.recv()
+
+                if request.get("type") == "ping":
+                    conn.send({"model_loaded": self.ml_service.is_loaded()})
+                    continue
+
+                future = Future()
+                self._requests.put((request["log_content"], future))
+                conn.send(future.result())
+        except (EOFError, ConnectionError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _batch_loop(self):
+        """Group queued requests and run them through the model."""
+        while True:
+            batch = [self._requests.get()]
+
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._requests.get(timeout=self.max_wait))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self.ml_service.analyze_batch([log_content for log_content, _ in batch])
+            except Exception as e:
+                logger.error(f"Batch inference failed: {str(e)}")
+                results = [self.ml_service._error_result(f"Analysis failed: {str(e)}", str(e)) for _ in batch]
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dedicated model server process")
+    parser.add_argument("--address", default="127.0.0.1:6001", help="host:port, Unix socket path or named pipe")
+    parser.add_argument("--max-batch-size", type=int, default=settings.MODEL_SERVER_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.MODEL_SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    ModelServer(args.address, args.max_batch_size, args.max_wait_ms).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Risk Scoring Service - Cheap rule-based pre-scoring of session chunks
+Uses the suspicious_patterns rules from the data preparation pipeline so that
+high-risk chunks can be sent to the LLM before the rest of the session.
+Rate-based indicators (mass file operations, periodic beaconing) and attack
+chains (ATTACK_CHAIN_PATTERNS) are tracked across a session's chunks with the
+same analyzers, so behavior split over chunk boundaries is still found
+"""
+
+import sys
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+from loguru import logger
+
+from app.config import settings
+
+
+class RiskScoringService:
+    """Service to score chunks with the training-data rule set"""
+
+    SUSPICIOUS_PROCESS_WEIGHT = 3
+    COMMAND_PATTERN_WEIGHT = 4
+    APPDATA_EXECUTABLE_WEIGHT = 3
+    HIGH_RISK_PORT_WEIGHT = 2
+    SUSPICIOUS_IP_WEIGHT = 5
+    RATE_INDICATOR_WEIGHT = 5
+    ATTACK_CHAIN_WEIGHT = 10
+
+    def __init__(self):
+        """Initialize risk scoring service"""
+        self.rules = None
+        self.analyzer_registry = None
+        self.preprocess_log = None
+        self.chain_correlator_class = None
+        self.rate_tracker_class = None
+        self._load_rules()
+
+    def _load_rules(self):
+        """
+        Import the suspicious_patterns rules module from RULES_DIR
+
+        Scoring is disabled (every chunk scores 0) when the rules are not
+        available, which keeps the original chunk_index order.
+        """
+        rules_dir = Path(settings.RULES_DIR)
+        if not (rules_dir / "rules" / "suspicious_patterns.py").exists():
+            logger.warning(f"Rule set not found in {rules_dir}, chunk risk scoring disabled")
+            return
+
+        if str(rules_dir) not in sys.path:
+            sys.path.insert(0, str(rules_dir))
+
+        try:
+            from rules import suspicious_patterns
+            self.rules = suspicious_patterns
+            logger.info(f"Loaded chunk risk rules from {rules_dir}")
+        except Exception as e:
+            logger.warning(f"Failed to load rule set from {rules_dir}: {str(e)}")
+            return
+
+        try:
+            from analyzers import ChainCorrelator, RateTracker, create_default_registry, preprocess_log
+            self.analyzer_registry = create_default_registry()
+            self.preprocess_log = preprocess_log
+            self.chain_correlator_class = ChainCorrelator
+            self.rate_tracker_class = RateTracker
+        except Exception as e:
+            logger.warning(f"Failed to load analyzers from {rules_dir}, session correlation disabled: {str(e)}")
+
+    def is_enabled(self) -> bool:
+        """Check if the rule set is loaded."""
+        return self.rules is not None
+
+    def _get_event_fields(self, log: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Pull the few fields the rules look at out of a raw log
+
+        Args:
+            log: Log object (winlog system event or layered network packet)
+
+        Returns:
+            Dictionary with image, command_line, dest_ip and dest_port
+        """
+        fields = {"image": "", "command_line": "", "dest_ip": "", "dest_port": None}
+
+        winlog = log.get("winlog")
+        event_data = winlog.get("event_data") if isinstance(winlog, dict) else None
+        if not isinstance(event_data, dict):
+            event_data = log
+
+        fields["image"] = str(event_data.get("Image") or event_data.get("NewProcessName") or "")
+        fields["command_line"] = str(event_data.get("CommandLine") or "")
+        fields["dest_ip"] = str(event_data.get("DestinationIp") or "")
+        fields["dest_port"] = event_data.get("DestinationPort")
+
+        layers = log.get("layers")
+        if isinstance(layers, dict):
+            ip_layer = layers.get("IP")
+            if isinstance(ip_layer, dict):
+                fields["dest_ip"] = str(ip_layer.get("dst") or "")
+            for transport in ("TCP", "UDP"):
+                transport_layer = layers.get(transport)
+                if isinstance(transport_layer, dict):
+                    fields["dest_port"] = transport_layer.get("dport")
+                    break
+
+        return fields
+
+    def score_log(self, log: Dict[str, Any]) -> Tuple[int, List[str]]:
+        """
+        Score a single log against the suspicious rules
+
+        Args:
+            log: Log object
+
+        Returns:
+            Tuple of (score, matched indicator descriptions)
+        """
+        if not isinstance(log, dict):
+            return 0, []
+
+        rules = self.rules
+        fields = self._get_event_fields(log)
+        score = 0
+        indicators = []
+
+        image = fields["image"]
+        if image:
+            process_name = image.split("\\")[-1].lower()
+            if process_name in rules.SUSPICIOUS_PROCESSES:
+                score += self.SUSPICIOUS_PROCESS_WEIGHT
+                indicators.append(f"Suspicious process: {process_name}")
+            if rules.is_appdata_executable(image):
+                score += self.APPDATA_EXECUTABLE_WEIGHT
+                indicators.append("Executable in AppData")
+
+        if fields["command_line"]:
+            for pattern, description, _ in rules.get_command_pattern_info(fields["command_line"]):
+                score += self.COMMAND_PATTERN_WEIGHT
+                indicators.append(f"Suspicious command: {description}")
+
+        if fields["dest_port"] not in (None, ""):
+            try:
+                port_info = rules.get_port_risk_info(int(fields["dest_port"]))
+            except (ValueError, TypeError):
+                port_info = {}
+            if port_info:
+                score += self.HIGH_RISK_PORT_WEIGHT
+                indicators.append(f"High-risk port: {port_info['description']}")
+
+        if fields["dest_ip"]:
+            is_malicious, reason = rules.is_suspicious_ip(fields["dest_ip"])
+            if is_malicious:
+                score += self.SUSPICIOUS_IP_WEIGHT
+                indicators.append(f"Suspicious IP {fields['dest_ip']}: {reason}")
+
+        return score, indicators
+
+    def score_chunk(self, chunk: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Score a chunk of logs
+
+        Args:
+            chunk: List of logs in the chunk
+
+        Returns:
+            Dictionary with risk_score and deduplicated risk_indicators
+        """
+        if not self.is_enabled():
+            return {"risk_score": 0, "risk_indicators": []}
+
+        total_score = 0
+        indicators = []
+        for log in chunk:
+            score, log_indicators = self.score_log(log)
+            total_score += score
+            for indicator in log_indicators:
+                if indicator not in indicators:
+                    indicators.append(indicator)
+
+        return {"risk_score": total_score, "risk_indicators": indicators}
+
+    def correlate_session(self, chunks: List[List[Dict[str, Any]]], session_id: str) -> List[Dict[str, List]]:
+        """
+        Track rate-based indicators and attack chains across the chunks of a session
+
+        Chunks are fed to one rate tracker and one chain correlator in order,
+        so a finding is reported on the chunk where it completes even when
+        its earlier events were in previous chunks.
+
+        Args:
+            chunks: Session chunks, in timestamp order
+            session_id: Session identifier
+
+        Returns:
+            Per chunk, a dictionary with rate_indicators (deduplicated) and
+            attack_chains (as dicts) found in it
+        """
+        if self.chain_correlator_class is None:
+            return [{"rate_indicators": [], "attack_chains": []} for _ in chunks]
+
+        rate_tracker = self.rate_tracker_class()
+        correlator = self.chain_correlator_class()
+        correlations = []
+        for chunk in chunks:
+            rate_indicators = []
+            attack_chains = []
+            for log in chunk:
+                if not isinstance(log, dict):
+                    continue
+                event = self.preprocess_log(log)
+                analysis = self.analyzer_registry.analyze(event)
+                for indicator in rate_tracker.observe(session_id, event, analysis):
+                    if indicator not in rate_indicators:
+                        rate_indicators.append(indicator)
+                attack_chains.extend(match.to_dict() for match in correlator.observe(session_id, analysis))
+            correlations.append({"rate_indicators": rate_indicators, "attack_chains": attack_chains})
+        return correlations
+
+    def score_correlations(self, correlation: Dict[str, List]) -> Dict[str, Any]:
+        """
+        Score the session-level findings of a chunk
+
+        Args:
+            correlation: One chunk's entry from correlate_session()
+
+        Returns:
+            Dictionary with risk_score and risk_indicators for the findings
+        """
+        chains = correlation["attack_chains"]
+        return {
+            "risk_score": (self.RATE_INDICATOR_WEIGHT * len(correlation["rate_indicators"])
+                           + self.ATTACK_CHAIN_WEIGHT * len(chains)),
+            "risk_indicators": correlation["rate_indicators"] + [f"Attack chain: {chain['description']}" for chain in chains]
+        }
+
+
+risk_scoring_service = RiskScoringService()
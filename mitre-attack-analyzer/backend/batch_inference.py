@@ -0,0 +1,308 @@
+"""
+Offline Batch Inference - Run the fine-tuned model over chunk files without the API
+Reuses MLService (same prompt, generation settings and output parsing as the backend)
+
+Accepted inputs:
+    - test chunk files (single {"metadata", "logs"} object)
+    - chunk arrays (pretty-printed JSON list of chunks, streamed)
+    - JSONL files (one chunk per line, or training rows with an "input" field)
+
+Usage (from the backend directory):
+    python batch_inference.py ../data/test_*.json -o predictions.jsonl
+    python batch_inference.py test.jsonl -o predictions.jsonl --batch-size 8 --workers 2 --resume
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Fields that carry the ground truth and must never reach the model
+LABEL_FIELDS = ("label", "mitre_techniques", "session_id", "chunk_label")
+
+READ_BLOCK_SIZE = 1 << 20
+
+
+def _iter_json_array(handle, first_block: str) -> Iterator[Any]:
+    """
+    Stream the items of a top-level JSON array without loading the whole file
+
+    Args:
+        handle: Open text file positioned after first_block
+        first_block: Text already read from the file (starts with '[')
+
+    Yields:
+        Decoded array items
+    """
+    decoder = json.JSONDecoder()
+    buffer = first_block.lstrip()[1:]
+    eof = False
+
+    while True:
+        buffer = buffer.lstrip()
+        if buffer.startswith(","):
+            buffer = buffer[1:].lstrip()
+        if buffer.startswith("]"):
+            return
+
+        try:
+            if not buffer:
+                raise json.JSONDecodeError("Need more data", buffer, 0)
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            block = handle.read(READ_BLOCK_SIZE)
+            if not block:
+                eof = True
+            buffer += block
+            continue
+
+        yield item
+        buffer = buffer[end:]
+
+
+def iter_records(path: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Stream records from a JSON, JSON array or JSONL file
+
+    Args:
+        path: Input file path
+
+    Yields:
+        Tuple of (offset within the file, record)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for offset, line in enumerate(f):
+                line = line.strip()
+                if line:
+                    yield offset, json.loads(line)
+            return
+
+        first_block = f.read(READ_BLOCK_SIZE)
+        if first_block.lstrip().startswith("["):
+            for offset, record in enumerate(_iter_json_array(f, first_block)):
+                yield offset, record
+        else:
+            yield 0, json.loads(first_block + f.read())
+
+
+def strip_labels(record: Any) -> Any:
+    """Remove ground-truth fields from a chunk (dict with logs, or list of logs)."""
+    if isinstance(record, list):
+        return [strip_labels(log) for log in record]
+    if not isinstance(record, dict):
+        return record
+
+    clean = {k: v for k, v in record.items() if k not in LABEL_FIELDS}
+    if isinstance(clean.get("logs"), list):
+        clean["logs"] = [
+            {k: v for k, v in log.items() if k not in LABEL_FIELDS} if isinstance(log, dict) else log
+            for log in clean["logs"]
+        ]
+    return clean
+
+
+def get_log_content(record: Any) -> str:
+    """
+    Build the text sent to the model for one record
+
+    Training rows already carry the model input as a string; raw chunks are
+    serialized the same way the chunking service stores them.
+    """
+    if isinstance(record, dict) and isinstance(record.get("input"), str):
+        return record["input"]
+    return json.dumps(strip_labels(record), ensure_ascii=False)
+
+
+def content_hash(log_content: str) -> str:
+    """Stable cache key for a log content string."""
+    return hashlib.sha1(log_content.encode("utf-8")).hexdigest()
+
+
+def load_completed(output_path: str) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+    """
+    Read an existing predictions file for --resume
+
+    A partially written trailing line (interrupted run) is truncated away.
+
+    Returns:
+        Tuple of (number of completed records, cache of results by input hash)
+    """
+    completed = 0
+    cache = {}
+    valid_bytes = 0
+
+    with open(output_path, "rb") as f:
+        for raw_line in f:
+            try:
+                if not raw_line.endswith(b"\n"):
+                    raise ValueError("partial line")
+                row = json.loads(raw_line)
+            except ValueError:
+                break
+            valid_bytes += len(raw_line)
+            completed += 1
+            if not row.get("error"):
+                cache[row["input_sha1"]] = {
+                    "status": row["status"],
+                    "reason": row["reason"],
+                    "mitre_techniques": row["mitre_techniques"],
+                    "error": "",
+                    "prompt_tokens": row.get("prompt_tokens", 0),
+                    "generated_tokens": row.get("generated_tokens", 0),
+                }
+
+    if valid_bytes < os.path.getsize(output_path):
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_bytes)
+
+    return completed, cache
+
+
+def iter_batches(paths: List[str], batch_size: int, skip: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Group records from all input files into batches, skipping already completed ones
+
+    Yields:
+        Lists of items with record number, source, offset and log content
+    """
+    batch = []
+    record_number = 0
+
+    for path in paths:
+        for offset, record in iter_records(path):
+            record_number += 1
+            if record_number <= skip:
+                continue
+            batch.append({
+                "record": record_number - 1,
+                "source": path,
+                "offset": offset,
+                "log_content": get_log_content(record),
+            })
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+    if batch:
+        yield batch
+
+
+def run_batch(ml_service, batch: List[Dict[str, Any]], cache: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Run one batch through the model, answering repeated inputs from the cache
+
+    Returns:
+        Output rows (same order as the batch)
+    """
+    start = time.perf_counter()
+
+    pending = {}
+    for item in batch:
+        item["input_sha1"] = content_hash(item["log_content"])
+        if item["input_sha1"] not in cache:
+            pending.setdefault(item["input_sha1"], item["log_content"])
+
+    fresh = {}
+    if pending:
+        results = ml_service.analyze_batch(list(pending.values()))
+        fresh = dict(zip(pending.keys(), results))
+
+    batch_ms = (time.perf_counter() - start) * 1000
+    model_batch_size = len(pending)
+
+    rows = []
+    for item in batch:
+        cached = item["input_sha1"] not in fresh
+        result = cache[item["input_sha1"]] if cached else fresh[item["input_sha1"]]
+        rows.append({
+            "record": item["record"],
+            "source": item["source"],
+            "offset": item["offset"],
+            "input_sha1": item["input_sha1"],
+            "status": result["status"],
+            "mitre_techniques": result["mitre_techniques"],
+            "reason": result["reason"],
+            "error": result["error"],
+            "cached": cached,
+            "batch_size": model_batch_size,
+            "batch_ms": round(batch_ms, 2),
+            "latency_ms": 0.0 if cached else round(batch_ms / model_batch_size, 2),
+            "prompt_tokens": 0 if cached else result["prompt_tokens"],
+            "generated_tokens": 0 if cached else result["generated_tokens"],
+            "input_chars": len(item["log_content"]),
+        })
+
+    for input_sha1, result in fresh.items():
+        if not result["error"]:
+            cache[input_sha1] = result
+
+    return rows
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline batch inference over chunk files")
+    parser.add_argument("inputs", nargs="+", help="Chunk files (.json, .jsonl)")
+    parser.add_argument("-o", "--output", required=True, help="Predictions JSONL file")
+    parser.add_argument("--batch-size", type=int, default=4, help="Chunks per generate() call (default: 4)")
+    parser.add_argument("--workers", type=int, default=1, help="Batches in flight at once (default: 1)")
+    parser.add_argument("--resume", action="store_true", help="Continue after the last completed record in --output")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    skip = 0
+    cache = {}
+    if args.resume and os.path.exists(args.output):
+        skip, cache = load_completed(args.output)
+        print(f"⏩ Resuming after {skip} completed records ({len(cache)} cached results)")
+
+    # Imported here so --help works without the ML stack
+    from app.services.ml_service import ml_service
+
+    asyncio.run(ml_service.load_model())
+    if not ml_service.is_loaded():
+        print("❌ Model failed to load")
+        return 1
+
+    written = 0
+    start = time.perf_counter()
+    mode = "a" if args.resume else "w"
+
+    with open(args.output, mode, encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=args.workers) as executor:
+        in_flight = deque()
+
+        def write_oldest():
+            nonlocal written
+            for row in in_flight.popleft().result():
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                written += 1
+            out.flush()
+
+        for batch in iter_batches(args.inputs, args.batch_size, skip):
+            in_flight.append(executor.submit(run_batch, ml_service, batch, cache))
+            if len(in_flight) >= args.workers:
+                write_oldest()
+                print(f"  {skip + written} records done", end="\r")
+
+        while in_flight:
+            write_oldest()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Wrote {written} predictions to {args.output} in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
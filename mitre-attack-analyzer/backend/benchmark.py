@@ -0,0 +1,279 @@
+"""
+Evaluation Benchmark - Score the analyzer on the held-out test chunks
+Runs MLService over data/test_*.json and compares with data/answer_key.json
+
+Reports classification quality (accuracy, F1, technique precision/recall)
+next to latency percentiles, tokens/sec and peak memory, and saves everything
+as a stable, diffable JSON report.
+
+Usage (from the backend directory):
+    python benchmark.py
+    python benchmark.py --batch-size 4 --limit 20 -o reports/benchmark_batch4.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from batch_inference import iter_records, get_log_content, run_batch
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+POSITIVE_LABEL = "suspicious"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile (same as numpy's default)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _safe_div(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator else 0.0
+
+
+def _f1(precision: float, recall: float) -> float:
+    return _safe_div(2 * precision * recall, precision + recall)
+
+
+def classification_metrics(y_true: List[str], y_pred: List[str]) -> Dict[str, Any]:
+    """
+    Normal vs Suspicious metrics
+
+    Predictions that are neither label (e.g. "error") count as wrong for
+    both classes.
+    """
+    labels = ["normal", "suspicious"]
+    per_class = {}
+    for label in labels:
+        tp = sum(1 for t, p in zip(y_true, y_pred) if t == label and p == label)
+        fp = sum(1 for t, p in zip(y_true, y_pred) if t != label and p == label)
+        fn = sum(1 for t, p in zip(y_true, y_pred) if t == label and p != label)
+        precision = _safe_div(tp, tp + fp)
+        recall = _safe_div(tp, tp + fn)
+        per_class[label] = {
+            "precision": round(precision, 4),
+            "recall": round(recall, 4),
+            "f1": round(_f1(precision, recall), 4),
+            "support": sum(1 for t in y_true if t == label),
+        }
+
+    confusion = {
+        true_label: {
+            pred_label: sum(1 for t, p in zip(y_true, y_pred) if t == true_label and p == pred_label)
+            for pred_label in labels + ["error"]
+        }
+        for true_label in labels
+    }
+
+    return {
+        "accuracy": round(_safe_div(sum(1 for t, p in zip(y_true, y_pred) if t == p), len(y_true)), 4),
+        "f1": per_class[POSITIVE_LABEL]["f1"],
+        "f1_macro": round(sum(c["f1"] for c in per_class.values()) / len(labels), 4),
+        "per_class": per_class,
+        "confusion_matrix": confusion,
+    }
+
+
+def technique_metrics(true_sets: List[Set[str]], pred_sets: List[Set[str]]) -> Dict[str, Any]:
+    """Micro-averaged and per-technique precision/recall over MITRE technique IDs."""
+    counts = {}
+    for true_set, pred_set in zip(true_sets, pred_sets):
+        for technique in true_set | pred_set:
+            entry = counts.setdefault(technique, {"tp": 0, "fp": 0, "fn": 0})
+            if technique in true_set and technique in pred_set:
+                entry["tp"] += 1
+            elif technique in pred_set:
+                entry["fp"] += 1
+            else:
+                entry["fn"] += 1
+
+    tp = sum(c["tp"] for c in counts.values())
+    fp = sum(c["fp"] for c in counts.values())
+    fn = sum(c["fn"] for c in counts.values())
+    precision = _safe_div(tp, tp + fp)
+    recall = _safe_div(tp, tp + fn)
+
+    per_technique = {}
+    for technique in sorted(counts):
+        c = counts[technique]
+        per_technique[technique] = {
+            "precision": round(_safe_div(c["tp"], c["tp"] + c["fp"]), 4),
+            "recall": round(_safe_div(c["tp"], c["tp"] + c["fn"]), 4),
+            **c,
+        }
+
+    return {
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(_f1(precision, recall), 4),
+        "exact_match": round(_safe_div(sum(1 for t, p in zip(true_sets, pred_sets) if t == p), len(true_sets)), 4),
+        "per_technique": per_technique,
+    }
+
+
+def peak_memory() -> Dict[str, float]:
+    """Peak process RSS and (if available) peak CUDA memory in MB."""
+    memory = {"peak_rss_mb": 0.0, "peak_gpu_mb": 0.0}
+
+    try:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS
+        memory["peak_rss_mb"] = round(max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+
+    import torch
+    if torch.cuda.is_available():
+        memory["peak_gpu_mb"] = round(torch.cuda.max_memory_allocated() / 1024**2, 1)
+
+    return memory
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the analyzer against data/answer_key.json")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Directory with test_*.json and answer_key.json")
+    parser.add_argument("-o", "--output", default="benchmark_report.json", help="JSON report path")
+    parser.add_argument("--batch-size", type=int, default=1, help="Chunks per generate() call (default: 1)")
+    parser.add_argument("--limit", type=int, default=None, help="Only evaluate the first N test files")
+    parser.add_argument("--seed", type=int, default=42, help="Sampling seed for repeatable runs")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    data_dir = Path(args.data_dir)
+
+    with open(data_dir / "answer_key.json", "r", encoding="utf-8") as f:
+        answer_key = json.load(f)
+
+    filenames = sorted(answer_key)[:args.limit] if args.limit else sorted(answer_key)
+
+    import torch
+    from app.config import settings
+    from app.services.ml_service import ml_service
+
+    torch.manual_seed(args.seed)
+    asyncio.run(ml_service.load_model())
+    if not ml_service.is_loaded():
+        print("❌ Model failed to load")
+        return 1
+
+    print("=" * 70)
+    print(f"📊 Benchmarking {len(filenames)} test chunks (batch size {args.batch_size})")
+    print("=" * 70)
+
+    rows = []
+    batch_seconds = 0.0
+    start = time.perf_counter()
+
+    for i in range(0, len(filenames), args.batch_size):
+        batch = []
+        for filename in filenames[i:i + args.batch_size]:
+            for offset, record in iter_records(str(data_dir / filename)):
+                batch.append({
+                    "record": len(rows) + len(batch),
+                    "source": filename,
+                    "offset": offset,
+                    "log_content": get_log_content(record),
+                })
+
+        # Fresh cache per batch: every test chunk is really run through the model
+        batch_rows = run_batch(ml_service, batch, {})
+        batch_seconds += batch_rows[0]["batch_ms"] / 1000
+        rows.extend(batch_rows)
+        print(f"  {len(rows)}/{len(filenames)} chunks done", end="\r")
+
+    wall_seconds = time.perf_counter() - start
+    print()
+
+    y_true = [answer_key[row["source"]]["label"].lower() for row in rows]
+    y_pred = [row["status"].lower() for row in rows]
+    true_techniques = [set(answer_key[row["source"]]["mitre_techniques"]) for row in rows]
+    pred_techniques = [set(row["mitre_techniques"]) for row in rows]
+
+    latencies = [row["latency_ms"] for row in rows]
+    generated_tokens = sum(row["generated_tokens"] for row in rows)
+    prompt_tokens = sum(row["prompt_tokens"] for row in rows)
+
+    report = {
+        "config": {
+            "model_path": settings.MODEL_PATH,
+            "device": ml_service.device,
+            "batch_size": args.batch_size,
+            "seed": args.seed,
+            "max_new_tokens": settings.MAX_NEW_TOKENS,
+            "max_length_tokens": settings.MAX_LENGTH_TOKENS,
+            "max_input_chars": settings.MAX_INPUT_CHARS,
+            "temperature": settings.TEMPERATURE,
+            "top_p": settings.TOP_P,
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+        },
+        "quality": {
+            "samples": len(rows),
+            "errors": sum(1 for row in rows if row["error"]),
+            "status": classification_metrics(y_true, y_pred),
+            "techniques": technique_metrics(true_techniques, pred_techniques),
+        },
+        "performance": {
+            "wall_seconds": round(wall_seconds, 2),
+            "latency_ms": {
+                "mean": round(_safe_div(sum(latencies), len(latencies)), 2),
+                "p50": round(percentile(latencies, 50), 2),
+                "p95": round(percentile(latencies, 95), 2),
+                "p99": round(percentile(latencies, 99), 2),
+            },
+            "prompt_tokens": prompt_tokens,
+            "generated_tokens": generated_tokens,
+            "tokens_per_sec": round(_safe_div(generated_tokens, batch_seconds), 2),
+            "chunks_per_sec": round(_safe_div(len(rows), wall_seconds), 3),
+            **peak_memory(),
+        },
+        "predictions": [
+            {
+                "file": row["source"],
+                "expected": answer_key[row["source"]]["label"].lower(),
+                "predicted": row["status"].lower(),
+                "expected_techniques": sorted(answer_key[row["source"]]["mitre_techniques"]),
+                "predicted_techniques": sorted(row["mitre_techniques"]),
+                "latency_ms": row["latency_ms"],
+                "generated_tokens": row["generated_tokens"],
+                "error": row["error"],
+            }
+            for row in rows
+        ],
+    }
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    quality = report["quality"]
+    performance = report["performance"]
+    print(f"\n🎯 Accuracy:  {quality['status']['accuracy']:.4f}   F1 (suspicious): {quality['status']['f1']:.4f}")
+    print(f"🧩 Techniques: precision {quality['techniques']['precision']:.4f}, recall {quality['techniques']['recall']:.4f}")
+    print(f"⏱️  Latency:   p50 {performance['latency_ms']['p50']:.0f} ms, "
+          f"p95 {performance['latency_ms']['p95']:.0f} ms, p99 {performance['latency_ms']['p99']:.0f} ms")
+    print(f"⚡ Throughput: {performance['tokens_per_sec']:.1f} tokens/sec")
+    print(f"💾 Peak memory: {performance['peak_rss_mb']:.0f} MB RSS, {performance['peak_gpu_mb']:.0f} MB GPU")
+    print(f"\n✅ Report saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
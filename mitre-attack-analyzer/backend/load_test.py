@@ -0,0 +1,325 @@
+"""
+API Load Test - Measure DB and event-loop throughput without a GPU
+Starts the FastAPI app with a stub MLService (configurable fake latency) and
+a local MongoDB or mongomock-motor, then drives the session endpoints with
+concurrent clients and reports throughput and latency percentiles.
+
+Endpoints exercised:
+    POST /api/logs/sessions/upload
+    POST /api/logs/chunks/analyze
+    GET  /api/logs/sessions
+    GET  /api/logs/stats
+
+Requires httpx; --mongomock additionally needs `pip install mongomock-motor`.
+
+Usage (from the backend directory):
+    python load_test.py --mongomock --concurrency 16 --requests 400
+    python load_test.py --fake-latency-ms 800 --blocking-inference
+    python load_test.py serve --port 8100 --mongomock     (stub server only)
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmark import percentile
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+API_PREFIX = "/api/logs"
+
+# Relative frequency of each request type in the mixed workload
+DEFAULT_MIX = "upload=1,analyze=6,sessions=2,stats=1"
+
+
+# ============================================================================
+# STUB SERVER
+# ============================================================================
+
+def install_stubs(fake_latency_ms: float, jitter_ms: float, blocking: bool, use_mongomock: bool):
+    """
+    Replace the model (and optionally MongoDB) before the app starts
+
+    The real MLService runs generate() inside an async method, which blocks
+    the event loop; --blocking-inference reproduces that with time.sleep.
+    """
+    from app.services.ml_service import ml_service
+
+    async def load_model():
+        ml_service._model_loaded = True
+
+    async def analyze_log(log_content: str):
+        delay = max(0.0, fake_latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+        if blocking:
+            time.sleep(delay)
+        else:
+            await asyncio.sleep(delay)
+        if '"powershell' in log_content.lower():
+            return "Suspicious", "Stub: PowerShell execution", ["T1059.001"], "Status: Suspicious", ""
+        return "Normal", "Stub: no suspicious indicators", [], "Status: Normal", ""
+
+    ml_service.load_model = load_model
+    ml_service.analyze_log = analyze_log
+
+    if use_mongomock:
+        from mongomock_motor import AsyncMongoMockClient
+        import app.main
+        app.main.AsyncIOMotorClient = AsyncMongoMockClient
+
+
+def serve(args: argparse.Namespace):
+    """Run the stubbed API with uvicorn (blocking)."""
+    import uvicorn
+    from app.config import settings
+
+    settings.MONGODB_DB_NAME = args.db_name
+    install_stubs(args.fake_latency_ms, args.jitter_ms, args.blocking_inference, args.mongomock)
+
+    from app.main import app
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+# ============================================================================
+# LOAD GENERATOR
+# ============================================================================
+
+def load_sample_logs() -> List[Dict[str, Any]]:
+    """Logs from the test chunks, used as the body of every uploaded session."""
+    logs = []
+    for path in sorted(glob.glob(str(DATA_DIR / "test_*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            logs.extend(json.load(f).get("logs", []))
+    return logs
+
+
+def parse_mix(mix: str) -> List[str]:
+    """Turn 'upload=1,analyze=6' into a weighted list of request types."""
+    weighted = []
+    for part in mix.split(","):
+        name, weight = part.split("=")
+        weighted.extend([name.strip()] * int(weight))
+    return weighted
+
+
+class LoadGenerator:
+    """Concurrent clients issuing a weighted mix of API requests"""
+
+    def __init__(self, client, sample_logs: List[Dict[str, Any]], logs_per_session: int, chunk_size: int):
+        self.client = client
+        self.sample_logs = sample_logs
+        self.logs_per_session = logs_per_session
+        self.chunk_size = chunk_size
+        self.sessions = []  # (session_id, logs, total_chunks)
+        self.timings = {}
+        self.errors = {}
+
+    async def _timed(self, name: str, method: str, path: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, API_PREFIX + path, **kwargs)
+            ok = response.status_code < 400
+        except Exception:
+            response, ok = None, False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.timings.setdefault(name, []).append(elapsed_ms)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        return response if ok else None
+
+    async def upload(self):
+        session_id = f"loadtest_{len(self.sessions)}_{random.randrange(1 << 30)}"
+        offset = random.randrange(max(1, len(self.sample_logs) - self.logs_per_session))
+        logs = self.sample_logs[offset:offset + self.logs_per_session]
+
+        response = await self._timed("upload", "POST", "/sessions/upload", json={
+            "log_content": json.dumps(logs),
+            "session_id": session_id,
+            "session_name": "Load test session",
+        })
+        if response is not None:
+            self.sessions.append((session_id, logs, response.json()["total_chunks"]))
+
+    async def analyze(self):
+        if not self.sessions:
+            return await self.upload()
+        session_id, logs, total_chunks = random.choice(self.sessions)
+        chunk_index = random.randrange(total_chunks)
+        chunk = logs[chunk_index * self.chunk_size:(chunk_index + 1) * self.chunk_size]
+
+        await self._timed("analyze", "POST", "/chunks/analyze", json={
+            "session_id": session_id,
+            "chunk_index": chunk_index,
+            "log_content": json.dumps(chunk),
+        })
+
+    async def list_sessions(self):
+        await self._timed("sessions", "GET", "/sessions", params={"skip": 0, "limit": 20})
+
+    async def stats(self):
+        await self._timed("stats", "GET", "/stats")
+
+    async def run(self, total_requests: int, concurrency: int, mix: List[str]) -> float:
+        actions = {
+            "upload": self.upload,
+            "analyze": self.analyze,
+            "sessions": self.list_sessions,
+            "stats": self.stats,
+        }
+        remaining = total_requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await actions[random.choice(mix)]()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    def report(self, wall_seconds: float) -> Dict[str, Any]:
+        endpoints = {}
+        for name in sorted(self.timings):
+            timings = self.timings[name]
+            endpoints[name] = {
+                "requests": len(timings),
+                "errors": self.errors.get(name, 0),
+                "throughput_rps": round(len(timings) / wall_seconds, 2),
+                "latency_ms": {
+                    "p50": round(percentile(timings, 50), 2),
+                    "p95": round(percentile(timings, 95), 2),
+                    "p99": round(percentile(timings, 99), 2),
+                    "max": round(max(timings), 2),
+                },
+            }
+        total = sum(len(t) for t in self.timings.values())
+        return {
+            "wall_seconds": round(wall_seconds, 2),
+            "total_requests": total,
+            "throughput_rps": round(total / wall_seconds, 2),
+            "endpoints": endpoints,
+        }
+
+
+async def wait_until_ready(client, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("API did not become healthy in time")
+
+
+async def drive(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    import httpx
+    from app.services.chunking_service import ChunkingService
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        await wait_until_ready(client)
+
+        generator = LoadGenerator(client, load_sample_logs(), args.logs_per_session, ChunkingService.CHUNK_SIZE)
+        for _ in range(args.warmup_sessions):
+            await generator.upload()
+        generator.timings.clear()
+        generator.errors.clear()
+
+        wall_seconds = await generator.run(args.requests, args.concurrency, parse_mix(args.mix))
+        return generator.report(wall_seconds)
+
+
+def run(args: argparse.Namespace) -> int:
+    server = None
+    base_url = args.url
+    if not base_url:
+        command = [
+            sys.executable, os.path.abspath(__file__), "serve",
+            "--port", str(args.port),
+            "--db-name", args.db_name,
+            "--fake-latency-ms", str(args.fake_latency_ms),
+            "--jitter-ms", str(args.jitter_ms),
+        ]
+        if args.blocking_inference:
+            command.append("--blocking-inference")
+        if args.mongomock:
+            command.append("--mongomock")
+        server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)))
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    print("=" * 70)
+    print(f"🚦 Load testing {base_url} ({args.requests} requests, concurrency {args.concurrency})")
+    print("=" * 70)
+
+    try:
+        report = asyncio.run(drive(args, base_url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report["config"] = {
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "mix": args.mix,
+        "fake_latency_ms": args.fake_latency_ms,
+        "blocking_inference": args.blocking_inference,
+        "mongo": "mongomock" if args.mongomock else "mongodb",
+    }
+
+    print(f"\n{'endpoint':<10} {'reqs':>6} {'errs':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, endpoint in report["endpoints"].items():
+        latency = endpoint["latency_ms"]
+        print(f"{name:<10} {endpoint['requests']:>6} {endpoint['errors']:>5} {endpoint['throughput_rps']:>8.1f} "
+              f"{latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f}")
+    print(f"\n⚡ Overall: {report['throughput_rps']:.1f} req/s over {report['wall_seconds']:.1f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✅ Report saved to {args.output}")
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the analyzer API with a stub model")
+    parser.add_argument("mode", nargs="?", choices=["run", "serve"], default="run")
+    parser.add_argument("--url", default=None, help="Target an already running API instead of starting the stub server")
+    parser.add_argument("--port", type=int, default=8100, help="Port for the stub server (default: 8100)")
+    parser.add_argument("--db-name", default="mitre_attack_logs_loadtest", help="Database used by the stub server")
+    parser.add_argument("--mongomock", action="store_true", help="Use mongomock-motor instead of a local MongoDB")
+    parser.add_argument("--fake-latency-ms", type=float, default=500.0, help="Stub inference latency (default: 500)")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Random +/- latency jitter (default: 100)")
+    parser.add_argument("--blocking-inference", action="store_true",
+                        help="Block the event loop during stub inference, like the real model does")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (default: 8)")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests to send (default: 200)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted request mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--logs-per-session", type=int, default=140, help="Logs in each uploaded session")
+    parser.add_argument("--warmup-sessions", type=int, default=3, help="Sessions uploaded before measuring")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("-o", "--output", default=None, help="Optional JSON report path")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.mode == "serve":
+        serve(args)
+        return 0
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Multi-worker launcher - Model servers plus stateless uvicorn API workers
+
+Starts N dedicated model server processes (one model copy each) and a
+uvicorn app with several workers running in INFERENCE_MODE=remote, so
+request handling and inference scale independently. Unless
+MODEL_SERVER_AUTHKEY is set, a random key is generated for this run and
+passed to both through the environment.
+
+Usage (from the backend directory):
+    python serve.py --api-workers 4 --model-servers 1
+    python serve.py --api-workers 8 --model-servers 2 --gpus 0,1
+"""
+
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+
+from app.config import DEFAULT_MODEL_SERVER_AUTHKEY, settings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run model servers and API workers")
+    parser.add_argument("--api-workers", type=int, default=4, help="uvicorn worker processes (default: 4)")
+    parser.add_argument("--model-servers", type=int, default=1, help="Model server processes (default: 1)")
+    parser.add_argument("--base-port", type=int, default=6001, help="First model server port (default: 6001)")
+    parser.add_argument("--gpus", default=None, help="Comma-separated GPU ids assigned round-robin to model servers")
+    args = parser.parse_args()
+
+    gpus = args.gpus.split(",") if args.gpus else []
+    addresses = [f"127.0.0.1:{args.base_port + i}" for i in range(args.model_servers)]
+    processes = []
+
+    authkey = settings.MODEL_SERVER_AUTHKEY
+    if authkey in ("", DEFAULT_MODEL_SERVER_AUTHKEY):
+        authkey = secrets.token_hex()
+        print("🔑 Generated a model server key for this run")
+
+    for i, address in enumerate(addresses):
+        env = dict(os.environ, INFERENCE_MODE="local", MODEL_SERVER_AUTHKEY=authkey)
+        if gpus:
+            env["CUDA_VISIBLE_DEVICES"] = gpus[i % len(gpus)]
+        print(f"🧠 Starting model server {i} on {address}")
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "app.services.model_server", "--address", address],
+            env=env
+        ))
+
+    api_env = dict(os.environ, INFERENCE_MODE="remote", MODEL_SERVER_ADDRESSES=",".join(addresses),
+                   MODEL_SERVER_AUTHKEY=authkey)
+    print(f"🚀 Starting {args.api_workers} API workers on {settings.HOST}:{settings.PORT}")
+    processes.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", settings.HOST, "--port", str(settings.PORT),
+         "--workers", str(args.api_workers)],
+        env=api_env
+    ))
+
+    try:
+        processes[-1].wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -166,6 +166,32 @@ export default function BulkAnalyzerPage() {
     return indexedDBChunk?.logs_json || indexedDBChunk;
   };
 
+  const getAnalysisOrder = async (sessionId) => {
+    const inRange = [];
+    for (let i = startChunk; i <= endChunk; i++) {
+      inRange.push(i);
+    }
+
+    try {
+      // Backend queue lists unanalyzed chunks by rule-derived risk score
+      const { queue = [] } = await sessionService.getAnalysisQueue(sessionId);
+      const prioritized = queue
+        .map((entry) => entry.chunk_index)
+        .filter((index) => index >= startChunk && index <= endChunk);
+      const queued = new Set(prioritized);
+      const remaining = inRange.filter((index) => !queued.has(index));
+      console.log(
+        `[Bulk Analysis] Prioritized ${prioritized.length} chunks by risk score`,
+      );
+      return [...prioritized, ...remaining];
+    } catch (err) {
+      console.log(
+        "[Bulk Analysis] Analysis queue unavailable, using chunk order",
+      );
+      return inRange;
+    }
+  };
+
   const handleBulkAnalyze = async () => {
     if (!selectedSession) return;
 
@@ -202,13 +228,17 @@ export default function BulkAnalyzerPage() {
 
       const results = [];
       const updatedChunks = [...sessionChunks];
+      const analysisOrder = await getAnalysisOrder(
+        selectedSession.session_id,
+      );
 
-      for (let i = startChunk; i <= endChunk; i++) {
+      for (let position = 0; position < analysisOrder.length; position++) {
+        const i = analysisOrder[position];
         try {
           console.log(
-            `[Bulk Analysis] Analyzing chunk ${i} (${i - startChunk + 1}/${chunksToAnalyze})`,
+            `[Bulk Analysis] Analyzing chunk ${i} (${position + 1}/${chunksToAnalyze})`,
           );
-          setProgress({ current: i - startChunk + 1, total: chunksToAnalyze });
+          setProgress({ current: position + 1, total: chunksToAnalyze });
 
           const chunkLogs = await getChunkLogs(selectedSession.session_id, i);
 
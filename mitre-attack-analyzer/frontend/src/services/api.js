@@ -78,6 +78,11 @@ export const sessionService = {
     return response.data;
   },
 
+  async getAnalysisQueue(sessionId) {
+    const response = await api.get(`/api/logs/sessions/${sessionId}/queue`);
+    return response.data;
+  },
+
   async deleteSession(sessionId) {
     const response = await api.delete(`/api/logs/sessions/${sessionId}`);
     return response.data;
@@ -1,6 +1,12 @@
 import json
 import re
 import os
+import sys
+
+# Chunk datasets (sharded JSONL + index) written by the v2 pipeline
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'Data-preparation', 'v2'))
+from chunk_dataset import is_chunk_dataset, load_index, iter_chunks as iter_dataset_chunks
 
 def remove_labels_from_chunk(chunk):
     """
@@ -38,16 +44,19 @@ def remove_labels_from_chunk(chunk):
     
     return clean_chunk, ground_truth
 
-def extract_chunks_by_type(file_path, n_system=20, n_network=10):
+def iter_chunks(file_path):
     """
-    Extract chunks from a JSON array file, categorized by log type.
-    Returns two lists: system_chunks and network_chunks
-    Labels are removed from individual logs to create proper test data.
+    Stream chunks from a chunks file, one at a time.
+    JSONL files (one chunk per line) are read line by line; legacy
+    pretty-printed JSON arrays are scanned object by object.
     """
-    system_chunks = []
-    network_chunks = []
-    
     with open(file_path, 'r', encoding='utf-8') as f:
+        if file_path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        
         # Skip opening bracket
         f.readline()
         
@@ -67,36 +76,75 @@ def extract_chunks_by_type(file_path, n_system=20, n_network=10):
                 # Remove trailing comma if present
                 if item_str.endswith(','):
                     item_str = item_str[:-1]
+                current_item = []
                 
                 try:
-                    item = json.loads(item_str)
-                    
-                    # Determine if this chunk is primarily system or network logs
-                    if 'logs' in item and len(item['logs']) > 0:
-                        # Count event types in the chunk
-                        system_count = sum(1 for log in item['logs'] if log.get('event_type') == 'system')
-                        network_count = sum(1 for log in item['logs'] if log.get('event_type') == 'network')
-                        
-                        # Remove labels from the chunk and extract ground truth
-                        clean_chunk, ground_truth = remove_labels_from_chunk(item)
-                        
-                        # Categorize based on majority type
-                        if system_count >= network_count:
-                            if len(system_chunks) < n_system:
-                                system_chunks.append((clean_chunk, ground_truth))
-                        else:
-                            if len(network_chunks) < n_network:
-                                network_chunks.append((clean_chunk, ground_truth))
-                    
-                    current_item = []
-                    
-                    # Stop if we have enough of both types
-                    if len(system_chunks) >= n_system and len(network_chunks) >= n_network:
-                        break
-                        
+                    yield json.loads(item_str)
                 except json.JSONDecodeError:
-                    current_item = []
                     bracket_count = 0
+
+def select_entries_by_type(index, n_system=20, n_network=10):
+    """
+    Pick chunks from a chunk dataset's index by their event-type counts,
+    without reading any chunk.
+    Returns the selected index entries in dataset order.
+    """
+    selected = []
+    n_selected = {'system': 0, 'network': 0}
+    limits = {'system': n_system, 'network': n_network}
+    
+    for entry in index:
+        event_types = entry['event_types']
+        if not event_types:
+            continue
+        
+        # Same majority rule as extract_chunks_by_type()
+        kind = 'system' if event_types.get('system', 0) >= event_types.get('network', 0) else 'network'
+        if n_selected[kind] < limits[kind]:
+            selected.append(entry)
+            n_selected[kind] += 1
+        
+        if n_selected['system'] >= n_system and n_selected['network'] >= n_network:
+            break
+    
+    return selected
+
+def extract_chunks_by_type(file_path, n_system=20, n_network=10):
+    """
+    Extract chunks from a chunk dataset or chunks file (JSONL or JSON array), categorized by log type.
+    Returns two lists: system_chunks and network_chunks
+    Labels are removed from individual logs to create proper test data.
+    Chunk datasets are selected from their index, so only the chosen chunks are read.
+    """
+    system_chunks = []
+    network_chunks = []
+    
+    if is_chunk_dataset(file_path):
+        chunks = iter_dataset_chunks(file_path, select_entries_by_type(load_index(file_path), n_system, n_network))
+    else:
+        chunks = iter_chunks(file_path)
+    
+    for item in chunks:
+        # Determine if this chunk is primarily system or network logs
+        if 'logs' in item and len(item['logs']) > 0:
+            # Count event types in the chunk
+            system_count = sum(1 for log in item['logs'] if log.get('event_type') == 'system')
+            network_count = sum(1 for log in item['logs'] if log.get('event_type') == 'network')
+            
+            # Remove labels from the chunk and extract ground truth
+            clean_chunk, ground_truth = remove_labels_from_chunk(item)
+            
+            # Categorize based on majority type
+            if system_count >= network_count:
+                if len(system_chunks) < n_system:
+                    system_chunks.append((clean_chunk, ground_truth))
+            else:
+                if len(network_chunks) < n_network:
+                    network_chunks.append((clean_chunk, ground_truth))
+        
+        # Stop if we have enough of both types
+        if len(system_chunks) >= n_system and len(network_chunks) >= n_network:
+            break
     
     return system_chunks, network_chunks
 
@@ -114,7 +162,7 @@ for file in os.listdir(data_dir):
 # Extract normal chunks (20 system, 10 network)
 print('\nExtracting normal chunks...')
 normal_system, normal_network = extract_chunks_by_type(
-    'E:/Hacking/Mitre-Dataset/Data-preparation/v2/training_data/normal_chunks.json',
+    'E:/Hacking/Mitre-Dataset/Data-preparation/v2/training_data/normal_chunks',
     n_system=20,
     n_network=10
 )
@@ -143,7 +191,7 @@ for i, (chunk, ground_truth) in enumerate(normal_network):
 # Extract suspicious chunks (20 system, 10 network)
 print('\nExtracting suspicious chunks...')
 suspicious_system, suspicious_network = extract_chunks_by_type(
-    'E:/Hacking/Mitre-Dataset/Data-preparation/v2/training_data/suspicious_chunks.json',
+    'E:/Hacking/Mitre-Dataset/Data-preparation/v2/training_data/suspicious_chunks',
     n_system=20,
     n_network=10
 )